@@ -4,7 +4,9 @@ from __future__ import annotations
 import json
 import os
 import re
-import uuid
+import sqlite3
+import threading
+from collections.abc import Iterable, Iterator, Mapping
 from datetime import datetime
 from io import BytesIO
 from os import PathLike
@@ -15,48 +17,48 @@ import pandas as pd  # για data_editor/exports
 import streamlit as st
 import streamlit.components.v1 as components
 
-from settings import BACKUPS_DIR, EXPORTS_DIR, LOG_PATH, OUTPUTS_DIR
+from data_parser import codec
+from data_parser.blobs import BlobStore, load_field
+from data_parser.fts import HAS_FTS5, FtsIndex
+from data_parser.jsonl import write_records
+from data_parser.matching import HAS_RAPIDFUZZ, normalize_inv
+from data_parser.merge import mark_edited, merge_feed
+from data_parser.pipeline import (
+    ALLOWED_STATUS,
+    InvoiceIndex,
+    build_feed,
+    enrich_emails,
+    harden_record,
+    infer_source,
+    normalize_common,
+    now_iso,
+    offload_payloads,
+    relink_emails,
+)
+from data_parser.record_store import RecordStore
+from data_parser.storage import FeedStorage, JsonFeedStorage, open_storage
+from settings import (
+    BACKUPS_DIR,
+    BLOBS_DIR,
+    EXPORTS_DIR,
+    FTS_PATH,
+    LOG_PATH,
+    OUTPUTS_DIR,
+    SEARCH_BACKEND,
+    SEARCH_GREEKLISH,
+    SQLITE_PATH,
+    STORAGE_BACKEND,
+    SUMMARY_LIST,
+    TYPED_RECORDS,
+)
 from settings import COMBINED_PATH as DATA_PATH
 from settings import EMAILS_DIR as DUMMY_EMAILS_DIR
 from settings import FORMS_DIR as DUMMY_FORMS_DIR
 from settings import INVOICES_DIR as DUMMY_INVOICES_DIR
 
-# ---------- Προαιρετικά: Fuzzy matching & Validation ----------
-HAS_MATCHING = False
+# ---------- Προαιρετικά: Validation ----------
 HAS_VALIDATION = False
 
-try:
-    from data_parser.matching import build_invoice_lookup as _build_lookup_ext
-    from data_parser.matching import fuzzy_find as _fuzzy_find_ext
-    from data_parser.matching import normalize_inv as _norm_inv_ext
-
-    HAS_MATCHING = True
-except Exception:
-
-    def _norm_inv_ext(s: str | None) -> str:
-        if not s:
-            return ""
-        return "".join(ch for ch in str(s).upper() if ch.isalnum())
-
-    def _build_lookup_ext(invoices: list[dict[str, Any]]) -> dict[str, dict[str, Any]]:
-        return {
-            _norm_inv_ext(r.get("invoice_number")): r
-            for r in invoices
-            if r.get("source") == "invoice_html" and r.get("invoice_number")
-        }
-
-    def _fuzzy_find_ext(
-        candidate: str, lookup: dict[str, Any], score_cutoff: int = 0
-    ) -> tuple[dict[str, Any] | None, int]:
-        key = _norm_inv_ext(candidate)
-        if key in lookup:
-            return lookup[key], 100
-        for k, rec in lookup.items():
-            if key and (key in k or k in key):
-                return rec, 80
-        return None, 0
-
-
 try:
     from data_parser.validation import validate_email_record as _validate_email_ext
     from data_parser.validation import validate_form_record as _validate_form_ext
@@ -75,8 +77,6 @@ except Exception:
         return d, []
 
 
-ALLOWED_STATUS = ["pending", "approved", "rejected", "edited"]
-
 # ---------- Multi-language (EL/EN) ----------
 I18N = {
     "EL": {
@@ -100,6 +100,7 @@ I18N = {
         "EMAIL_CONTENT": "Περιεχόμενο Email (Plain Text)",
         "READABILITY_FORMAT": "Μορφοποίηση για ανάγνωση",
         "MESSAGE_BODY": "Μήνυμα",
+        "SHOW_EMAIL_HTML": "Εμφάνιση HTML",
         "SELLER": "Εκδότης",
         "BUYER": "Πελάτης",
         "INVOICE_NUMBER": "Αριθμός",
@@ -196,6 +197,7 @@ I18N = {
         "EMAIL_CONTENT": "Email content (plain text)",
         "READABILITY_FORMAT": "Readability formatting",
         "MESSAGE_BODY": "Message",
+        "SHOW_EMAIL_HTML": "Show HTML",
         "SELLER": "Seller",
         "BUYER": "Buyer",
         "INVOICE_NUMBER": "Number",
@@ -323,51 +325,17 @@ def ensure_dirs() -> None:
     EXPORTS_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def now_iso() -> str:
-    return datetime.now().isoformat(timespec="seconds")
-
-
-def make_id(prefix: str) -> str:
-    return f"{prefix}_{uuid.uuid4().hex[:12]}"
-
-
-# --- Normalization helpers (ίδιο πνεύμα με main.py) ---
-def _normalize_common(rec: dict[str, Any], source: str) -> dict[str, Any]:
-    out = dict(rec)
-    out["source"] = source
-    if out.get("status") not in ALLOWED_STATUS:
-        out["status"] = "pending"
-    if not out.get("id"):
-        out["id"] = make_id(source)
-    out.setdefault("created_at", now_iso())
-    out.setdefault("schema_version", "1.0")
-    out.setdefault("needs_action", False)
-    if source == "email" and out.get("email_type") == "invoice":
-        needs = (
-            out.get("missing_attachment")
-            or not out.get("has_pdf_attachments")
-            or not out.get("matched_invoice_html")
-        )
-        out["needs_action"] = bool(needs)
-    return out
-
-
+# --- Normalization (οι κανόνες id/status/needs_action ζουν στο data_parser.pipeline) ---
 def _harden_list(recs: list[dict[str, Any]]) -> list[dict[str, Any]]:
-    hardened: list[dict[str, Any]] = []
-    for r in recs:
-        src = r.get("source") or (
-            "email" if "email_type" in r else ("invoice_html" if "invoice_number" in r else "form")
-        )
-        hardened.append(_normalize_common(r, src))
-    return hardened
+    return [normalize_common(r, infer_source(r)) for r in recs]
 
 
 def log_action(action: str, details: dict | None = None, level: str = "INFO") -> None:
     try:
         ensure_dirs()
         line = {"ts": now_iso(), "level": level, "action": action, "details": details or {}}
-        with Path(LOG_PATH).open("a", encoding="utf-8") as f:
-            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+        with Path(LOG_PATH).open("ab") as f:
+            f.write(codec.dumps(line) + b"\n")
     except Exception:
         pass
 
@@ -387,74 +355,231 @@ def ui_info(msg: str, action: str = "info", details: dict | None = None) -> None
     log_action(action, details=details, level="INFO")
 
 
-def _norm_invoice_no_local(s: str | None) -> str:
-    if not s:
+@st.cache_resource
+def _open_storage(backend: str, json_path: str, sqlite_path: str) -> FeedStorage:
+    """Ένα backend ανά (backend, paths), κοινό σε reruns και sessions (όπως το _feed_cache)."""
+    return open_storage(backend, json_path, sqlite_path)
+
+
+def get_storage() -> FeedStorage:
+    """Backend αποθήκευσης από settings (ATHENAGEN_STORAGE=json|sqlite)."""
+    return _open_storage(STORAGE_BACKEND, str(DATA_PATH), str(SQLITE_PATH))
+
+
+def get_fts() -> FtsIndex | None:
+    """FTS5 index (ATHENAGEN_SEARCH=fts)· None αν δεν είναι ενεργό ή η SQLite δεν έχει FTS5."""
+    if SEARCH_BACKEND != "fts" or not HAS_FTS5:
+        return None
+    return FtsIndex(str(FTS_PATH))
+
+
+class FeedCache:
+    """
+    Φορτωμένο feed (RecordStore με τα indexes του), κοινό σε reruns και sessions.
+    Key = (backend, version()) των αρχείων: ένα rerun (π.χ. πληκτρολόγηση στο search)
+    κάνει μόνο stat()· νέο διάβασμα γίνεται μόνο όταν αλλάξει κάτι στον δίσκο.
+    Το store είναι κοινό σε όλες τις sessions: κάθε αλλαγή του (και των indexes του) και κάθε
+    ανάγνωση μέσω indexes γίνεται κάτω από το lock, και η σελίδα επεξεργάζεται αντίγραφα
+    εγγραφών (ποτέ in-place τις εγγραφές του store).
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.RLock()
+        self.key: tuple[Any, ...] | None = None
+        self.store = RecordStore()
+
+
+def get_blobs() -> BlobStore:
+    return BlobStore(BLOBS_DIR)
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _load_blob(sha: str) -> str:
+    """Τα blobs είναι immutable (content-addressed), άρα αρκεί cache ανά sha256."""
+    return get_blobs().get(sha) or ""
+
+
+def record_payload(rec: Mapping[str, Any] | None, field: str) -> str:
+    """body_html / source_html μιας εγγραφής: inline (παλιά feeds) ή lazy από το blob store."""
+    if not rec:
         return ""
-    return "".join(ch for ch in str(s).upper() if ch.isalnum())
+    ref = rec.get(f"{field}_ref")
+    if isinstance(ref, dict) and ref.get("sha256") and not rec.get(field):
+        return _load_blob(str(ref["sha256"]))
+    return load_field(dict(rec), field, None)
+
 
+@st.cache_resource
+def _feed_cache() -> FeedCache:
+    return FeedCache()
 
-def load_data() -> list[dict[str, Any]]:
+
+def _feed_key(store: FeedStorage) -> tuple[Any, ...]:
+    return (store.name, tuple(store.files()), store.version())
+
+
+def load_data() -> RecordStore:
     ensure_dirs()
     data_path = Path(DATA_PATH)
-    if not data_path.exists():
+    try:
+        store = get_storage()
+        if store.name != "json" and not store.exists() and data_path.exists():
+            # πρώτη εκκίνηση με άλλο backend: εισαγωγή του υπάρχοντος combined_feed.json
+            store.replace_all(JsonFeedStorage(str(data_path)).load_all())
+            log_action("import_feed", {"backend": store.name, "from": str(data_path)})
+        key = _feed_key(store)
+        cache = _feed_cache()
+        with cache.lock:
+            if cache.key == key:
+                return cache.store
+        has_data = store.exists()
+    except Exception as e:
+        ui_error("Αποτυχία ανοίγματος αποθήκευσης.", "storage_open_error", {"error": str(e)})
+        return RecordStore()
+    if not has_data:
         ui_warn(
             "Δεν βρέθηκε το outputs/combined_feed.json. Ξεκινάμε με κενή λίστα.", "data_missing"
         )
-        return []
+        return RecordStore()
+    if SUMMARY_LIST and store.supports_lazy:
+        return _load_summaries(store, key)
     try:
-        with data_path.open(encoding="utf-8") as f:
-            data: list[dict[str, Any]] = json.load(f)
+        data: list[dict[str, Any]] = store.load_all()
     except json.JSONDecodeError as e:
         ui_error(
             "Το αρχείο δεδομένων είναι χαλασμένο (JSON). Θα φορτωθεί κενή λίστα.",
             "json_decode_error",
             {"error": str(e)},
         )
-        return []
+        return RecordStore()
     except Exception as e:
         ui_error("Αποτυχία φόρτωσης δεδομένων.", "load_data_error", {"error": str(e)})
-        return []
+        return RecordStore()
 
     try:
         for rec in data:
-            if "source" not in rec:
-                if "email_type" in rec:
-                    rec["source"] = "email"
-                elif "invoice_number" in rec:
-                    rec["source"] = "invoice_html"
-                else:
-                    rec["source"] = "form"
-            if "status" not in rec or rec["status"] not in ALLOWED_STATUS:
-                rec["status"] = "pending"
-            if "id" not in rec or not rec["id"]:
-                rec["id"] = make_id(rec["source"])
-            if "created_at" not in rec:
-                rec["created_at"] = now_iso()
-            if "schema_version" not in rec:
-                rec["schema_version"] = "1.0"
-
-            needs = (
-                rec.get("source") == "email"
-                and rec.get("email_type") == "invoice"
-                and (rec.get("missing_attachment") or not rec.get("matched_invoice_html"))
-            )
-            rec["needs_action"] = bool(needs)
+            harden_record(rec)
     except Exception as e:
         ui_error(
             "Σφάλμα στη σκλήρυνση (hardening) των εγγραφών.",
             "harden_records_error",
             {"error": str(e)},
         )
+        # όχι στην cache: θα ξαναδοκιμάσει στο επόμενο rerun
+        return RecordStore(data, greeklish=SEARCH_GREEKLISH)
+
+    records = RecordStore(data, greeklish=SEARCH_GREEKLISH)
+    try:
+        fts = get_fts()
+        if fts is not None:
+            written, removed = fts.sync(data)  # μόνο οι αλλαγμένες εγγραφές
+            log_action("fts_sync", {"written": written, "removed": removed})
+    except Exception as e:
+        ui_warn("Αποτυχία ενημέρωσης του FTS index.", "fts_sync_error", {"error": str(e)})
+    with cache.lock:
+        cache.key, cache.store = key, records
+    return records
 
-    return data
+
+def _load_summaries(store: FeedStorage, key: tuple[Any, ...]) -> RecordStore:
+    """
+    Summary projection: ένα streaming πέρασμα κρατά μόνο τα πεδία της λίστας/φίλτρων και το
+    κείμενο αναζήτησης· η πλήρης εγγραφή έρχεται από το backend (get_many) όταν επιλεγεί.
+    """
+
+    def _loader(ids: list[str]) -> dict[str, dict[str, Any]]:
+        out = store.get_many(ids)
+        for rec in out.values():
+            harden_record(rec)
+        return out
+
+    def _hardened() -> Iterator[dict[str, Any]]:
+        for rec in store.iter_all():
+            harden_record(rec)
+            yield rec
+
+    fts = get_fts()
+    try:
+        records = RecordStore.from_summaries(
+            _hardened(),
+            _loader,
+            greeklish=SEARCH_GREEKLISH,
+            search=fts is None,
+            typed=TYPED_RECORDS,
+        )
+    except json.JSONDecodeError as e:
+        ui_error(
+            "Το αρχείο δεδομένων είναι χαλασμένο (JSON). Θα φορτωθεί κενή λίστα.",
+            "json_decode_error",
+            {"error": str(e)},
+        )
+        return RecordStore()
+    except Exception as e:
+        ui_error("Αποτυχία φόρτωσης δεδομένων.", "load_data_error", {"error": str(e)})
+        return RecordStore()
+    try:
+        if fts is not None:
+            written, removed = fts.sync(_hardened())  # δεύτερο streaming πέρασμα
+            log_action("fts_sync", {"written": written, "removed": removed})
+    except Exception as e:
+        ui_warn("Αποτυχία ενημέρωσης του FTS index.", "fts_sync_error", {"error": str(e)})
+    cache = _feed_cache()
+    with cache.lock:
+        cache.key, cache.store = key, records
+    return records
+
+
+def _refresh_cache_after_write(
+    store: FeedStorage, before: tuple[Any, ...], data: RecordStore
+) -> None:
+    """
+    Μετά από δικό μας upsert (οι εγγραφές είναι ήδη στο store της μνήμης): η cache μένει
+    έγκυρη με το νέο key, χωρίς νέο διάβασμα του feed. Αν στο μεταξύ έγραψε κάποιος άλλος
+    (άλλο key), απλώς ακυρώνεται.
+    """
+    cache = _feed_cache()
+    with cache.lock:
+        if cache.key != before or cache.store is not data:
+            cache.key = None
+        else:
+            cache.key = _feed_key(store)
+
+
+def _invalidate_cache() -> None:
+    cache = _feed_cache()
+    with cache.lock:
+        cache.key = None
+
+
+def _put_records(
+    data: RecordStore, recs: list[dict[str, Any]] | tuple[dict[str, Any], ...]
+) -> None:
+    """Εγγραφές (σκληρυμένα αντίγραφα) στο store, κατά id· ο caller κρατά το lock της cache."""
+    for rec in recs:
+        rec = dict(rec)
+        harden_record(rec)
+        i = data.index_of(rec["id"])
+        if i < 0:
+            data.append(rec)
+        else:
+            data[i] = rec
+
+
+def _previous(data: RecordStore, ids: Iterable[Any]) -> dict[str, dict[str, Any]]:
+    """Οι εγγραφές του store πριν από ένα edit (για journal μόνο των πεδίων που αλλάζουν)."""
+    out: dict[str, dict[str, Any]] = {}
+    for rec_id in ids:
+        i = data.index_of(rec_id)
+        if i >= 0:
+            out[str(rec_id)] = data.full(i)
+    return out
 
 
 def backup_data(data: list[dict[str, Any]]) -> None:
     try:
         ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-        p = BACKUPS_DIR / f"combined_feed_{ts}.json"
-        with p.open("w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        p = BACKUPS_DIR / f"combined_feed_{ts}{Path(DATA_PATH).suffix}"
+        write_records(data, p)
         log_action("backup_data", {"path": str(p)})
     except Exception as e:
         ui_warn(
@@ -464,17 +589,74 @@ def backup_data(data: list[dict[str, Any]]) -> None:
         )
 
 
-def save_data(data: list[dict[str, Any]]):
+def save_data(data: list[dict[str, Any]] | RecordStore):
+    # summaries -> πλήρεις εγγραφές πριν το πλήρες rewrite
+    with _feed_cache().lock:
+        data = data.resolve(data.records) if isinstance(data, RecordStore) else list(data)
     backup_data(data)
     try:
         hardened = _harden_list(data)  # <- πάντα σκλήρυνση πριν το γράψιμο
-        with open(DATA_PATH, "w", encoding="utf-8") as f:
-            json.dump(hardened, f, indent=2, ensure_ascii=False)
-        log_action("save_data", {"path": DATA_PATH, "count": len(hardened)})
+        store = get_storage()
+        store.replace_all(hardened)
+        _invalidate_cache()  # πλήρες rewrite: ξαναφόρτωση στο επόμενο rerun
+        log_action("save_data", {"backend": store.name, "path": DATA_PATH, "count": len(hardened)})
     except Exception as e:
+        _invalidate_cache()
         ui_error("Αποτυχία αποθήκευσης δεδομένων.", "save_data_error", {"error": str(e)})
 
 
+def save_record(
+    data: RecordStore, *recs: dict[str, Any], previous: dict[str, dict[str, Any]] | None = None
+) -> None:
+    """
+    Αποθήκευση μετά από αλλαγή σε μία (ή λίγες) εγγραφές.
+    Με backend που κάνει upsert γράφονται μόνο αυτές (JSON: μία γραμμή στο edit journal με
+    τα πεδία που άλλαξαν, SQLite: UPSERT)· αλλιώς πλήρες save_data. Οι εγγραφές μπαίνουν
+    πρώτα στο store της μνήμης (κάτω από το lock της cache), ώστε η session να βλέπει αμέσως
+    την αλλαγή. `previous`: οι εγγραφές πριν το edit, αν το store έχει ήδη τις νέες.
+    """
+    with _feed_cache().lock:
+        if previous is None:
+            previous = _previous(data, (r["id"] for r in recs))
+        _put_records(data, recs)
+    store = get_storage()
+    if not store.supports_upsert:
+        save_data(data)
+        return
+    try:
+        hardened = _harden_list(list(recs))
+        before = _feed_key(store)
+        store.upsert(hardened, previous=previous)
+        _refresh_cache_after_write(store, before, data)
+        fts = get_fts()
+        if fts is not None:
+            fts.upsert(hardened)
+        log_action("save_record", {"backend": store.name, "ids": [r["id"] for r in hardened]})
+    except Exception as e:
+        _invalidate_cache()  # η μνήμη έχει την αλλαγή, ο δίσκος όχι: ξαναφόρτωση
+        ui_error("Αποτυχία αποθήκευσης δεδομένων.", "save_data_error", {"error": str(e)})
+
+
+def save_invoice(
+    data: RecordStore, idx: int, inv_rec: dict[str, Any], old_inv_no: str | None
+) -> None:
+    """
+    Αποθήκευση τιμολογίου μετά από οποιονδήποτε editor: τα emails που το αφορούν (παλιός/νέος
+    αριθμός, ίδιο source_file) ξανασυνδέονται (matched_invoice_total κ.λπ.) και γράφονται μαζί.
+    """
+    with _feed_cache().lock:
+        # ό,τι μπορεί να ξαναγράψει το relink_emails, πριν αλλάξει
+        refs = data.emails_referencing(
+            old_inv_no, inv_rec.get("invoice_number"), source_file=inv_rec.get("source_file")
+        )
+        previous = _previous(data, [inv_rec["id"], *(data[i]["id"] for i in refs)])
+        data[idx] = inv_rec
+        relinked = relink_emails(data, inv_rec, old_inv_no)
+    save_record(data, inv_rec, *relinked, previous=previous)
+    if relinked:
+        log_action("relink_emails", {"invoice": inv_rec.get("id"), "emails": len(relinked)})
+
+
 def dump_json_artifact(filename: str, payload: Any) -> str | None:
     """
     Γράφει JSON στο outputs/<filename> με ασφαλή UTF-8 και indent, και log.
@@ -484,8 +666,8 @@ def dump_json_artifact(filename: str, payload: Any) -> str | None:
         ensure_dirs()
         outputs_root = Path(DATA_PATH).parent
         path = outputs_root / filename
-        with path.open("w", encoding="utf-8") as f:
-            json.dump(payload, f, indent=2, ensure_ascii=False)
+        with path.open("wb") as f:
+            codec.dump(payload, f, pretty=True)
         log_action(
             "dump_json_artifact",
             {
@@ -504,13 +686,6 @@ def dump_json_artifact(filename: str, payload: Any) -> str | None:
         return None
 
 
-def find_index_by_id(data: list[dict[str, Any]], rec_id: str) -> int:
-    for i, r in enumerate(data):
-        if r.get("id") == rec_id:
-            return i
-    return -1
-
-
 def parse_total_input(val: str, fallback):
     try:
         clean = str(val).replace("€", "").replace(" ", "").replace(",", "")
@@ -519,19 +694,6 @@ def parse_total_input(val: str, fallback):
         return fallback
 
 
-def find_invoice_record_index_by_number(data: list[dict[str, Any]], inv_no: str) -> int | None:
-    if not inv_no:
-        return None
-    inv_no_norm = _norm_invoice_no_local(inv_no)
-    for i, r in enumerate(data):
-        if (
-            r.get("source") == "invoice_html"
-            and _norm_invoice_no_local(r.get("invoice_number")) == inv_no_norm
-        ):
-            return i
-    return None
-
-
 # ----- Template helpers -----
 def read_template_columns(path: str | PathLike[str]) -> list[str] | None:
     p = str(path)
@@ -642,7 +804,7 @@ def _as_float(v):
 def build_template_df(
     records: list[dict[str, Any]],
     template_cols: list[str],
-    invoice_index: dict[str, dict[str, Any]] | None = None,
+    invoice_index: Mapping[str, dict[str, Any]] | None = None,
 ) -> pd.DataFrame:
     header_map = build_template_mapping(template_cols)
 
@@ -652,7 +814,7 @@ def build_template_df(
         if not inv_no or not isinstance(inv_no, str):
             return None
         inv_key = inv_no
-        return invoice_index.get(inv_key) or invoice_index.get(_norm_invoice_no_local(inv_key))
+        return invoice_index.get(inv_key) or invoice_index.get(normalize_inv(inv_key))
 
     rows: list[dict[str, Any]] = []
 
@@ -978,26 +1140,6 @@ def run_app() -> None:
 
     data = load_data()
 
-    # index για parsed τιμολόγια (raw + normalized) — explicit types + None-safety
-    invoice_index: dict[str, dict[str, Any]] = {}
-    invoice_index_combined: dict[str, dict[str, Any]] = {}
-    try:
-        invoice_index = {
-            str(r["invoice_number"]): r
-            for r in data
-            if r.get("source") == "invoice_html" and r.get("invoice_number")
-        }
-        invoice_index_norm: dict[str, dict[str, Any]] = {
-            _norm_invoice_no_local(str(r["invoice_number"])): r
-            for r in data
-            if r.get("source") == "invoice_html" and r.get("invoice_number")
-        }
-
-        # normalized wins for lookups, but keep raw too
-        invoice_index_combined = {**invoice_index_norm, **invoice_index}
-    except Exception as exc:
-        ui_warn("Σφάλμα δημιουργίας invoice index.", "invoice_index_error", {"error": str(exc)})
-
     # Sidebar (Filters / Rebuild)
     with st.sidebar:
         # --- Language switch (one-click, instant) ---
@@ -1030,7 +1172,9 @@ def run_app() -> None:
         q = st.text_input(t("SEARCH"))
 
         sort_key = st.selectbox(
-            t("SORT_BY"), options=["date", "created_at", "source", "status"], index=0
+            t("SORT_BY"),
+            options=["date", "created_at", "source", "status", "relevance"],
+            index=0,
         )
         sort_desc = st.checkbox(t("DESC_SORT"), value=False)
 
@@ -1048,35 +1192,39 @@ def run_app() -> None:
         st.subheader("Rebuild feed")
 
         # Fuzzy controls
-        if HAS_MATCHING:
+        if HAS_RAPIDFUZZ:
             fuzzy_on = st.checkbox("🔎 Fuzzy match invoice numbers (rapidfuzz)", value=True)
             fuzzy_threshold = st.slider("Κατώφλι Fuzzy score", 60, 100, 88, 1)
         else:
             fuzzy_on = False
             fuzzy_threshold = 0
-            st.caption("Fuzzy matching module δεν βρέθηκε · γίνεται μόνο exact matching.")
+            st.caption("Το rapidfuzz δεν είναι εγκατεστημένο · γίνεται μόνο exact matching.")
+        signals_on = st.checkbox(
+            "📎 Match και χωρίς αριθμό (PDF, ποσό, domain, ημερομηνία)",
+            value=True,
+            help="Email χωρίς αριθμό τιμολογίου ταιριάζουν από όνομα PDF, ποσό, domain και ημερομηνία.",
+        )
 
         if st.button("🔄 Τρέξε parsers & ανανέωσε δεδομένα", key="rebuild_btn"):
             try:
                 with st.spinner("Τρέχουν οι parsers…"):
-                    import re as _re
-
+                    from data_parser.manifest import MANIFEST_NAME, ParseManifest
+                    from data_parser.matching import NGRAM_INDEX_NAME, InvoiceNgramIndex
                     from data_parser.parse_emails import parse_all_emails as _parse_emails
                     from data_parser.parse_forms import parse_all_forms as _parse_forms
                     from data_parser.parse_invoices import parse_all_invoices as _parse_invoices
 
-                    def _extract_inv_no(txt: str | None):
-                        pat = _re.compile(
-                            r"(?:invoice|τιμολ(?:όγιο|\.?)|αρ\.?\s*τιμολ(?:ογίου)?)\s*(?:no\.?|#|nr\.?|:)?\s*([A-Z]{0,4}[-/]?\d[\w\-\/]+)",
-                            _re.IGNORECASE,
-                        )
-                        m = pat.search(txt or "")
-                        return m.group(1).strip() if m else None
+                    # Incremental: ξανα-parse μόνο νέα/αλλαγμένα αρχεία (manifest δίπλα στο feed)
+                    manifest = ParseManifest.load(str(Path(DATA_PATH).parent / MANIFEST_NAME))
 
                     # --- ΧΡΗΣΗ ΑΠΟΛΥΤΩΝ ΔΙΑΔΡΟΜΩΝ ---
-                    forms_raw = _parse_forms(str(DUMMY_FORMS_DIR))
-                    emails_raw = _parse_emails(str(DUMMY_EMAILS_DIR))
-                    invoices_raw = _parse_invoices(str(DUMMY_INVOICES_DIR))
+                    forms_raw = _parse_forms(str(DUMMY_FORMS_DIR), manifest=manifest)
+                    emails_raw = _parse_emails(str(DUMMY_EMAILS_DIR), manifest=manifest)
+                    invoices_raw = _parse_invoices(str(DUMMY_INVOICES_DIR), manifest=manifest)
+                    try:
+                        manifest.save()
+                    except Exception as exc:
+                        log_action("manifest_save_error", {"error": str(exc)}, level="WARN")
 
                     # Validation (αν υπάρχει)
                     def _safe_validate(fn, rec):
@@ -1101,52 +1249,39 @@ def run_app() -> None:
                     else:
                         forms, emails, invoices = forms_raw, emails_raw, invoices_raw
 
-                    inv_lookup = _build_lookup_ext(invoices)
-
-                    enriched_emails = []
-                    for e in emails:
-                        inv_no = _extract_inv_no(e.get("subject", "")) or _extract_inv_no(
-                            e.get("body", "")
-                        )
-                        matched, score = None, None
-                        if inv_no:
-                            if fuzzy_on:
-                                matched, score = _fuzzy_find_ext(
-                                    inv_no, inv_lookup, score_cutoff=fuzzy_threshold
-                                )
-                            else:
-                                matched = inv_lookup.get(_norm_inv_ext(inv_no))
-                                score = 100 if matched else None
+                    # ίδια enrichment/normalization με το main.py (data_parser.pipeline)
+                    timings: dict[str, float] = {}
 
-                        enriched_emails.append(
-                            {
-                                **e,
-                                "invoice_number_in_subject": inv_no,
-                                "matched_invoice_html": bool(matched),
-                                "matched_invoice_file": (
-                                    matched.get("source_file") if matched else None
-                                ),
-                                "matched_invoice_total": matched.get("total") if matched else None,
-                                "matched_via": (
-                                    "fuzzy"
-                                    if (matched and (score is not None and score < 100))
-                                    else ("exact" if matched else "none")
-                                ),
-                                "fuzzy_score": score,
-                                "needs_action": (e.get("email_type") == "invoice")
-                                and (
-                                    e.get("missing_attachment")
-                                    or not e.get("has_pdf_attachments")
-                                    or not matched
-                                ),
-                            }
-                        )
+                    def _on_stage(stage: str, seconds: float) -> None:
+                        timings[stage] = round(seconds * 1000, 1)
 
-                    combined = (
-                        [{"source": "form", "status": "pending", **r} for r in forms]
-                        + [{"source": "email", "status": "pending", **r} for r in enriched_emails]
-                        + [{"source": "invoice_html", "status": "pending", **r} for r in invoices]
+                    emails, invoices = offload_payloads(
+                        emails,
+                        invoices,
+                        get_blobs(),
+                        str(DUMMY_INVOICES_DIR),
+                        on_stage=_on_stage,
                     )
+                    # n-gram index του fuzzy δίπλα στο manifest (μόνο τα νέα τιμολόγια σε add)
+                    ngrams_path = str(Path(DATA_PATH).parent / NGRAM_INDEX_NAME)
+                    ngrams = InvoiceNgramIndex.load(ngrams_path) if fuzzy_on else None
+                    enriched_emails = enrich_emails(
+                        emails,
+                        InvoiceIndex(invoices, ngrams),
+                        fuzzy=fuzzy_threshold if fuzzy_on else None,
+                        signals=signals_on,
+                        on_stage=_on_stage,
+                    )
+                    if ngrams is not None:
+                        try:
+                            ngrams.save(ngrams_path)
+                        except Exception as exc:
+                            log_action("ngram_save_error", {"error": str(exc)}, level="WARN")
+                    combined = build_feed(forms, enriched_emails, invoices, on_stage=_on_stage)
+                    # Keyed merge με το τρέχον feed: δεν χάνονται approvals/notes/edits
+                    with _feed_cache().lock:
+                        current = data.resolve(data.records)
+                    combined = merge_feed(current, combined)
 
                     dump_json_artifact("parsed_forms.json", forms)
                     dump_json_artifact("parsed_emails.json", emails)
@@ -1161,44 +1296,48 @@ def run_app() -> None:
                         "invoices": len(invoices),
                         "ts": now_iso(),
                     }
+                    log_action("rebuild_timings_ms", timings)
 
                 st.rerun()
             except Exception as e:
                 ui_error("Απέτυχε το rebuild των δεδομένων.", "rebuild_error", {"error": str(e)})
 
-    # Apply filters
-    def match_query(rec: dict[str, Any], q: str) -> bool:
-        if not q:
-            return True
-        try:
-            hay = " ".join(
-                [
-                    str(rec.get("subject", "")),
-                    str(rec.get("full_name", "")),
-                    str(rec.get("email", "")),
-                    str(rec.get("company", "")),
-                    str(rec.get("invoice_number", "")),
-                    str(rec.get("service", "")),
-                ]
-            ).lower()
-            return q.lower() in hay
-        except Exception:
-            return True
+        if STORAGE_BACKEND != "json" and st.button(
+            "⬇️ Export combined_feed.json", key="export_feed_json_btn"
+        ):
+            try:
+                path = get_storage().export_json(str(DATA_PATH))
+                st.success(f"Γράφτηκε το {path}")
+                log_action("export_feed_json", {"path": path})
+            except Exception as e:
+                ui_error("Αποτυχία export του feed.", "export_feed_json_error", {"error": str(e)})
 
+    # Apply filters (search: FTS5/BM25 αν είναι ενεργό, αλλιώς το trigram index του RecordStore)
+    rank: dict[str, int] = {}
     try:
-        view = [
-            r
-            for r in data
-            if r.get("source") in sources
-            and r.get("status") in statuses
-            and (not needs_action_only or r.get("needs_action"))
-            and match_query(r, q)
-        ]
+        fts = get_fts() if q else None
+        within: set[int] | None = None
+        ids: list[str] | None = None
+        if fts is not None:
+            try:
+                ids = fts.search(q)
+                rank = {rid: n for n, rid in enumerate(ids)}
+            except sqlite3.Error as e:
+                ui_warn("Σφάλμα FTS αναζήτησης.", "fts_search_error", {"error": str(e)})
+        with _feed_cache().lock:
+            within = (
+                {i for i in map(data.index_of, ids) if i >= 0}
+                if ids is not None
+                else data.search(q)
+            )
+            view = data.select(sources, statuses, needs_action_only, within=within)
     except Exception as e:
         view = []
         ui_error("Σφάλμα εφαρμογής φίλτρων/αναζήτησης.", "filter_error", {"error": str(e)})
 
     def safe_sort_key(r: dict[str, Any]):
+        if sort_key == "relevance":  # BM25 σειρά του FTS (αλλιώς σειρά του feed)
+            return rank.get(r.get("id", ""), len(rank))
         val = r.get(sort_key)
         return val if val is not None else ""
 
@@ -1274,9 +1413,12 @@ def run_app() -> None:
 
         if run_it:
             try:
-                records_for_export = view if scope == t("FILTERED") else data
+                with _feed_cache().lock:
+                    records_for_export = data.resolve(
+                        view if scope == t("FILTERED") else data.records
+                    )
                 df_export = build_template_df(
-                    records_for_export, template_cols, invoice_index=invoice_index_combined
+                    records_for_export, template_cols, invoice_index=data.invoices
                 )
 
                 ensure_dirs()
@@ -1400,7 +1542,12 @@ def run_app() -> None:
 
         # -------- Record details --------
         rec = view[sel]
-        idx = find_index_by_id(data, rec.get("id", ""))
+        with _feed_cache().lock:
+            idx = data.index_of(rec.get("id", ""))
+            if idx >= 0:
+                # η λίστα κρατά summaries: πλήρης εγγραφή μόνο για την επιλογή, ως αντίγραφο
+                # της session (οι αλλαγές πάνε στο κοινό store μόνο μέσω save_record)
+                rec = dict(data.full(idx))
         if idx < 0:
             ui_error(
                 "Η επιλεγμένη εγγραφή δεν βρέθηκε στα δεδομένα.",
@@ -1420,10 +1567,13 @@ def run_app() -> None:
             inv_no_raw = rec.get("invoice_number_in_subject") or rec.get("invoice_number")
             inv_key: str = inv_no_raw if isinstance(inv_no_raw, str) else ""
             if inv_key:
-                invoice_payload = invoice_index_combined.get(inv_key) or invoice_index_combined.get(
-                    _norm_invoice_no_local(inv_key)
-                )
-                invoice_rec_idx = find_invoice_record_index_by_number(data, inv_key)
+                with _feed_cache().lock:
+                    invoice_payload = data.find_invoice(inv_key)
+                    invoice_rec_idx = data.invoice_index_of(inv_key)
+                    if invoice_payload is not None:
+                        inv_pos = data.index_of(invoice_payload.get("id", ""))
+                        if inv_pos >= 0:
+                            invoice_payload = dict(data.full(inv_pos))
     except Exception as e:
         ui_warn(
             "Σφάλμα αντιστοίχισης email → invoice.",
@@ -1431,22 +1581,24 @@ def run_app() -> None:
             {"error": str(e)},
         )
 
-    # -- Προεπισκόπηση HTML τιμολογίου (θα εμφανιστεί στο col1)
-    preview_html: str | None = None
+    # -- Προεπισκόπηση HTML τιμολογίου (θα εμφανιστεί στο col1): εδώ μόνο εντοπίζεται η πηγή,
+    #    το HTML διαβάζεται (blob ή αρχείο) όταν ανοίξει το expander
+    preview_rec: Mapping[str, Any] | None = None
+    preview_file: Path | None = None
     html_title: str | None = None
     try:
+        preview_name: str | None = None
         if rec.get("source") == "email" and rec.get("matched_invoice_file"):
-            candidate = DUMMY_INVOICES_DIR / rec["matched_invoice_file"]
-            if candidate.exists():
-                html_title = f"{t('INVOICE_PREVIEW')}: {rec['matched_invoice_file']}"
-                with candidate.open(encoding="utf-8", errors="ignore") as f:
-                    preview_html = f.read()
+            preview_name = rec["matched_invoice_file"]
+            if invoice_payload and invoice_payload.get("source_file") == preview_name:
+                preview_rec = invoice_payload
         elif rec.get("source") == "invoice_html" and rec.get("source_file"):
-            candidate = DUMMY_INVOICES_DIR / rec["source_file"]
-            if candidate.exists():
-                html_title = f"{t('INVOICE_PREVIEW')}: {rec['source_file']}"
-                with candidate.open(encoding="utf-8", errors="ignore") as f:
-                    preview_html = f.read()
+            preview_name, preview_rec = rec["source_file"], rec
+        if preview_name:
+            candidate = DUMMY_INVOICES_DIR / preview_name
+            preview_file = candidate if candidate.exists() else None
+            if preview_file is not None or (preview_rec and preview_rec.get("source_html_ref")):
+                html_title = f"{t('INVOICE_PREVIEW')}: {preview_name}"
     except Exception as e:
         ui_warn(
             "Αποτυχία ανάγνωσης αρχείου HTML τιμολογίου.",
@@ -1471,8 +1623,7 @@ def run_app() -> None:
                     new_status = label_to_status(new_status_label)
                     rec["status"] = new_status
                     rec["updated_at"] = now_iso()
-                    data[idx] = rec
-                    save_data(data)
+                    save_record(data, rec)
                     st.success(f"{t('STATUS')} → {status_to_label(new_status)}")
                     log_action("change_status", {"record_id": rec.get("id"), "status": new_status})
                 except Exception as e:
@@ -1486,8 +1637,7 @@ def run_app() -> None:
                 try:
                     rec["status"] = "approved"
                     rec["updated_at"] = now_iso()
-                    data[idx] = rec
-                    save_data(data)
+                    save_record(data, rec)
                     st.success("Εγκρίθηκε (approved).")
                     log_action("approve_record", {"record_id": rec.get("id")})
                 except Exception as e:
@@ -1496,8 +1646,7 @@ def run_app() -> None:
                 try:
                     rec["status"] = "rejected"
                     rec["updated_at"] = now_iso()
-                    data[idx] = rec
-                    save_data(data)
+                    save_record(data, rec)
                     st.success("Απορρίφθηκε (rejected).")
                     log_action("reject_record", {"record_id": rec.get("id")})
                 except Exception as e:
@@ -1516,8 +1665,7 @@ def run_app() -> None:
                     try:
                         rec["notes"] = note
                         rec["updated_at"] = now_iso()
-                        data[idx] = rec
-                        save_data(data)
+                        save_record(data, rec)
                         st.success("Σημειώσεις αποθηκεύτηκαν.")
                         log_action("save_notes", {"record_id": rec.get("id")})
                     except Exception as e:
@@ -1551,6 +1699,19 @@ def run_app() -> None:
                         priority = st.text_input(t("PRIORITY"), value=str(rec.get("priority", "")))
                         submitted = st.form_submit_button(t("SAVE_CHANGES"))
                         if submitted:
+                            mark_edited(
+                                rec,
+                                [
+                                    "full_name",
+                                    "email",
+                                    "phone",
+                                    "company",
+                                    "service",
+                                    "message",
+                                    "submission_date",
+                                    "priority",
+                                ],
+                            )
                             rec.update(
                                 {
                                     "full_name": full_name,
@@ -1565,8 +1726,7 @@ def run_app() -> None:
                                     "status": rec.get("status", "pending"),
                                 }
                             )
-                            data[idx] = rec
-                            save_data(data)
+                            save_record(data, rec)
                             st.success("Αποθηκεύτηκαν οι αλλαγές (form).")
 
                     elif src == "email":
@@ -1575,6 +1735,7 @@ def run_app() -> None:
                         company = st.text_input(t("COMPANY"), value=rec.get("company", ""))
                         submitted = st.form_submit_button(t("SAVE_CHANGES"))
                         if submitted:
+                            mark_edited(rec, ["subject", "email", "company"])
                             rec.update(
                                 {
                                     "subject": subject,
@@ -1584,8 +1745,7 @@ def run_app() -> None:
                                     "status": rec.get("status", "pending"),
                                 }
                             )
-                            data[idx] = rec
-                            save_data(data)
+                            save_record(data, rec)
                             st.success("Αποθηκεύτηκαν οι αλλαγές (email).")
 
                     else:  # invoice_html – βασικά meta
@@ -1595,6 +1755,8 @@ def run_app() -> None:
                         total_val = st.text_input(t("TOTAL_FIELD"), value=str(rec.get("total", "")))
                         submitted = st.form_submit_button(t("SAVE_CHANGES"))
                         if submitted:
+                            old_inv_no = rec.get("invoice_number")
+                            mark_edited(rec, ["invoice_number", "total"])
                             rec.update(
                                 {
                                     "invoice_number": inv_no,
@@ -1603,8 +1765,7 @@ def run_app() -> None:
                                     "status": rec.get("status", "pending"),
                                 }
                             )
-                            data[idx] = rec
-                            save_data(data)
+                            save_invoice(data, idx, rec, old_inv_no)
                             st.success("Αποθηκεύτηκαν οι αλλαγές (invoice).")
             except Exception as e:
                 ui_warn("Αποτυχία εμφάνισης SAFE EDIT.", "safe_edit_error", {"error": str(e)})
@@ -1655,6 +1816,14 @@ def run_app() -> None:
                         height=300,
                         key=f"email_body_{rec.get('id', '')}",
                     )
+                    has_html = rec.get("body_html") or rec.get("body_html_ref")
+                    if has_html and st.checkbox(
+                        t("SHOW_EMAIL_HTML"), value=False, key=f"email_html_{rec.get('id', '')}"
+                    ):
+                        # το blob διαβάζεται μόνο εδώ, όταν ζητηθεί
+                        components.html(
+                            record_payload(rec, "body_html"), height=500, scrolling=True
+                        )
             except Exception as e:
                 ui_warn(
                     "Αποτυχία εμφάνισης editor γενικών πεδίων.",
@@ -1810,7 +1979,20 @@ def run_app() -> None:
                     if st.button(t("SAVE_ITEMS_CALC"), key="save_items_btn"):
                         try:
                             target_idx = invoice_rec_idx if invoice_rec_idx is not None else idx
-                            inv_rec = dict(data[target_idx])
+                            with _feed_cache().lock:
+                                inv_rec = dict(data.full(target_idx))
+                            old_inv_no = inv_rec.get("invoice_number")
+                            mark_edited(
+                                inv_rec,
+                                [
+                                    "items",
+                                    "currency",
+                                    "subtotal",
+                                    "vat_rate",
+                                    "vat_amount",
+                                    "total",
+                                ],
+                            )
                             inv_rec.update(
                                 {
                                     "items": cleaned_items,
@@ -1823,12 +2005,11 @@ def run_app() -> None:
                                     "updated_at": now_iso(),
                                 }
                             )
-                            data[target_idx] = inv_rec
+                            save_invoice(data, target_idx, inv_rec, old_inv_no)
                             if target_idx == idx:
                                 for k, v in inv_rec.items():
                                     if k != "id":
                                         rec[k] = v
-                            save_data(data)
                             st.success("Αποθηκεύτηκαν οι γραμμές & οι υπολογισμοί.")
                             log_action("save_items_calc", {"record_id": rec.get("id")})
                         except Exception as e:
@@ -1899,7 +2080,24 @@ def run_app() -> None:
                     if st.button(t("SAVE_INVOICE_META"), key="save_invoice_meta_btn"):
                         try:
                             target_idx = invoice_rec_idx if invoice_rec_idx is not None else idx
-                            inv_rec = dict(data[target_idx])
+                            with _feed_cache().lock:
+                                inv_rec = dict(data.full(target_idx))
+                            old_inv_no = inv_rec.get("invoice_number")
+                            mark_edited(
+                                inv_rec,
+                                [
+                                    "seller_name",
+                                    "seller_email",
+                                    "seller_phone",
+                                    "seller_vat",
+                                    "seller_tax_office",
+                                    "seller_address",
+                                    "buyer_name",
+                                    "buyer_vat",
+                                    "buyer_address",
+                                    "payment_method",
+                                ],
+                            )
                             inv_rec.update(
                                 {
                                     "seller_name": seller_name,
@@ -1916,12 +2114,11 @@ def run_app() -> None:
                                     "updated_at": now_iso(),
                                 }
                             )
-                            data[target_idx] = inv_rec
+                            save_invoice(data, target_idx, inv_rec, old_inv_no)
                             if target_idx == idx:
                                 for k, v in inv_rec.items():
                                     if k != "id":
                                         rec[k] = v
-                            save_data(data)
                             st.success("Αποθηκεύτηκαν τα στοιχεία τιμολογίου (status=edited).")
                             log_action("save_invoice_parties", {"record_id": rec.get("id")})
                         except Exception as e:
@@ -1938,9 +2135,13 @@ def run_app() -> None:
                     )
 
         # -------- Προεπισκόπηση HTML τιμολογίου --------
-        if preview_html:
+        if html_title:
             try:
-                with st.expander(html_title or t("INVOICE_PREVIEW"), expanded=False):
+                with st.expander(html_title, expanded=False):
+                    preview_html = record_payload(preview_rec, "source_html")
+                    if not preview_html and preview_file is not None:
+                        with preview_file.open(encoding="utf-8", errors="ignore") as f:
+                            preview_html = f.read()
                     st.markdown(
                         "<style>.invoice-preview iframe { background: #fff !important; }</style>",
                         unsafe_allow_html=True,
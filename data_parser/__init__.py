@@ -1,6 +1,13 @@
 # data_parser/__init__.py
-from .parse_emails import parse_all_emails
-from .parse_forms import parse_all_forms
-from .parse_invoices import parse_all_invoices
+from .parse_emails import iter_all_emails, parse_all_emails
+from .parse_forms import iter_all_forms, parse_all_forms
+from .parse_invoices import iter_all_invoices, parse_all_invoices
 
-__all__ = ["parse_all_emails", "parse_all_forms", "parse_all_invoices"]
+__all__ = [
+    "iter_all_emails",
+    "iter_all_forms",
+    "iter_all_invoices",
+    "parse_all_emails",
+    "parse_all_forms",
+    "parse_all_invoices",
+]
@@ -0,0 +1,107 @@
+# data_parser/blobs.py
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+import zlib
+from typing import Any
+
+__all__ = [
+    "BLOBS_DIR_NAME",
+    "BLOB_FIELDS",
+    "BlobStore",
+    "externalize",
+    "load_field",
+]
+
+BLOBS_DIR_NAME = "blobs"
+
+# Βαριά πεδία που φεύγουν από το feed: το raw HTML του email και το HTML της πηγής τιμολογίου.
+# Το plain `body` μένει inline: το χρειάζονται search, FTS και το matching (ποσά, αριθμοί).
+BLOB_FIELDS: tuple[str, ...] = ("body_html", "source_html")
+
+_CHUNK = 1 << 20
+
+
+class BlobStore:
+    """
+    Content-addressed, zlib-compressed αποθήκη: outputs/blobs/<sha256>.zlib.
+    Το sha256 είναι του ασυμπίεστου UTF-8 περιεχομένου, οπότε ίδια bodies γράφονται μία φορά.
+    Οι εγγραφές κρατούν μόνο {"sha256", "size"} στο πεδίο <field>_ref.
+    """
+
+    def __init__(self, root: str | os.PathLike[str]) -> None:
+        self.root = str(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, sha: str) -> str:
+        return os.path.join(self.root, f"{sha}.zlib")
+
+    def _commit(self, tmp: str, sha: str) -> None:
+        dst = self.path(sha)
+        if os.path.exists(dst):
+            os.remove(tmp)  # dedup: υπάρχει ήδη
+        else:
+            os.replace(tmp, dst)
+
+    def put(self, data: str | bytes) -> dict[str, Any]:
+        raw = data.encode("utf-8") if isinstance(data, str) else data
+        sha = hashlib.sha256(raw).hexdigest()
+        if not os.path.exists(self.path(sha)):
+            fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(zlib.compress(raw, 6))
+            self._commit(tmp, sha)
+        return {"sha256": sha, "size": len(raw)}
+
+    def put_file(self, path: str | os.PathLike[str]) -> dict[str, Any]:
+        """Αρχείο -> blob σε κομμάτια (hash και συμπίεση στο ίδιο πέρασμα)."""
+        h = hashlib.sha256()
+        comp = zlib.compressobj(6)
+        size = 0
+        with open(path, "rb") as src:
+            fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+            with os.fdopen(fd, "wb") as out:
+                for chunk in iter(lambda: src.read(_CHUNK), b""):
+                    h.update(chunk)
+                    size += len(chunk)
+                    out.write(comp.compress(chunk))
+                out.write(comp.flush())
+        sha = h.hexdigest()
+        self._commit(tmp, sha)
+        return {"sha256": sha, "size": size}
+
+    def get(self, ref: dict[str, Any] | str | None) -> str | None:
+        """Περιεχόμενο ενός ref (ή sha256)· None αν λείπει ή είναι χαλασμένο."""
+        sha = ref.get("sha256") if isinstance(ref, dict) else ref
+        if not sha:
+            return None
+        try:
+            with open(self.path(str(sha)), "rb") as f:
+                return zlib.decompress(f.read()).decode("utf-8", errors="replace")
+        except (OSError, zlib.error):
+            return None
+
+
+def externalize(
+    rec: dict[str, Any], store: BlobStore, fields: tuple[str, ...] = BLOB_FIELDS
+) -> dict[str, Any]:
+    """Αντίγραφο της εγγραφής με τα μη κενά `fields` στο blob store (<field>_ref αντί για inline)."""
+    out = dict(rec)
+    for field in fields:
+        value = out.get(field)
+        if isinstance(value, str) and value:
+            out[f"{field}_ref"] = store.put(value)
+            del out[field]
+    return out
+
+
+def load_field(rec: dict[str, Any], field: str, store: BlobStore | None) -> str:
+    """Inline τιμή αν υπάρχει (παλιά feeds), αλλιώς lazy ανάγνωση από το blob store."""
+    value = rec.get(field)
+    if isinstance(value, str) and value:
+        return value
+    if store is None:
+        return ""
+    return store.get(rec.get(f"{field}_ref")) or ""
@@ -0,0 +1,88 @@
+# data_parser/codec.py
+from __future__ import annotations
+
+import json
+from collections.abc import Callable
+from typing import IO, Any
+
+__all__ = ["BACKEND", "dump", "dumps", "dumps_str", "load", "loads"]
+
+# Προαιρετικά: orjson ή msgspec (όποιο είναι εγκατεστημένο), αλλιώς stdlib json.
+# Η έξοδος είναι ίδια byte προς byte σε όλα τα backends:
+#   pretty  -> όπως json.dumps(indent=2, ensure_ascii=False)
+#   compact -> όπως json.dumps(separators=(",", ":"), ensure_ascii=False)
+# Εξαίρεση μόνο floats σε εκθετική μορφή (orjson: 1e16, stdlib: 1e+16 — ίδια τιμή στο load)
+# και NaN/Infinity, που το orjson γράφει null. Τα ποσά του feed δεν φτάνουν ποτέ εκεί.
+BACKEND = "json"
+try:
+    import orjson
+
+    BACKEND = "orjson"
+except ImportError:  # pragma: no cover - εξαρτάται από το περιβάλλον
+    orjson = None  # type: ignore[assignment]
+    try:
+        import msgspec
+
+        BACKEND = "msgspec"
+    except ImportError:
+        msgspec = None
+
+Default = Callable[[Any], Any]
+
+
+def _stdlib_dumps(obj: Any, pretty: bool, default: Default | None) -> bytes:
+    if pretty:
+        text = json.dumps(obj, indent=2, ensure_ascii=False, default=default)
+    else:
+        text = json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=default)
+    return text.encode("utf-8")
+
+
+def dumps(obj: Any, pretty: bool = False, default: Default | None = None) -> bytes:
+    """
+    Σειριοποίηση σε UTF-8 bytes. Ό,τι δεν σηκώνει το γρήγορο backend (π.χ. μη-string
+    κλειδιά, ακέραιοι > 64 bit, NaN) γράφεται από το stdlib, με την ίδια μορφή.
+    """
+    if BACKEND == "orjson":
+        try:
+            return orjson.dumps(obj, default=default, option=orjson.OPT_INDENT_2 if pretty else 0)
+        except (TypeError, ValueError):
+            pass
+    elif BACKEND == "msgspec":
+        try:
+            raw = msgspec.json.encode(obj, enc_hook=default)
+            return msgspec.json.format(raw, indent=2) if pretty else raw
+        except (TypeError, ValueError, msgspec.EncodeError):
+            pass
+    return _stdlib_dumps(obj, pretty, default)
+
+
+def dumps_str(obj: Any, pretty: bool = False, default: Default | None = None) -> str:
+    return dumps(obj, pretty, default).decode("utf-8")
+
+
+def loads(data: bytes | bytearray | str) -> Any:
+    """
+    Αποσειριοποίηση από bytes ή str. Αν το γρήγορο backend αρνηθεί το έγγραφο (π.χ. NaN
+    που έγραψε το stdlib), ξαναδοκιμάζει με json.loads· τα πραγματικά σφάλματα μένουν
+    json.JSONDecodeError.
+    """
+    if BACKEND == "orjson":
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    elif BACKEND == "msgspec":
+        try:
+            return msgspec.json.decode(data)
+        except msgspec.DecodeError:
+            pass
+    return json.loads(data)
+
+
+def dump(obj: Any, fp: IO[bytes], pretty: bool = False, default: Default | None = None) -> None:
+    fp.write(dumps(obj, pretty, default))
+
+
+def load(fp: IO[bytes]) -> Any:
+    return loads(fp.read())
@@ -0,0 +1,238 @@
+# data_parser/email_match.py
+from __future__ import annotations
+
+import re
+from datetime import date
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+from .matching import InvoiceNgramIndex, normalize_inv
+
+__all__ = [
+    "DATE_WINDOW_DAYS",
+    "MATCH_THRESHOLD",
+    "SIGNAL_WEIGHTS",
+    "InvoiceMatcher",
+    "email_amounts",
+    "matched_via",
+]
+
+# Πόντοι ανά σήμα (άθροισμα, με ταβάνι το 100). Το "number" είναι ο αριθμός τιμολογίου από
+# subject/body με ίδιο κλειδί (normalize_inv), το "fuzzy" ένα fuzzy match του (πόντοι ανάλογα
+# με το score), το "filename" ο αριθμός μέσα στο όνομα του PDF συνημμένου: καθένα από αυτά
+# αρκεί μόνο του, τα υπόλοιπα χρειάζονται συνδυασμό.
+SIGNAL_WEIGHTS: dict[str, int] = {
+    "number": 50,
+    "fuzzy": 50,
+    "filename": 50,
+    "amount": 30,
+    "domain": 15,
+    "date": 15,
+}
+MATCH_THRESHOLD = 50
+DATE_WINDOW_DAYS = 7
+
+_MONEY_RE = re.compile(
+    r"(?:€|EUR)\s*(\d[\d.,]*\d|\d)|(\d[\d.,]*\d|\d)\s*(?:€|EUR|ευρώ)", re.IGNORECASE
+)
+_TOTAL_RE = re.compile(
+    r"\b(?:συνολικ\w*(?:\s+ποσ\w*)?|σύνολο|πληρωτέο|grand\s+total|total(?:\s+amount)?|amount\s+due)"
+    r"[^\d€]{0,20}(?:€\s*)?(\d[\d.,]*\d|\d)",
+    re.IGNORECASE,
+)
+_FILENAME_SPLIT_RE = re.compile(r"[\s_.()\[\]]+")
+# '1.984' / '12,500': ένα διαχωριστικό ανά 3 ψηφία είναι χιλιάδες, όχι δεκαδικά
+_THOUSANDS_RE = re.compile(r"\d{1,3}([.,])\d{3}(?:\1\d{3})*")
+
+
+def _amount(tok: str) -> int | None:
+    """'1,984.00' / '1.984,00' / '1.984' / '1984' -> λεπτά (int), ή None."""
+    t = tok.strip(".,")
+    if _THOUSANDS_RE.fullmatch(t):
+        return int(re.sub(r"[.,]", "", t)) * 100
+    european = "," in t and t.rfind(",") > t.rfind(".")
+    t = t.replace(".", "").replace(",", ".") if european else t.replace(",", "")
+    try:
+        return round(float(t) * 100)
+    except ValueError:
+        return None
+
+
+def email_amounts(text: str | None) -> set[int]:
+    """
+    Ποσά (σε λεπτά) ενός email: τα «Σύνολο/Total ...» αν υπάρχουν, αλλιώς όλα τα ποσά με €.
+    Έτσι οι γραμμές ειδών δεν δίνουν ψεύτικα matches όταν το email γράφει ρητά σύνολο.
+    """
+    if not text:
+        return set()
+    totals = {c for m in _TOTAL_RE.finditer(text) if (c := _amount(m.group(1))) is not None}
+    if totals:
+        return totals
+    return {
+        c for m in _MONEY_RE.finditer(text) if (c := _amount(m.group(1) or m.group(2))) is not None
+    }
+
+
+def _domain(addr: Any) -> str:
+    s = str(addr or "").strip().lower()
+    return s.rsplit("@", 1)[1] if "@" in s else ""
+
+
+def _email_day(value: Any) -> int | None:
+    """Date header (RFC 2822) ή ISO ημερομηνία -> ordinal ημέρας."""
+    if not value:
+        return None
+    s = str(value).strip()
+    try:
+        return parsedate_to_datetime(s).date().toordinal()
+    except (TypeError, ValueError, IndexError):
+        pass
+    try:
+        return date.fromisoformat(s[:10]).toordinal()
+    except ValueError:
+        return None
+
+
+def _filename_keys(names: Any) -> list[str]:
+    keys: list[str] = []
+    for name in names or ():
+        for tok in _FILENAME_SPLIT_RE.split(str(name or "")):
+            key = normalize_inv(tok)
+            if key and key not in keys:
+                keys.append(key)
+    return keys
+
+
+def matched_via(signals: dict[str, int]) -> str:
+    """
+    Breakdown για το πεδίο matched_via, π.χ. "exact+amount+domain+date".
+    Το σήμα του αριθμού γράφεται "exact" ή "fuzzy" (όπως πριν τα πολλαπλά σήματα).
+    """
+    if not signals:
+        return "none"
+    return "+".join("exact" if s == "number" else s for s in signals)
+
+
+class InvoiceMatcher:
+    """
+    Ταίριασμα email -> invoice_html με πολλαπλά σήματα: αριθμός τιμολογίου, όνομα PDF,
+    ποσό, domain αποστολέα vs seller_email, απόσταση ημερομηνιών.
+    Blocking indexes (κλειδί αριθμού, λεπτά ποσού, seller domain, ημέρα) κρατούν τους
+    υποψήφιους ανά email σε λίγα τιμολόγια, οπότε το κόστος είναι γραμμικό στα emails.
+    match() -> (invoice_or_None, score 0..100, {σήμα: πόντοι}). Ένας exact αριθμός (ή, χωρίς
+    αυτόν, ένα όνομα PDF) κερδίζει απευθείας: τα άλλα σήματα τότε μόνο βαθμολογούν. Αλλιώς δεκτό
+    είναι το καλύτερο score >= threshold· ένα fuzzy match αριθμού αρκεί μόνο του, όπως πριν.
+    """
+
+    def __init__(
+        self,
+        invoices: list[dict[str, Any]],
+        fuzzy_cutoff: int | None = None,
+        threshold: int = MATCH_THRESHOLD,
+        ngrams: InvoiceNgramIndex | None = None,
+    ) -> None:
+        self.invoices = invoices
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.threshold = threshold
+        self._by_key: dict[str, int] = {}
+        self._by_amount: dict[int, list[int]] = {}
+        self._by_domain: dict[str, set[int]] = {}
+        self._days: list[int | None] = []
+        self._ngrams = ngrams  # ίδια κλειδιά (normalize_inv), π.χ. το InvoiceIndex.ngrams()
+        for i, inv in enumerate(invoices):
+            key = normalize_inv(inv.get("invoice_number"))
+            if key:
+                self._by_key[key] = i  # τελευταίο κερδίζει, όπως στο build_invoice_lookup
+            total = inv.get("total")
+            if isinstance(total, (int, float)) and not isinstance(total, bool):
+                self._by_amount.setdefault(round(total * 100), []).append(i)
+            dom = _domain(inv.get("seller_email"))
+            if dom:
+                self._by_domain.setdefault(dom, set()).add(i)
+            self._days.append(_email_day(inv.get("date")))
+
+    def _number_hit(self, inv_no: str | None) -> tuple[int | None, int, bool]:
+        """
+        (τιμολόγιο, score, exact). exact μόνο για ίδιο κλειδί: το partial_ratio δίνει 100 και
+        σε απλό substring (TF-2024-001 μέσα στο TF-2024-0011).
+        """
+        key = normalize_inv(inv_no)
+        if not key:
+            return None, 0, False
+        i = self._by_key.get(key)
+        if i is not None:
+            return i, 100, True
+        if self.fuzzy_cutoff is None:
+            return None, 0, False
+        if self._ngrams is None:
+            self._ngrams = InvoiceNgramIndex(self._by_key)
+        found, score = self._ngrams.find_key(key, score_cutoff=self.fuzzy_cutoff)
+        i = self._by_key.get(found) if found is not None else None
+        return (i, score, False) if i is not None else (None, 0, False)
+
+    def _domain_hits(self, addr: Any) -> set[int]:
+        dom = _domain(addr)
+        if not dom:
+            return set()
+        hits = set(self._by_domain.get(dom, ()))
+        # subdomain (billing.acme.gr vs acme.gr) μετρά επίσης
+        parts = dom.split(".")
+        for j in range(1, len(parts) - 1):
+            hits |= self._by_domain.get(".".join(parts[j:]), set())
+        return hits
+
+    def match(
+        self, email: dict[str, Any], inv_no: str | None = None
+    ) -> tuple[dict[str, Any] | None, int, dict[str, int]]:
+        cands: dict[int, dict[str, float]] = {}
+
+        num_hit, num_score, exact = self._number_hit(inv_no)
+        if num_hit is not None:
+            cands.setdefault(num_hit, {})["number" if exact else "fuzzy"] = num_score / 100
+        for key in _filename_keys(email.get("attachment_names")):
+            i = self._by_key.get(key)
+            if i is not None:
+                cands.setdefault(i, {})["filename"] = 1.0
+        for cents in email_amounts(email.get("body")):
+            for bucket in (cents - 1, cents, cents + 1):  # ανοχή ±1 λεπτό στη στρογγυλοποίηση
+                for i in self._by_amount.get(bucket, ()):
+                    cands.setdefault(i, {})["amount"] = 1.0
+        # domain + date μόνα τους (30) δεν φτάνουν το κατώφλι: υποψήφιοι βγαίνουν μόνο από
+        # τα επιλεκτικά blocks (number / filename / amount), τα άλλα δύο απλώς βαθμολογούν
+        if not cands:
+            return None, 0, {}
+
+        domain_hits = self._domain_hits(email.get("email"))
+        day = _email_day(email.get("date"))
+        if num_hit is not None and exact:
+            pool = [num_hit]
+        else:
+            pool = [i for i in sorted(cands) if "filename" in cands[i]] or sorted(cands)
+        scored = [self._score(i, cands[i], domain_hits, day) for i in pool]
+        best = max(scored, key=lambda r: r[1])  # στην ισοπαλία το πρώτο, με σειρά τιμολογίων
+        if best[1] < self.threshold:
+            best = next((r for r in scored if r[0] == num_hit), best)
+        i, score, points = best
+        if score < self.threshold and not points.keys() & {"number", "fuzzy"}:
+            return None, score, points
+        return self.invoices[i], score, points
+
+    def _score(
+        self, i: int, sig: dict[str, float], domain_hits: set[int], day: int | None
+    ) -> tuple[int, int, dict[str, int]]:
+        if i in domain_hits:
+            sig["domain"] = 1.0
+        inv_day = self._days[i]
+        if day is not None and inv_day is not None:
+            gap = abs(day - inv_day)
+            if gap <= DATE_WINDOW_DAYS:
+                sig["date"] = 1 - gap / (DATE_WINDOW_DAYS + 1)
+        points = {
+            name: round(SIGNAL_WEIGHTS[name] * sig[name]) for name in SIGNAL_WEIGHTS if name in sig
+        }
+        return i, min(100, sum(points.values())), points
+
+    def match_many(
+        self, emails: list[dict[str, Any]], inv_nos: list[str | None]
+    ) -> list[tuple[dict[str, Any] | None, int, dict[str, int]]]:
+        return [self.match(e, n) for e, n in zip(emails, inv_nos, strict=True)]
@@ -0,0 +1,185 @@
+# data_parser/fts.py
+from __future__ import annotations
+
+import hashlib
+import html
+import re
+import sqlite3
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from .search_index import normalize_text
+
+__all__ = ["FTS_NAME", "HAS_FTS5", "FtsIndex", "fts_query"]
+
+FTS_NAME = "combined_feed.fts.sqlite"
+
+
+def _has_fts5() -> bool:
+    try:
+        con = sqlite3.connect(":memory:")
+        try:
+            con.execute("CREATE VIRTUAL TABLE t USING fts5(x)")
+        finally:
+            con.close()
+        return True
+    except sqlite3.Error:
+        return False
+
+
+# Το FTS5 είναι compile option της SQLite: χωρίς αυτό η app μένει στο SearchIndex
+HAS_FTS5 = _has_fts5()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docmap (
+    rid INTEGER PRIMARY KEY,
+    id TEXT UNIQUE NOT NULL,
+    digest TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS docs USING fts5(
+    subject, names, body, notes, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+# βάρη BM25 ανά στήλη: subject, names, body, notes
+_WEIGHTS = (3.0, 2.0, 1.0, 1.0)
+_NAME_FIELDS = (
+    "full_name",
+    "email",
+    "company",
+    "service",
+    "invoice_number",
+    "seller_name",
+    "buyer_name",
+)
+_TAG_RE = re.compile(r"<[^>]+>")
+_PHRASE_RE = re.compile(r'"([^"]*)"')
+
+
+def _html_text(s: str) -> str:
+    return html.unescape(_TAG_RE.sub(" ", s))
+
+
+def _columns(rec: dict[str, Any]) -> tuple[str, str, str, str]:
+    """Folded κείμενο ανά στήλη (ίδιο normalize με το SearchIndex: χωρίς τόνους, ς -> σ)."""
+    body = rec.get("body") or (_html_text(str(rec["body_html"])) if rec.get("body_html") else "")
+    notes = " ".join(str(rec[f]) for f in ("extra_notes", "notes") if rec.get(f))
+    names = " ".join(str(rec[f]) for f in _NAME_FIELDS if rec.get(f))
+    return (
+        normalize_text(rec.get("subject") or ""),
+        normalize_text(names),
+        normalize_text(body),
+        normalize_text(notes),
+    )
+
+
+def fts_query(query: str | None) -> str:
+    """
+    Query του χρήστη -> FTS5 MATCH: "..." = φράση, κάθε άλλη λέξη = prefix (λέξη*),
+    όλα με AND. Τα tokens είναι μόνο αλφαριθμητικά, οπότε δεν χρειάζεται escaping.
+    """
+    q = query or ""
+    terms = [f'"{p}"' for p in map(normalize_text, _PHRASE_RE.findall(q)) if p]
+    terms += [f'"{tok}"*' for tok in normalize_text(_PHRASE_RE.sub(" ", q)).split()]
+    return " ".join(terms)
+
+
+class FtsIndex:
+    """
+    SQLite FTS5 index δίπλα στο feed (outputs/combined_feed.fts.sqlite), με BM25 ranking.
+    - sync: incremental ως προς το feed (digest ανά εγγραφή: ξαναγράφονται μόνο οι αλλαγμένες)
+    - upsert: μετά από edit στην app
+    - search: ids ταξινομημένα κατά BM25
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = str(path)
+        with self._connect() as con:
+            con.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        con = sqlite3.connect(self.path, timeout=30)
+        try:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    @staticmethod
+    def _prepare(recs: Iterable[dict[str, Any]]) -> dict[str, tuple[str, tuple[str, ...]]]:
+        out: dict[str, tuple[str, tuple[str, ...]]] = {}
+        for rec in recs:
+            if not rec.get("id"):
+                continue
+            cols = _columns(rec)
+            digest = hashlib.sha1("\x1f".join(cols).encode("utf-8")).hexdigest()
+            out[str(rec["id"])] = (digest, cols)
+        return out
+
+    @staticmethod
+    def _write(
+        con: sqlite3.Connection,
+        docs: dict[str, tuple[str, tuple[str, ...]]],
+        known: dict[str, tuple[int, str]] | None = None,
+    ) -> int:
+        n = 0
+        for rec_id, (digest, cols) in docs.items():
+            if known is None:
+                row = con.execute(
+                    "SELECT rid, digest FROM docmap WHERE id = ?", (rec_id,)
+                ).fetchone()
+            else:
+                row = known.get(rec_id)
+            if row is not None and row[1] == digest:
+                continue
+            if row is None:
+                rid = con.execute(
+                    "INSERT INTO docmap (id, digest) VALUES (?, ?)", (rec_id, digest)
+                ).lastrowid
+            else:
+                rid = row[0]
+                con.execute("UPDATE docmap SET digest = ? WHERE rid = ?", (digest, rid))
+                con.execute("DELETE FROM docs WHERE rowid = ?", (rid,))
+            con.execute(
+                "INSERT INTO docs (rowid, subject, names, body, notes) VALUES (?, ?, ?, ?, ?)",
+                (rid, *cols),
+            )
+            n += 1
+        return n
+
+    def sync(self, recs: Iterable[dict[str, Any]]) -> tuple[int, int]:
+        """Ευθυγράμμιση με το feed. Επιστρέφει (γραμμένες, διαγραμμένες) εγγραφές."""
+        docs = self._prepare(recs)
+        with self._connect() as con:
+            known = {
+                rec_id: (rid, digest)
+                for rid, rec_id, digest in con.execute("SELECT rid, id, digest FROM docmap")
+            }
+            stale = [(rid,) for rec_id, (rid, _) in known.items() if rec_id not in docs]
+            con.executemany("DELETE FROM docs WHERE rowid = ?", stale)
+            con.executemany("DELETE FROM docmap WHERE rid = ?", stale)
+            written = self._write(con, docs, known)
+        return written, len(stale)
+
+    def upsert(self, recs: Iterable[dict[str, Any]]) -> int:
+        docs = self._prepare(recs)
+        with self._connect() as con:
+            return self._write(con, docs)
+
+    def search(self, query: str | None, limit: int | None = None) -> list[str]:
+        """Ids που ταιριάζουν, με την καλύτερη BM25 βαθμολογία πρώτα."""
+        match = fts_query(query)
+        if not match:
+            return []
+        weights = ", ".join(str(w) for w in _WEIGHTS)
+        sql = (
+            "SELECT m.id FROM docs JOIN docmap m ON m.rid = docs.rowid "
+            f"WHERE docs MATCH ? ORDER BY bm25(docs, {weights}) LIMIT ?"
+        )
+        with self._connect() as con:
+            rows = con.execute(sql, (match, -1 if limit is None else limit)).fetchall()
+        return [r[0] for r in rows]
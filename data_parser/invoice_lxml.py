@@ -0,0 +1,365 @@
+# data_parser/invoice_lxml.py
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+from typing import Any
+
+try:
+    from lxml import etree
+
+    HAS_LXML = True
+except ImportError:  # pragma: no cover - εξαρτάται από το περιβάλλον
+    etree = None
+    HAS_LXML = False
+
+try:
+    from .parse_invoices import (
+        SUMMARY_HINT,
+        Summary,
+        _build_record,
+        _buyer_from_text,
+        _is_flex,
+        _items_from_rows,
+        _note_from_text,
+        _nw,
+        _seller_from_texts,
+        _summary_from_rows,
+    )
+except ImportError:  # εκτέλεση ως script
+    from parse_invoices import (  # type: ignore[no-redef]
+        SUMMARY_HINT,
+        Summary,
+        _build_record,
+        _buyer_from_text,
+        _is_flex,
+        _items_from_rows,
+        _note_from_text,
+        _nw,
+        _seller_from_texts,
+        _summary_from_rows,
+    )
+
+__all__ = ["HAS_LXML", "PLANS", "LayoutPlans", "layout_fingerprint", "parse_invoice_tree"]
+
+# Ίδια εγγραφή με το _parse_invoice_soup, αλλά πάνω σε lxml tree με precompiled XPath:
+# χωρίς τα Python objects του BeautifulSoup ανά κόμβο και χωρίς soupsieve για τα selectors.
+# Κάθε συνάρτηση εδώ αντιστοιχεί σε μία _extract_* του bs4 path, με την ίδια σημασιολογία
+# (select_one -> πρώτο στη σειρά του εγγράφου, find_all -> απόγονοι, όχι ο ίδιος κόμβος).
+
+
+# bs4 get_text() δεν μετρά strings μέσα σε script/style (Script, Stylesheet): εδώ αδειάζει το
+# κείμενό τους μετά τον εντοπισμό του πίνακα σύνοψης (όχι strip: θα ένωνε τα γειτονικά strings).
+# Τα template/rt/rp (που έχουν και στοιχεία μέσα) είναι σπάνια σε τιμολόγια -> πάνε στο bs4.
+_STRIP = ("script", "style")
+
+if HAS_LXML:
+    _HTML = etree.HTMLParser()
+    _CLASSED = etree.XPath("//*[@class]")
+    _UNSUPPORTED = etree.XPath("boolean(//template | //rt | //rp)")
+    _COMPANY = etree.XPath(
+        "(descendant::*[contains(concat(' ', normalize-space(@class), ' '), ' company ')])[1]"
+    )
+    # soup.find_next("div"): ο επόμενος <div> στη σειρά του εγγράφου, μαζί με τους απογόνους
+    _NEXT_DIV = etree.XPath("(descendant::div | following::div)[1]")
+    _STRONG = etree.XPath("(descendant::strong | descendant::b)[1]")
+
+# select_one() της bs4 διαδρομής: (όνομα, tag ή None για οποιοδήποτε, class)
+_LANDMARKS: tuple[tuple[str, str | None, str], ...] = (
+    ("header", None, "header"),
+    ("details", None, "invoice-details"),
+    ("items", "table", "invoice-table"),
+    ("summary", "div", "summary"),
+)
+
+Node = Any  # lxml.etree._Element
+
+# Το tree builder του libxml2 πετά ό,τι ακολουθεί ένα πρόωρο </body>/</html>, ενώ το bs4 (που
+# χτίζει το δέντρο από events) το κρατά· τέτοια έγγραφα πάνε κατευθείαν στο bs4.
+_DOC_END = re.compile(r"</(?:body|html)\s*>", re.I)
+_TRAILER = re.compile(r"(?:\s|</(?:body|html)\s*>|<!--.*?-->)*", re.I | re.S)
+
+
+def _truncated_by_tree(html: str) -> bool:
+    m = _DOC_END.search(html)
+    return m is not None and _TRAILER.fullmatch(html, m.end()) is None
+
+
+def _first(xpath: Any, node: Node) -> Node | None:
+    found = xpath(node)
+    return found[0] if found else None
+
+
+def _text(node: Node, sep: str = "") -> str:
+    if not len(node):  # φύλλο (τα περισσότερα κελιά): χωρίς iterator
+        return node.text or ""
+    return sep.join(node.itertext())
+
+
+def _landmarks(root: Node) -> dict[str, Node]:
+    """Πρώτο στοιχείο (σειρά εγγράφου) για κάθε selector, με ένα πέρασμα στα στοιχεία με class."""
+    found: dict[str, Node] = {}
+    for el in _CLASSED(root):
+        classes = el.get("class", "").split()
+        for key, tag, cls in _LANDMARKS:
+            if key not in found and cls in classes and (tag is None or el.tag == tag):
+                found[key] = el
+        if len(found) == len(_LANDMARKS):
+            break
+    return found
+
+
+def _divs(node: Node) -> list[Node]:
+    return [c for c in node if c.tag == "div"]
+
+
+def _has_string(node: Node, pattern: re.Pattern[str]) -> bool:
+    # tbl.find(string=...): κάθε string ξεχωριστά, και σχόλια/script (όπως στο bs4)
+    for el in node.iter():
+        if el.text and pattern.search(el.text):
+            return True
+        if el is not node and el.tail and pattern.search(el.tail):
+            return True
+    return False
+
+
+def _seller(header: Node | None, company: Node | None) -> dict[str, Any]:
+    if header is None:
+        return {}
+    name = _nw(_text(company)) if company is not None else ""
+    return _seller_from_texts(name, [_nw(_text(d, " ")) for d in header.iterdescendants("div")])
+
+
+def _details_columns(details: Node | None) -> list[Node]:
+    if details is None:
+        return []
+    for child in _divs(details):
+        if _is_flex(child.get("style")):
+            return _divs(child)
+    for child in details.iterdescendants("div"):
+        if _is_flex(child.get("style")):
+            return _divs(child)
+    return []
+
+
+def _items(tbl: Node | None) -> tuple[list[dict[str, Any]], str]:
+    if tbl is None:
+        return _items_from_rows([])
+    tbody = next(tbl.iterdescendants("tbody"), None)
+    rows = [_row_cells(tr) for tr in (tbody if tbody is not None else tbl).iterdescendants("tr")]
+    return _items_from_rows([r for r in rows if r is not None])
+
+
+def _row_cells(tr: Node) -> list[str] | None:
+    """Τα 4 πρώτα <td> της γραμμής (και εμφωλευμένα), ή None αν είναι λιγότερα."""
+    tds = list(tr.iterdescendants("td"))
+    if len(tds) < 4:
+        return None
+    return [_nw(_text(td, " ")) for td in tds[:4]]
+
+
+def _summary_table(root: Node, div_sum: Node | None) -> Node | None:
+    tbl = next(div_sum.iterdescendants("table"), None) if div_sum is not None else None
+    if tbl is None:
+        tbl = next((t for t in root.iter("table") if _has_string(t, SUMMARY_HINT)), None)
+    return tbl
+
+
+def _summary(tbl: Node | None) -> Summary:
+    if tbl is None:
+        return None, None, None, None, "EUR"
+    rows: list[tuple[str, str]] = []
+    for tr in tbl.iterdescendants("tr"):
+        tds = list(tr.iterdescendants("td", "th"))
+        if len(tds) >= 2:
+            rows.append((_nw(_text(tds[0], " ")), _nw(_text(tds[-1], " "))))
+    return _summary_from_rows(_nw(_text(tbl, " ")), rows)
+
+
+def _notes(start: Node) -> list[dict[str, str]]:
+    notes: list[dict[str, str]] = []
+    for p in start.iterdescendants("p"):
+        txt = _nw(_text(p, " "))
+        if not txt:
+            continue
+        strong = _first(_STRONG, p)
+        notes.append(_note_from_text(txt, _text(strong) if strong is not None else None))
+    return notes
+
+
+def _discover(root: Node) -> dict[str, Node | None]:
+    """Οι κόμβοι που χρειάζεται η εξαγωγή, με τους ίδιους κανόνες που εφαρμόζει το bs4 path."""
+    found = _landmarks(root)
+    header, div_sum = found.get("header"), found.get("summary")
+    cols = _details_columns(found.get("details"))
+    return {
+        "header": header,
+        "company": _first(_COMPANY, header) if header is not None else None,
+        "left": cols[0] if cols else None,
+        "right": cols[1] if len(cols) >= 2 else None,
+        "items": found.get("items"),
+        "summary_div": div_sum,
+        "summary": _summary_table(root, div_sum),  # ψάχνει και σε script/σχόλια
+    }
+
+
+# ---------- layout plans ----------
+# Κάθε προμηθευτής στέλνει πάντα το ίδιο layout. Το skeleton είναι τα <div>/<table> και τα
+# στοιχεία με class, το καθένα με τη θέση του γονέα του στο skeleton, το αν είναι άμεσο παιδί
+# του και το αν ο <div> είναι flex wrapper. Δεν μπαίνει μέσα σε <table>, οπότε δεν εξαρτάται
+# από το πλήθος γραμμών. Το plan κρατά τη θέση κάθε κόμβου της _discover στο skeleton: ένα
+# γνωστό layout παίρνει τους κόμβους κατευθείαν, χωρίς selectors και flex detection.
+_OPAQUE = frozenset({"table", "script", "style"})
+
+Skeleton = tuple[tuple[int, bool, str, str | None, bool], ...]
+Plan = dict[str, Any]
+
+
+def _skeleton(root: Node) -> tuple[Skeleton, list[Node]]:
+    nodes: list[Node] = []
+    sig: list[tuple[int, bool, str, str | None, bool]] = []
+
+    # αναδρομή αντί για στοίβα (~2x πιο γρήγορη)· πολύ βαθύ έγγραφο σηκώνει RecursionError
+    # και ο caller γυρνά στο bs4
+    def walk(el: Node, parent: int, direct: bool) -> None:
+        for child in el:
+            tag = child.tag
+            if not isinstance(tag, str):  # σχόλια / processing instructions
+                continue
+            cls = child.get("class")
+            if cls or tag == "div" or tag == "table":
+                me = len(nodes)
+                nodes.append(child)
+                style = child.get("style") if tag == "div" else None
+                sig.append((parent, direct, tag, cls, style is not None and _is_flex(style)))
+                if tag != "table":
+                    walk(child, me, True)
+            elif tag not in _OPAQUE:
+                walk(child, parent, False)
+
+    walk(root, -1, True)
+    return tuple(sig), nodes
+
+
+def _hidden_in_tables(nodes: list[Node]) -> bool:
+    # <div>/<table> μέσα σε πίνακα δεν φαίνονται στο skeleton, αλλά τα βλέπει η _discover
+    return any(
+        next(el.iterdescendants("div", "table"), None) is not None
+        for el in nodes
+        if el.tag == "table"
+    )
+
+
+def layout_fingerprint(html: str | bytes) -> str:
+    """Fingerprint του layout ενός τιμολογίου (ίδιο για όλα τα τιμολόγια του ίδιου template)."""
+    sig = _skeleton(etree.fromstring(html, _HTML))[0]
+    return hashlib.blake2b(repr(sig).encode(), digest_size=8).hexdigest()
+
+
+def _make_plan(found: dict[str, Node | None], nodes: list[Node]) -> Plan:
+    pos = {el: i for i, el in enumerate(nodes)}
+    plan: Plan = {}
+    for key, node in found.items():
+        if node is not None and node not in pos:
+            return {}  # κόμβος εκτός skeleton: το layout ανακαλύπτεται κάθε φορά
+        plan[key] = pos[node] if node is not None else None
+    # χωρίς <table> μέσα στο div.summary ο πίνακας σύνοψης βρέθηκε από το κείμενο (ο πρώτος με
+    # τις ετικέτες της σύνοψης): εξαρτάται από το περιεχόμενο, οπότε ξαναψάχνεται σε κάθε έγγραφο
+    div_sum = found["summary_div"]
+    plan["by_text"] = div_sum is None or next(div_sum.iterdescendants("table"), None) is None
+    return plan
+
+
+class LayoutPlans:
+    """
+    skeleton -> plan, ανά process (με executor="process" κάθε worker γεμίζει τη δική του).
+    Άγνωστο layout περνά από τη _discover και γεμίζει την cache· μέχρι `maxsize` layouts (FIFO).
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = maxsize
+        self._plans: dict[Skeleton, Plan] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+    def get(self, key: Skeleton) -> Plan | None:
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return plan
+
+    def put(self, key: Skeleton, plan: Plan) -> None:
+        with self._lock:
+            if key not in self._plans and len(self._plans) >= self.maxsize:
+                self._plans.pop(next(iter(self._plans)))
+            self._plans[key] = plan
+
+    def clear(self) -> None:
+        with self._lock:
+            self._plans.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        return {"layouts": len(self._plans), "hits": self.hits, "misses": self.misses}
+
+
+PLANS = LayoutPlans()
+
+
+def _locate(root: Node, plans: LayoutPlans | None) -> dict[str, Node | None]:
+    if plans is None:
+        return _discover(root)
+    key, nodes = _skeleton(root)
+    if _hidden_in_tables(nodes):
+        return _discover(root)
+    plan = plans.get(key)
+    if plan is None:
+        found = _discover(root)
+        plans.put(key, _make_plan(found, nodes))
+        return found
+    if not plan:
+        return _discover(root)
+    found = {k: nodes[i] if i is not None else None for k, i in plan.items() if k != "by_text"}
+    if plan["by_text"]:
+        found["summary"] = _summary_table(root, None)
+    return found
+
+
+def parse_invoice_tree(html: str | bytes, plans: LayoutPlans | None = PLANS) -> dict[str, Any]:
+    """
+    lxml engine για ΕΝΑ τιμολόγιο· ίδια εγγραφή με το bs4 path.
+    Σε έγγραφο που το lxml δεν διαβάζει σηκώνει εξαίρεση (ο caller γυρνά στο bs4).
+    Με `plans` τα γνωστά layouts παίρνουν τους κόμβους από την cache (plans=None: πάντα discovery).
+    """
+    if not HAS_LXML:
+        raise ImportError("lxml is not installed")
+    if isinstance(html, str) and _truncated_by_tree(html):
+        raise ValueError("content after </body> or </html>")
+    root = etree.fromstring(html, _HTML) if html else None
+    if root is None:
+        raise ValueError("empty invoice document")
+    if _UNSUPPORTED(root):
+        raise ValueError("template/ruby markup")
+    found = _locate(root, plans)
+    for el in root.iter(*_STRIP):
+        el.text = None
+    left, right, div_sum = found["left"], found["right"], found["summary_div"]
+    # ο επόμενος <div> μπορεί να είναι και μέσα σε <table> (εκτός skeleton): πάντα από το XPath
+    notes = _first(_NEXT_DIV, div_sum) if div_sum is not None else None
+    return _build_record(
+        _text(root, " "),
+        _nw(_text(left, " ")) if left is not None else "",
+        _seller(found["header"], found["company"]),
+        _buyer_from_text(_text(right, "\n")) if right is not None else {},
+        _items(found["items"]),
+        _summary(found["summary"]),
+        _notes(notes if notes is not None else root),
+    )
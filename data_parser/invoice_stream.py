@@ -0,0 +1,134 @@
+# data_parser/invoice_stream.py
+from __future__ import annotations
+
+import io
+import os
+from collections.abc import Iterator
+from itertools import islice
+from typing import IO, Any
+
+try:
+    from lxml import etree
+
+    HAS_LXML = True
+except ImportError:  # pragma: no cover - εξαρτάται από το περιβάλλον
+    etree = None
+    HAS_LXML = False
+
+try:
+    from .invoice_lxml import _row_cells
+    from .parse_invoices import _items_from_rows
+except ImportError:  # εκτέλεση ως script
+    from invoice_lxml import _row_cells  # type: ignore[no-redef]
+    from parse_invoices import _items_from_rows  # type: ignore[no-redef]
+
+__all__ = ["HAS_LXML", "iter_invoice_items", "iter_item_rows"]
+
+# Γραμμές ειδών από πολύ μεγάλα τιμολόγια χωρίς ολόκληρο το tree στη μνήμη: lxml iterparse
+# πάνω στα bytes, κάθε <tr> του table.invoice-table διαβάζεται στο "end" event του και μετά
+# αδειάζει μαζί με τα προηγούμενα αδέλφια του. Ίδιες γραμμές με το _items του lxml engine.
+# Τα υπόλοιπα πεδία της εγγραφής θέλουν το πλήρες κείμενο του εγγράφου (full_text) ->
+# parse_invoice_html· εδώ μόνο τα είδη.
+
+Source = str | os.PathLike[str] | bytes | IO[bytes]
+
+# Strings που η bs4 get_text() δεν μετρά (Script, Stylesheet, TemplateString, RubyText...)
+_NO_TEXT = frozenset({"script", "style", "template", "rt", "rp"})
+# Μόνο αυτά δίνουν events (όχι τα <td> κ.λπ.: διαβάζονται από το <tr> τους)
+_EVENT_TAGS = ("table", "tbody", "tr", *sorted(_NO_TEXT))
+
+
+def _open(source: Source) -> IO[bytes]:
+    if isinstance(source, bytes):
+        return io.BytesIO(source)
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, "rb")
+    return source
+
+
+def _drop_text(el: Any) -> None:
+    """Αδειάζει το κείμενο μέσα στο στοιχείο (όχι το tail του: είναι έξω από αυτό)."""
+    el.text = None
+    for d in el.iterdescendants():
+        d.text = d.tail = None
+
+
+def _release(el: Any) -> None:
+    """Ελευθερώνει το στοιχείο που διαβάστηκε και ό,τι έχει μείνει πριν από αυτό."""
+    el.clear(keep_tail=True)
+    parent = el.getparent()
+    if parent is not None:
+        while el.getprevious() is not None:
+            del parent[0]
+
+
+def iter_item_rows(source: Source, encoding: str | None = "utf-8") -> Iterator[list[str]]:
+    """
+    Τα 4 πρώτα κελιά κάθε γραμμής του πρώτου table.invoice-table, με τη σειρά του εγγράφου.
+    `source`: path, bytes ή binary file object. Όπως στο lxml engine, μετράνε οι γραμμές του
+    πρώτου <tbody> αν υπάρχει· οι γραμμές πριν από αυτό κρατιούνται (μόνο τα κείμενα) μέχρι να
+    φανεί αν υπάρχει tbody. Η ανάγνωση σταματά στο κλείσιμο του πίνακα.
+    """
+    if not HAS_LXML:
+        raise RuntimeError("lxml is required for streaming invoice rows")
+    should_close = not hasattr(source, "read")
+    f = _open(source)
+    try:
+        table = tbody = None
+        pending: list[list[str]] = []  # γραμμές πριν από <tbody>: ισχύουν μόνο αν δεν βρεθεί
+        open_rows = 0
+        events = etree.iterparse(
+            f, events=("start", "end"), html=True, encoding=encoding, tag=_EVENT_TAGS
+        )
+        for event, el in events:
+            if table is None:
+                if (
+                    event == "start"
+                    and el.tag == "table"
+                    and "invoice-table" in (el.get("class") or "").split()
+                ):
+                    table = el
+                continue
+            if event == "start":
+                if el.tag == "tr":
+                    open_rows += 1
+                elif el.tag == "tbody" and tbody is None:
+                    tbody = el
+                    pending.clear()
+                continue
+            if el.tag in _NO_TEXT:
+                _drop_text(el)
+            elif el.tag == "tr":
+                open_rows -= 1
+                if open_rows:
+                    continue  # εμφωλευμένο: διαβάζεται μαζί με το εξωτερικό <tr>
+                for tr in (el, *el.iterdescendants("tr")):
+                    cells = _row_cells(tr)
+                    if cells is None:
+                        continue
+                    if tbody is None:
+                        pending.append(cells)
+                    elif any(a is tbody for a in tr.iterancestors()):
+                        yield cells
+                _release(el)
+            elif el is table:
+                break
+        if tbody is None:
+            yield from pending
+    finally:
+        if should_close:
+            f.close()
+
+
+def iter_invoice_items(
+    source: Source, batch: int = 4096, encoding: str | None = "utf-8"
+) -> Iterator[dict[str, Any]]:
+    """
+    Τα είδη του τιμολογίου (ίδια με το record["items"]) σε ροή: οι γραμμές μετατρέπονται ανά
+    `batch`, με τα ποσά κάθε στήλης μαζί και το νόμισμα να συνεχίζει από το προηγούμενο batch.
+    """
+    currency = "EUR"
+    rows = iter_item_rows(source, encoding)
+    while chunk := list(islice(rows, batch)):
+        items, currency = _items_from_rows(chunk, currency)
+        yield from items
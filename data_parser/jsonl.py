@@ -0,0 +1,174 @@
+# data_parser/jsonl.py
+from __future__ import annotations
+
+import os
+import tempfile
+from collections.abc import Callable, Iterable, Iterator
+from types import TracebackType
+from typing import Any
+
+from . import codec
+
+__all__ = [
+    "FORMATS",
+    "RecordSpill",
+    "RecordWriter",
+    "is_jsonl",
+    "iter_jsonl",
+    "iter_records",
+    "output_path",
+    "write_records",
+]
+
+# "json": pretty-printed array (όπως πάντα)· "jsonl": μία εγγραφή ανά γραμμή, streaming
+FORMATS: tuple[str, ...] = ("json", "jsonl")
+
+
+def is_jsonl(path: str | os.PathLike[str]) -> bool:
+    return str(path).endswith(".jsonl")
+
+
+def output_path(out_dir: str, stem: str, fmt: str = "json") -> str:
+    """outputs/<stem>.json ή outputs/<stem>.jsonl ανάλογα με το --format."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown output format: {fmt!r} (expected one of {FORMATS})")
+    return os.path.join(out_dir, f"{stem}.{fmt}")
+
+
+def iter_jsonl(path: str | os.PathLike[str]) -> Iterator[dict[str, Any]]:
+    """
+    Streaming reader: μία εγγραφή τη φορά, άρα η μνήμη φράσσεται από τη μεγαλύτερη εγγραφή.
+    Κενές γραμμές και ό,τι δεν είναι object αγνοούνται· χαλασμένη γραμμή -> JSONDecodeError.
+    """
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            rec = codec.loads(line)
+            if isinstance(rec, dict):
+                yield rec
+
+
+def iter_records(path: str | os.PathLike[str]) -> Iterator[dict[str, Any]]:
+    """Εγγραφές από .jsonl (streaming) ή από JSON array (όλο το αρχείο, όπως πριν)."""
+    if is_jsonl(path):
+        yield from iter_jsonl(path)
+        return
+    with open(path, "rb") as f:
+        data = codec.load(f)
+    if isinstance(data, list):
+        yield from (r for r in data if isinstance(r, dict))
+
+
+class RecordWriter:
+    """
+    Ατομικό γράψιμο (tmp + os.replace στο close) εγγραφών μία-μία, σε μορφή ανάλογη της
+    κατάληξης: .jsonl compact, μία γραμμή ανά εγγραφή· .json pretty array (indent=2), ίδιο
+    byte προς byte με το codec.dump(list, pretty=True), χωρίς να κρατηθεί ποτέ η λίστα.
+    Σε σφάλμα μέσα στο `with` το αρχείο-στόχος μένει ανέγγιχτο.
+    """
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self.path = str(path)
+        self.count = 0
+        self._jsonl = is_jsonl(self.path)
+        self._tmp = f"{self.path}.tmp"
+        self._f = open(self._tmp, "wb")  # noqa: SIM115  (κλείνει στο close/abort)
+
+    def write(self, rec: dict[str, Any]) -> None:
+        if self._jsonl:
+            self._f.write(codec.dumps(rec))
+            self._f.write(b"\n")
+        else:
+            # τα strings του JSON δεν έχουν raw newline: κάθε \n είναι αλλαγή γραμμής της μορφής
+            self._f.write(b",\n  " if self.count else b"[\n  ")
+            self._f.write(codec.dumps(rec, pretty=True).replace(b"\n", b"\n  "))
+        self.count += 1
+
+    def close(self) -> None:
+        if not self._jsonl:
+            self._f.write(b"\n]" if self.count else b"[]")
+        self._f.close()
+        os.replace(self._tmp, self.path)
+
+    def abort(self) -> None:
+        self._f.close()
+        os.remove(self._tmp)
+
+    def __enter__(self) -> RecordWriter:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_records(records: Iterable[dict[str, Any]], path: str | os.PathLike[str]) -> int:
+    """
+    Ατομικό γράψιμο μέσω RecordWriter: κάθε εγγραφή σειριοποιείται και γράφεται μόνη της,
+    οπότε δέχεται και generator χωρίς να χρειαστεί ποτέ ολόκληρο το corpus στη μνήμη (και
+    για .json array). Επιστρέφει το πλήθος εγγραφών.
+    """
+    with RecordWriter(path) as w:
+        for rec in records:
+            w.write(rec)
+    return w.count
+
+
+class RecordSpill:
+    """
+    Προσωρινό .jsonl (TemporaryFile) για ροές που θέλουν δεύτερο πέρασμα ή ταξινόμηση: στη
+    μνήμη μένουν μόνο τα offsets και τα κλειδιά του `key`, όχι οι εγγραφές. Κάθε iter
+    διαβάζει από την αρχή (ένα πέρασμα τη φορά).
+    """
+
+    def __init__(
+        self, key: Callable[[dict[str, Any]], Any] | None = None, dir: str | None = None
+    ) -> None:
+        self._key = key
+        self._f = tempfile.TemporaryFile(dir=dir)  # noqa: SIM115  (κλείνει στο close)
+        self._offsets: list[int] = []
+        self._keys: list[Any] = []
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def append(self, rec: dict[str, Any]) -> None:
+        self._f.seek(0, os.SEEK_END)
+        self._offsets.append(self._f.tell())
+        self._f.write(codec.dumps(rec))
+        self._f.write(b"\n")
+        if self._key is not None:
+            self._keys.append(self._key(rec))
+
+    def extend(self, recs: Iterable[dict[str, Any]]) -> None:
+        for rec in recs:
+            self.append(rec)
+
+    def sort(self, reverse: bool = False) -> None:
+        """Σταθερή ταξινόμηση κατά `key` (όπως list.sort)· σε σφάλμα σύγκρισης η σειρά δεν αλλάζει."""
+        order = sorted(range(len(self._keys)), key=self._keys.__getitem__, reverse=reverse)
+        self._offsets = [self._offsets[i] for i in order]
+        self._keys = [self._keys[i] for i in order]
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        self._f.flush()
+        for pos in self._offsets:
+            self._f.seek(pos)
+            yield codec.loads(self._f.readline())
+
+    def close(self) -> None:
+        self._f.close()
+
+    def __enter__(self) -> RecordSpill:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
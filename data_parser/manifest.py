@@ -0,0 +1,115 @@
+# data_parser/manifest.py
+from __future__ import annotations
+
+import hashlib
+import os
+from collections.abc import Iterable
+from typing import Any
+
+from . import codec
+
+__all__ = ["MANIFEST_NAME", "ManifestSection", "ParseManifest", "file_sha256"]
+
+MANIFEST_NAME = "parse_manifest.json"
+MANIFEST_VERSION = 1
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ManifestSection:
+    """
+    Cache ενός είδους εισόδου (forms/emails/invoices) για συγκεκριμένη έκδοση parser.
+    Entry ανά αρχείο: size, mtime_ns, sha256, parser_version -> parsed record.
+    """
+
+    def __init__(self, entries: dict[str, dict[str, Any]], parser_version: str) -> None:
+        self._entries = entries
+        self.parser_version = parser_version
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.abspath(path)
+
+    def get(self, path: str) -> dict[str, Any] | None:
+        """
+        Επιστρέφει το cached record αν το αρχείο δεν άλλαξε.
+        Γρήγορος έλεγχος με size+mtime· αν αλλάξει μόνο το mtime (touch/checkout),
+        συγκρίνουμε hash περιεχομένου πριν κάνουμε re-parse.
+        """
+        entry = self._entries.get(self._key(path))
+        if not entry or entry.get("parser_version") != self.parser_version:
+            self.misses += 1
+            return None
+        try:
+            st = os.stat(path)
+            if st.st_size != entry.get("size"):
+                self.misses += 1
+                return None
+            if st.st_mtime_ns != entry.get("mtime_ns"):
+                if file_sha256(path) != entry.get("sha256"):
+                    self.misses += 1
+                    return None
+                entry["mtime_ns"] = st.st_mtime_ns
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry.get("record")
+
+    def put(self, path: str, record: dict[str, Any]) -> None:
+        try:
+            st = os.stat(path)
+            digest = file_sha256(path)
+        except OSError:
+            return
+        self._entries[self._key(path)] = {
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "sha256": digest,
+            "parser_version": self.parser_version,
+            "record": record,
+        }
+
+    def retain(self, paths: Iterable[str]) -> None:
+        """Πετάει entries για αρχεία που δεν υπάρχουν πλέον στην είσοδο."""
+        live = {self._key(p) for p in paths}
+        for key in [k for k in self._entries if k not in live]:
+            del self._entries[key]
+
+
+class ParseManifest:
+    """Manifest δίπλα στο combined_feed.json για incremental rebuild."""
+
+    def __init__(self, path: str, data: dict[str, Any] | None = None) -> None:
+        self.path = path
+        self._data: dict[str, Any] = data or {"version": MANIFEST_VERSION, "sections": {}}
+
+    @classmethod
+    def load(cls, path: str) -> ParseManifest:
+        try:
+            with open(path, "rb") as f:
+                data = codec.load(f)
+            if isinstance(data, dict) and data.get("version") == MANIFEST_VERSION:
+                return cls(path, data)
+        except (OSError, ValueError):
+            pass
+        return cls(path)
+
+    def section(self, kind: str, parser_version: str) -> ManifestSection:
+        entries = self._data["sections"].setdefault(kind, {})
+        return ManifestSection(entries, parser_version)
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            codec.dump(self._data, f)
+        os.replace(tmp, self.path)
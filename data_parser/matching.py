@@ -1,29 +1,50 @@
 # data_parser/matching.py
 from __future__ import annotations
 
+import math
+import os
+from array import array
+from collections.abc import Mapping
 from typing import Any
 
+from . import codec
+from .textnorm import fold_key
+
 try:
     # προαιρετικό: καλύτερο fuzzy
-    from rapidfuzz import fuzz
+    from rapidfuzz import fuzz, process
 
     HAS_RAPIDFUZZ = True
 except Exception:  # rapidfuzz δεν είναι εγκατεστημένο
     HAS_RAPIDFUZZ = False
 
 
-__all__ = ["normalize_inv", "build_invoice_lookup", "fuzzy_find"]
+__all__ = [
+    "normalize_inv",
+    "build_invoice_lookup",
+    "fuzzy_find",
+    "fuzzy_find_many",
+    "InvoiceNgramIndex",
+    "NGRAM_INDEX_NAME",
+]
+
+# Μέγιστο μέγεθος (queries × keys) πίνακα σκορ ανά κλήση cdist (float64 -> ~32 MB)
+CDIST_MAX_CELLS = 4_000_000
+# Πάνω από τόσα (queries × keys) το fuzzy_find_many περνά από InvoiceNgramIndex αντί για cdist
+NGRAM_MIN_CELLS = 50_000_000
+
+# Αποθηκευμένο InvoiceNgramIndex δίπλα στο parse manifest (κλειδιά + postings, όχι records)
+NGRAM_INDEX_NAME = "invoice_ngrams.json"
+NGRAM_INDEX_VERSION = 2
 
 
 def normalize_inv(s: str | None) -> str:
     """
     Κανονικοποίηση αριθμού τιμολογίου:
-    - uppercase
+    - χωρίς τόνους/διαλυτικά (fold), uppercase
     - κρατάμε μόνο αλφαριθμητικούς χαρακτήρες
     """
-    if not s:
-        return ""
-    return "".join(ch for ch in str(s).upper() if ch.isalnum())
+    return fold_key(s)
 
 
 def build_invoice_lookup(invoices: list[dict[str, Any]]) -> dict[str, dict[str, Any]]:
@@ -86,3 +107,336 @@ def fuzzy_find(
     if best_score >= score_cutoff and best_rec is not None:
         return best_rec, best_score
     return None, best_score
+
+
+def _min_shared_grams(n: int, q: int, score_cutoff: float) -> int:
+    """
+    Κάτω φράγμα (q-gram lemma) στα κοινά q-grams δύο κλειδιών με partial_ratio >= cutoff,
+    όπου n = μήκος του μικρότερου. Το partial_ratio συγκρίνει το μικρότερο με παράθυρα
+    μήκους <= n, άρα indel απόσταση <= 2n(100 - cutoff)/100, και κάθε indel χαλάει <= q
+    q-grams. Τιμή <= 0: το φίλτρο δεν αποκλείει τίποτα.
+    """
+    max_dist = math.floor(2 * n * (100 - score_cutoff) / 100 + 1e-9)
+    return n - q + 1 - q * max_dist
+
+
+class InvoiceNgramIndex:
+    """
+    Inverted index q-gram -> κλειδιά (normalize_inv) για fuzzy lookup σε μεγάλο ιστορικό.
+    Ανά query μετριούνται (numpy, μόνο πάνω στα postings των q-grams του query) τα κοινά
+    q-grams κάθε κλειδιού και με partial_ratio βαθμολογούνται μόνο όσα περνούν το κάτω φράγμα
+    του q-gram lemma, αντί για όλα τα κλειδιά όπως στο cdist.
+    - Τα αποτελέσματα είναι ίδια με το fuzzy_find πάνω στο lookup (ίδια σειρά κλειδιών για
+      τις ισοβαθμίες)· κάτω από το cutoff επιστρέφεται (None, 0), όπως στο fuzzy_find_many.
+    - Για μήκη όπου το φράγμα δεν φιλτράρει (σύντομα κλειδιά / χαμηλό cutoff) βαθμολογούνται
+      όλα τα κλειδιά αυτού του μήκους.
+    - add: incremental εισαγωγή καθώς γίνονται parse νέα τιμολόγια.
+    - save/load: το index μένει στον δίσκο (NGRAM_INDEX_NAME δίπλα στο manifest) και sync
+      το ευθυγραμμίζει με το lookup του επόμενου run: μόνο τα νέα κλειδιά περνούν από add.
+    """
+
+    def __init__(self, lookup: Mapping[str, Any] | None = None, q: int = 2) -> None:
+        self.q = q
+        self._build(lookup)
+
+    def _build(self, lookup: Mapping[str, Any] | None) -> None:
+        self._keys: list[str] = []
+        self._recs: list[Any] = []
+        self._ids: dict[str, int] = {}
+        # postings/μήκη ως array (4/2 bytes ανά τιμή), διαβάζονται από numpy χωρίς αντιγραφή
+        self._postings: dict[str, array[int]] = {}
+        self._lengths: array[int] = array("H")
+        self._by_len: dict[int, array[int]] = {}
+        # θέση του κλειδιού στο lookup (ισοβαθμίες)· -1: δεν υπάρχει πια στο lookup
+        self._rank: array[int] = array("i")
+        self._live = 0
+        if lookup is not None:
+            self.add_many(lookup)
+
+    def __len__(self) -> int:
+        return self._live
+
+    def __contains__(self, key: object) -> bool:
+        i = self._ids.get(key) if isinstance(key, str) else None
+        return i is not None and self._rank[i] >= 0
+
+    def _grams(self, key: str) -> set[str]:
+        """q-grams με αριθμό εμφάνισης (AB, AB#1, ...): η τομή συνόλων μετρά σαν multiset."""
+        seen: dict[str, int] = {}
+        out: set[str] = set()
+        for j in range(len(key) - self.q + 1):
+            g = key[j : j + self.q]
+            n = seen.get(g, 0)
+            seen[g] = n + 1
+            out.add(g if n == 0 else f"{g}#{n}")
+        return out
+
+    def add(self, key: str, rec: Any) -> None:
+        """Νέο κλειδί μπαίνει στο τέλος· υπάρχον κρατά τη θέση του (όπως σε dict)."""
+        if not key:
+            return
+        i = self._ids.get(key)
+        if i is not None:
+            self._recs[i] = rec
+            if self._rank[i] < 0:
+                self._rank[i] = self._live
+                self._live += 1
+            return
+        i = len(self._keys)
+        self._ids[key] = i
+        self._keys.append(key)
+        self._recs.append(rec)
+        self._rank.append(self._live)
+        self._live += 1
+        self._lengths.append(min(len(key), 0xFFFF))
+        bucket = self._by_len.get(len(key))
+        if bucket is None:
+            bucket = self._by_len[len(key)] = array("i")
+        bucket.append(i)
+        for g in self._grams(key):
+            posting = self._postings.get(g)
+            if posting is None:
+                posting = self._postings[g] = array("i")
+            posting.append(i)
+
+    def add_many(self, lookup: Mapping[str, Any]) -> None:
+        for key, rec in lookup.items():
+            self.add(key, rec)
+
+    def sync(self, lookup: Mapping[str, Any]) -> None:
+        """
+        Ευθυγράμμιση με το lookup (π.χ. μετά από load): records και σειρά ισοβαθμιών από
+        αυτό, τα νέα κλειδιά με add, όσα λείπουν δεν επιστρέφονται πια. Αν τα νεκρά κλειδιά
+        γίνουν περισσότερα από τα ζωντανά, το index ξαναχτίζεται.
+        """
+        if len(self._keys) > 2 * len(lookup):
+            self._build(lookup)
+            return
+        self._recs = [None] * len(self._keys)
+        self._rank = array("i", [-1]) * len(self._keys)
+        self._live = 0
+        self.add_many(lookup)
+
+    def save(self, path: str) -> None:
+        """
+        Κλειδιά + postings ως JSON στο `path` (atomic, όπως το manifest)· τα records δεν
+        γράφονται (δίνονται στο sync), τα μήκη ξαναβγαίνουν από τα κλειδιά.
+        """
+        state = {
+            "version": NGRAM_INDEX_VERSION,
+            "q": self.q,
+            "keys": self._keys,
+            "postings": {g: posting.tolist() for g, posting in self._postings.items()},
+        }
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            codec.dump(state, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, q: int = 2) -> InvoiceNgramIndex:
+        """
+        Index από save(). Κανένα κλειδί δεν είναι ενεργό πριν από το sync(lookup).
+        Αρχείο που λείπει, χαλασμένο ή άλλης έκδοσης/q -> κενό index.
+        """
+        index = cls(q=q)
+        try:
+            with open(path, "rb") as f:
+                state = codec.load(f)
+        except (OSError, ValueError):
+            return index
+        if (
+            not isinstance(state, dict)
+            or state.get("version") != NGRAM_INDEX_VERSION
+            or state.get("q") != q
+        ):
+            return index
+        keys = state.get("keys")
+        postings = state.get("postings")
+        if not isinstance(keys, list) or not isinstance(postings, dict):
+            return index
+        if not all(isinstance(k, str) and k for k in keys) or len(set(keys)) != len(keys):
+            return index
+        n = len(keys)
+        loaded: dict[str, array[int]] = {}
+        for g, posting in postings.items():
+            # θέσεις σε αύξουσα σειρά (searchsorted στο candidates), μέσα στα κλειδιά
+            if not isinstance(posting, list) or not all(type(i) is int for i in posting):
+                return index
+            if posting and (posting[0] < 0 or posting[-1] >= n):
+                return index
+            if any(a >= b for a, b in zip(posting, posting[1:])):
+                return index
+            loaded[g] = array("i", posting)
+        index._keys = keys
+        index._ids = {key: i for i, key in enumerate(keys)}
+        index._postings = loaded
+        index._lengths = array("H", (min(len(k), 0xFFFF) for k in keys))
+        for i, key in enumerate(keys):
+            bucket = index._by_len.get(len(key))
+            if bucket is None:
+                bucket = index._by_len[len(key)] = array("i")
+            bucket.append(i)
+        index._recs = [None] * n
+        index._rank = array("i", [-1]) * n
+        return index
+
+    def candidates(self, key: str, score_cutoff: float) -> list[int]:
+        """Θέσεις κλειδιών που μπορεί να έχουν partial_ratio >= cutoff με το key (αύξουσα σειρά)."""
+        import numpy as np
+
+        if not self._keys:
+            return []
+        # φράγμα ανά μήκος κλειδιού: το lemma ισχύει για το μικρότερο από τα δύο
+        thresholds = {
+            length: _min_shared_grams(min(len(key), length), self.q, score_cutoff)
+            for length in self._by_len
+        }
+        parts: list[Any] = [
+            np.frombuffer(self._by_len[length], dtype=np.int32)
+            for length, t in thresholds.items()
+            if t <= 0
+        ]
+        positive = [t for t in thresholds.values() if t > 0]
+        grams = self._grams(key)
+        if positive and len(grams) >= min(positive):
+            postings = sorted(
+                (
+                    np.frombuffer(self._postings[g], dtype=np.int32)
+                    for g in grams
+                    if g in self._postings
+                ),
+                key=len,
+            )
+            # prefix filter: όποιο κλειδί έχει >= t κοινά q-grams εμφανίζεται σε κάποιο από
+            # τα len(grams) - t + 1 σπανιότερα (τα άγνωστα q-grams είναι τα σπανιότερα, με 0
+            # κλειδιά)· τα συχνά q-grams μετρώνται μόνο για αυτούς τους υποψήφιους
+            n_probe = len(postings) - min(positive) + 1
+            if n_probe > 0:
+                counts = np.bincount(np.concatenate(postings[:n_probe]), minlength=len(self._keys))
+                cands = np.flatnonzero(counts)
+                counts = counts[cands]
+                for posting in postings[n_probe:]:
+                    pos = np.searchsorted(posting, cands)
+                    found = posting[np.minimum(pos, len(posting) - 1)] == cands
+                    counts += found
+                lengths = np.frombuffer(self._lengths, dtype=np.uint16)[cands]
+                table = np.array([thresholds.get(n, 0) for n in range(int(lengths.max()) + 1)])
+                need = table[lengths]
+                parts.append(cands[(need > 0) & (counts >= need)])
+        if not parts:
+            return []
+        found = np.unique(np.concatenate(parts))
+        return found[np.frombuffer(self._rank, dtype=np.int32)[found] >= 0].tolist()
+
+    def _find(self, candidate: str | None, score_cutoff: int) -> tuple[int | None, int]:
+        key = normalize_inv(candidate)
+        if not key:
+            return None, 0
+        i = self._ids.get(key)
+        if i is not None and self._rank[i] >= 0:
+            return i, 100
+        if not HAS_RAPIDFUZZ:
+            live = sorted((r, i) for i, r in enumerate(self._rank) if r >= 0)
+            hit, score = fuzzy_find(key, {self._keys[i]: {"pos": i} for _, i in live}, score_cutoff)
+            return (hit["pos"], score) if hit is not None else (None, 0)
+        import numpy as np
+
+        cands = self.candidates(key, score_cutoff)
+        if not cands:
+            return None, 0
+        scores = process.cdist(
+            [key],
+            [self._keys[i] for i in cands],
+            scorer=fuzz.partial_ratio,
+            score_cutoff=score_cutoff,
+            dtype=np.float64,
+        )[0]
+        # int() + πρώτο κλειδί του lookup σε ισοβαθμία, όπως στο fuzzy_find
+        scores = np.floor(scores)
+        score = int(scores.max())
+        if score < score_cutoff or score <= 0:
+            return None, 0
+        ranks = np.frombuffer(self._rank, dtype=np.int32)[cands]
+        best = int(np.where(scores == score, ranks, np.iinfo(np.int32).max).argmin())
+        return cands[best], score
+
+    def find(self, candidate: str | None, score_cutoff: int = 85) -> tuple[Any | None, int]:
+        """Όπως το fuzzy_find(candidate, lookup, score_cutoff), με (None, 0) κάτω από το cutoff."""
+        i, score = self._find(candidate, score_cutoff)
+        return (self._recs[i], score) if i is not None else (None, 0)
+
+    def find_key(self, candidate: str | None, score_cutoff: int = 85) -> tuple[str | None, int]:
+        """Όπως το find, με το κλειδί (normalize_inv) αντί για το record."""
+        i, score = self._find(candidate, score_cutoff)
+        return (self._keys[i], score) if i is not None else (None, 0)
+
+
+def fuzzy_find_many(
+    candidates: list[str | None],
+    lookup: dict[str, Any],
+    score_cutoff: int = 85,
+    workers: int = 1,
+    index: InvoiceNgramIndex | None = None,
+) -> list[tuple[dict[str, Any] | None, int]]:
+    """
+    Batch εκδοχή του fuzzy_find: ένα αποτέλεσμα (record_or_None, score) ανά candidate.
+    - exact matches λύνονται με dict lookup
+    - τα υπόλοιπα βαθμολογούνται μαζί με rapidfuzz.process.cdist (partial_ratio), με το
+      score_cutoff μέσα στον C βρόχο και `workers` threads (-1 = όλοι οι πυρήνες)
+    - με `index` (InvoiceNgramIndex του ίδιου lookup), ή όταν queries × keys ξεπερνά το
+      NGRAM_MIN_CELLS, βαθμολογούνται μόνο οι υποψήφιοι του n-gram index
+    Για scores >= cutoff το αποτέλεσμα είναι ίδιο με το fuzzy_find (ίδιο int score, πρώτο
+    κλειδί σε ισοβαθμία). Κάτω από το cutoff επιστρέφεται (None, 0): το cdist δεν κρατά
+    το καλύτερο «αποτυχημένο» score.
+    """
+    keys = [normalize_inv(c) for c in candidates]
+    out: list[tuple[dict[str, Any] | None, int]] = [(None, 0)] * len(keys)
+    pending: list[int] = []
+    for i, key in enumerate(keys):
+        if not key:
+            continue
+        if key in lookup:
+            out[i] = (lookup[key], 100)
+        else:
+            pending.append(i)
+    if not pending or not lookup:
+        return out
+
+    if not HAS_RAPIDFUZZ:
+        for i in pending:
+            rec, score = fuzzy_find(keys[i], lookup, score_cutoff=score_cutoff)
+            out[i] = (rec, score if rec is not None else 0)
+        return out
+
+    if index is None and len(pending) * len(lookup) > NGRAM_MIN_CELLS:
+        index = InvoiceNgramIndex(lookup)
+    if index is not None:
+        for i in pending:
+            out[i] = index.find(keys[i], score_cutoff=score_cutoff)
+        return out
+
+    import numpy as np  # εξάρτηση του rapidfuzz.process.cdist
+
+    choices = list(lookup)
+    recs = list(lookup.values())
+    step = max(1, CDIST_MAX_CELLS // len(choices))
+    for start in range(0, len(pending), step):
+        block = pending[start : start + step]
+        scores = process.cdist(
+            [keys[i] for i in block],
+            choices,
+            scorer=fuzz.partial_ratio,
+            score_cutoff=score_cutoff,
+            dtype=np.float64,
+            workers=workers,
+        )
+        # int() όπως στο fuzzy_find, ώστε οι ισοβαθμίες να λύνονται με τη σειρά του lookup
+        scores = np.floor(scores)
+        best = scores.argmax(axis=1)
+        for row, i in enumerate(block):
+            score = int(scores[row, best[row]])
+            if score >= score_cutoff and score > 0:
+                out[i] = (recs[best[row]], score)
+    return out
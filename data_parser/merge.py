@@ -0,0 +1,134 @@
+# data_parser/merge.py
+from __future__ import annotations
+
+import hashlib
+import json
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+__all__ = [
+    "HUMAN_FIELDS",
+    "content_hash",
+    "iter_identity",
+    "iter_merge",
+    "mark_edited",
+    "merge_feed",
+    "record_key",
+    "stamp_identity",
+]
+
+# Πεδία που γράφει ο reviewer (ή η pipeline), όχι ο parser
+HUMAN_FIELDS: tuple[str, ...] = ("status", "notes", "updated_at", "created_at", "edited_fields")
+_META_FIELDS = frozenset(HUMAN_FIELDS) | {"id", "content_hash", "schema_version", "needs_action"}
+
+# Legacy εγγραφές με status=edited χωρίς edited_fields: ό,τι γράφει ο items editor
+_LEGACY_EDITED_FIELDS = ("items", "currency", "subtotal", "vat_rate", "vat_amount", "total")
+
+
+def content_hash(rec: dict[str, Any]) -> str:
+    """Hash της εξόδου του parser (χωρίς meta/ανθρώπινα πεδία)."""
+    payload = {k: v for k, v in rec.items() if k not in _META_FIELDS}
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def record_key(source: str, source_file: str | None, digest: str) -> str:
+    """
+    Σταθερό id: source + source_file. Χωρίς source_file πέφτουμε στο content hash.
+    Έτσι μια αλλαγή στο αρχείο ενημερώνει την ίδια εγγραφή αντί να τη «χάνει».
+    """
+    basis = f"{source}|{source_file}" if source_file else f"{source}|#{digest}"
+    return f"{source}_{hashlib.sha1(basis.encode('utf-8')).hexdigest()[:12]}"
+
+
+def iter_identity(recs: Iterable[dict[str, Any]], source: str) -> Iterator[dict[str, Any]]:
+    """Όπως το stamp_identity, σε ροή (στη μνήμη μένουν μόνο τα ids που δόθηκαν)."""
+    seen: set[str] = set()
+    for rec in recs:
+        r = dict(rec)
+        digest = content_hash(r)
+        rid = record_key(source, r.get("source_file"), digest)
+        if rid in seen:  # ίδιο basename σε υποφακέλους
+            rid = f"{rid}_{digest[:8]}"
+        seen.add(rid)
+        r["id"] = rid
+        r["content_hash"] = digest
+        yield r
+
+
+def stamp_identity(recs: Iterable[dict[str, Any]], source: str) -> list[dict[str, Any]]:
+    """Βάζει id + content_hash σε φρέσκια έξοδο parser (αντίγραφα, όχι in-place)."""
+    return list(iter_identity(recs, source))
+
+
+def mark_edited(rec: dict[str, Any], fields: list[str] | tuple[str, ...]) -> None:
+    """Καταγράφει ποια πεδία άλλαξε ο reviewer ώστε να επιβιώνουν στο rebuild."""
+    edited = set(rec.get("edited_fields") or [])
+    edited.update(f for f in fields if f not in _META_FIELDS)
+    rec["edited_fields"] = sorted(edited)
+
+
+def _join_maps(
+    existing: Iterable[dict[str, Any]],
+) -> tuple[dict[Any, dict[str, Any]], dict[tuple[Any, Any], dict[str, Any] | None]]:
+    """
+    Ένα πέρασμα στο υπάρχον feed: id -> εγγραφή, και (source, source_file) -> legacy εγγραφή
+    (None όταν το ζεύγος δεν είναι μοναδικό).
+    """
+    by_id: dict[Any, dict[str, Any]] = {}
+    legacy: dict[tuple[Any, Any], dict[str, Any] | None] = {}
+    for r in existing:
+        if not isinstance(r, dict):
+            continue
+        if r.get("id"):
+            by_id[r["id"]] = r
+        if "content_hash" not in r and r.get("source_file"):
+            key = (r.get("source"), r["source_file"])
+            legacy[key] = None if key in legacy else r
+    return by_id, legacy
+
+
+def merge_feed(
+    existing: Iterable[dict[str, Any]], fresh: Iterable[dict[str, Any]]
+) -> list[dict[str, Any]]:
+    """
+    Hash-join (O(n)) της φρέσκιας εξόδου με το υπάρχον feed, κατά id:
+    - ίδιο content_hash -> κρατάμε την υπάρχουσα εγγραφή ως έχει (με τις αλλαγές του reviewer)
+    - άλλαξε η πηγή -> νέα έξοδος parser + ανθρώπινα πεδία + πεδία που επεξεργάστηκε ο reviewer
+    - νέα εγγραφή -> ως έχει
+    Legacy feed (τυχαία uuid ids, χωρίς content_hash): όσα δεν βρεθούν κατά id ταιριάζουν κατά
+    (source, source_file) και παίρνουν το νέο id. Εγγραφές που δεν υπάρχουν πια στην είσοδο
+    αφαιρούνται.
+    """
+    return list(iter_merge(existing, fresh))
+
+
+def iter_merge(
+    existing: Iterable[dict[str, Any]], fresh: Iterable[dict[str, Any]]
+) -> Iterator[dict[str, Any]]:
+    """
+    Όπως το merge_feed, σε ροή: στη μνήμη μένει μόνο το join map του υπάρχοντος feed (χτίζεται
+    στο πρώτο next), η φρέσκια έξοδος περνά μία εγγραφή τη φορά.
+    """
+    by_id, legacy = _join_maps(existing)
+    for new in fresh:
+        old = by_id.get(new.get("id", ""))
+        if old is None:
+            old = legacy.pop((new.get("source"), new.get("source_file")), None)
+        if old is None:
+            yield new
+            continue
+        if old.get("content_hash") == new.get("content_hash"):
+            yield old
+            continue
+        rec = dict(new)
+        for f in HUMAN_FIELDS:
+            if f in old:
+                rec[f] = old[f]
+        edited = old.get("edited_fields")
+        if edited is None and old.get("status") == "edited":
+            edited = list(_LEGACY_EDITED_FIELDS)
+        for f in edited or []:
+            if f in old:
+                rec[f] = old[f]
+        yield rec
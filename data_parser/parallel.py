@@ -0,0 +1,110 @@
+# data_parser/parallel.py
+from __future__ import annotations
+
+import os
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .manifest import ManifestSection
+
+__all__ = ["EXECUTORS", "iter_paths", "parse_paths", "resolve_workers"]
+
+# inline: σειριακά στο ίδιο process (default, ίδια συμπεριφορά με πριν)
+# thread: ThreadPoolExecutor (χρήσιμο όταν κυριαρχεί το I/O)
+# process: ProcessPoolExecutor (CPU-bound parsing: BeautifulSoup / email.parser)
+EXECUTORS: tuple[str, ...] = ("inline", "thread", "process")
+
+
+def resolve_workers(workers: int | None) -> int:
+    """0/None -> όλοι οι πυρήνες, αρνητικό -> 1."""
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+def _safe_call(fn: Callable[[str], dict[str, Any]], path: str) -> dict[str, Any] | None:
+    # Απομόνωση σφαλμάτων ανά αρχείο (όπως το suppress(Exception) στους parsers)
+    try:
+        return fn(path)
+    except Exception:
+        return None
+
+
+def _mapped(
+    call: Callable[[str], dict[str, Any] | None], todo: list[str], n_workers: int, executor: str
+) -> Iterator[dict[str, Any] | None]:
+    """Αποτελέσματα του `call` με τη σειρά του `todo`, καθώς ολοκληρώνονται."""
+    if executor == "inline" or n_workers <= 1 or len(todo) < 2:
+        yield from map(call, todo)
+        return
+    if executor == "thread":
+        with ThreadPoolExecutor(max_workers=n_workers) as pool:
+            yield from pool.map(call, todo)
+        return
+    done = 0
+    chunksize = max(1, len(todo) // (n_workers * 4))
+    try:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            for rec in pool.map(call, todo, chunksize=chunksize):
+                done += 1
+                yield rec
+    except (BrokenProcessPool, OSError):
+        # π.χ. sandbox χωρίς fork/semaphores -> σειριακά τα υπόλοιπα
+        yield from map(call, todo[done:])
+
+
+def iter_paths(
+    fn: Callable[[str], dict[str, Any]],
+    paths: Iterable[str],
+    workers: int | None = 1,
+    executor: str = "process",
+    cache: ManifestSection | None = None,
+) -> Iterator[dict[str, Any]]:
+    """
+    Όπως το parse_paths, σε ροή: κάθε record δίνεται μόλις είναι έτοιμο (με τη σειρά των
+    paths), ώστε ο caller να μην κρατά όλη την έξοδο στη μνήμη.
+    """
+    if executor not in EXECUTORS:
+        raise ValueError(f"Unknown executor: {executor!r} (expected one of {EXECUTORS})")
+
+    ordered = sorted(paths)
+    hits: dict[str, dict[str, Any]] = {}
+    if cache is not None:
+        cache.retain(ordered)
+        for p in ordered:
+            hit = cache.get(p)
+            if hit is not None:
+                hits[p] = hit
+    todo = [p for p in ordered if p not in hits]
+    results = _mapped(partial(_safe_call, fn), todo, resolve_workers(workers), executor)
+
+    for p in ordered:
+        rec = hits.get(p)
+        if rec is None:
+            rec = next(results)
+            if rec is None:
+                continue
+            if cache is not None:
+                cache.put(p, rec)
+        yield rec
+
+
+def parse_paths(
+    fn: Callable[[str], dict[str, Any]],
+    paths: Iterable[str],
+    workers: int | None = 1,
+    executor: str = "process",
+    cache: ManifestSection | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Τρέχει τον parser `fn` για κάθε αρχείο και επιστρέφει τα records:
+    - ταξινομημένα ντετερμινιστικά κατά path (ανεξάρτητα από executor/workers)
+    - αρχεία που αποτυγχάνουν παραλείπονται σιωπηλά
+    - με `cache`, μόνο νέα/αλλαγμένα αρχεία ξαναπερνούν από τον parser
+    Το `fn` πρέπει να είναι module-level (picklable) για executor="process".
+    """
+    return list(iter_paths(fn, paths, workers, executor, cache))
@@ -13,12 +13,20 @@ import os
 import re
 import sys
 from collections.abc import Iterator
-from contextlib import suppress
 from email import policy
 from email.parser import BytesParser
 from email.utils import parseaddr
 from typing import Any
 
+try:
+    from .manifest import ParseManifest
+    from .parallel import iter_paths
+except ImportError:  # εκτέλεση ως script: python data_parser/parse_emails.py
+    from manifest import ParseManifest  # type: ignore[no-redef]
+    from parallel import iter_paths  # type: ignore[no-redef]
+
+PARSER_VERSION = "1"
+
 ATTACHMENT_PLACEHOLDER_RE = re.compile(
     r"\[(?:ATTACHMENT|ΣΥΝΗΜΜΕΝΟ)\s*:\s*([^\]\n]+)\]", re.IGNORECASE
 )
@@ -398,12 +406,24 @@ def iter_eml_files(root: str) -> Iterator[str]:
                 yield os.path.join(r, n)
 
 
-def parse_all_emails(emails_dir: str) -> list[dict[str, Any]]:
-    results: list[dict[str, Any]] = []
-    for eml_path in iter_eml_files(emails_dir):
-        with suppress(Exception):
-            results.append(parse_eml_file(eml_path))
-    return results
+def iter_all_emails(
+    emails_dir: str,
+    workers: int | None = 1,
+    executor: str = "process",
+    manifest: ParseManifest | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Όπως το parse_all_emails, σε ροή: ένα record τη φορά."""
+    cache = manifest.section("emails", PARSER_VERSION) if manifest else None
+    return iter_paths(parse_eml_file, iter_eml_files(emails_dir), workers, executor, cache=cache)
+
+
+def parse_all_emails(
+    emails_dir: str,
+    workers: int | None = 1,
+    executor: str = "process",
+    manifest: ParseManifest | None = None,
+) -> list[dict[str, Any]]:
+    return list(iter_all_emails(emails_dir, workers, executor, manifest))
 
 
 def main():
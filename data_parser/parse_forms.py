@@ -3,11 +3,30 @@ from __future__ import annotations
 
 import os
 import re
+from collections.abc import Iterator, Mapping, Sequence
+from contextlib import suppress
+from functools import partial
+from html.parser import HTMLParser
 from typing import Any
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from bs4.element import Tag
 
+try:
+    from lxml import etree
+
+    HAS_LXML = True
+except ImportError:  # pragma: no cover - εξαρτάται από το περιβάλλον
+    etree = None
+    HAS_LXML = False
+
+try:
+    from .manifest import ParseManifest
+    from .parallel import iter_paths
+except ImportError:  # εκτέλεση ως script: python data_parser/parse_forms.py
+    from manifest import ParseManifest  # type: ignore[no-redef]
+    from parallel import iter_paths  # type: ignore[no-redef]
+
 
 def _pick_parser() -> str:
     """
@@ -25,6 +44,57 @@ def _pick_parser() -> str:
 
 _PARSER = _pick_parser()
 
+# Tags που αλλάζουν το κείμενο των απογόνων τους στο bs4: τα strings μέσα σε string containers
+# παίρνουν δικό τους τύπο (εκτός get_text()), και μόνο μέσα σε pre/textarea δεν «μαζεύονται»
+# τα strings που είναι μόνο κενά.
+_STRING_CONTAINERS = frozenset({"script", "style", "template", "rt", "rp"})
+_PRESERVE_WS = frozenset({"pre", "textarea"})
+_ASCII_SPACES = frozenset(" \n\t\f\r")
+
+
+class _NamedFields(SoupStrainer):
+    """
+    parse_only της parse_form: το bs4 φτιάχνει objects μόνο για στοιχεία με name (μαζί με ό,τι
+    έχουν μέσα, π.χ. <option>) και για τα tags-context παραπάνω, όχι για menus κ.λπ. της σελίδας.
+    Ίδιο αποτέλεσμα με το πλήρες parse. Μόνο με lxml: τα events του είναι πάντα ισορροπημένα,
+    ενώ στο html.parser ένα </div> χωρίς το <div> του στο tree δεν κλείνει ό,τι είναι μέσα του.
+    """
+
+    def _keep(self, name: str, attrs: Any) -> bool:
+        return name in _STRING_CONTAINERS or name in _PRESERVE_WS or "name" in (attrs or {})
+
+    def allow_tag_creation(self, nsprefix: str | None, name: str, attrs: Any) -> bool:
+        return self._keep(name, attrs)
+
+    def search_tag(self, markup_name: Any = None, markup_attrs: Any = None) -> bool:
+        # bs4 < 4.13 (πριν το allow_tag_creation)
+        return self._keep(markup_name, markup_attrs)
+
+
+_NAMED = _NamedFields()
+
+# Ανέβασε την έκδοση όταν αλλάζει η έξοδος του parser (ακυρώνει το parse manifest)
+PARSER_VERSION = "1"
+
+# "auto": ένα πέρασμα με events, χωρίς tree (lxml parser target, ή html.parser χωρίς lxml)·
+# "bs4": BeautifulSoup tree. Με lxml δίνουν το ίδιο αποτέλεσμα: το bs4 χτίζει το tree του από
+# τα ίδια events του lxml.
+ENGINES: tuple[str, ...] = ("auto", "bs4")
+
+# Πεδίο εγγραφής -> names στη φόρμα, με σειρά προτίμησης (κρατιέται το πρώτο μη κενό).
+# Νέα παραλλαγή φόρμας = νέο alias εδώ, όχι νέα αναζήτηση στο έγγραφο (+ PARSER_VERSION).
+FIELD_ALIASES: dict[str, tuple[str, ...]] = {
+    "full_name": ("full_name", "name"),
+    "email": ("email",),
+    "phone": ("phone",),
+    "company": ("company",),
+    "service": ("service",),  # Υπηρεσία Ενδιαφέροντος
+    # Προαιρετικά πεδία που μπορούμε να εμφανίσουμε στο UI
+    "message": ("message",),
+    "submission_date": ("submission_date",),
+    "priority": ("priority",),
+}
+
 
 def _as_str(v: Any) -> str:
     if v is None:
@@ -42,12 +112,8 @@ def _normalize_phone(phone: str | None) -> str | None:
     return re.sub(r"[^\d+]", "", phone)
 
 
-def _get_input_value(soup: BeautifulSoup, name: str) -> str | None:
-    """Επιστρέφει την τιμή ενός input/select/textarea με συγκεκριμένο name."""
-    el = soup.find(attrs={"name": name})
-    if not isinstance(el, Tag):
-        return None
-
+def _element_value(el: Tag) -> str | None:
+    """Η τιμή ενός input/select/textarea."""
     # textarea -> text
     if el.name == "textarea":
         val = (el.text or "").strip()
@@ -66,44 +132,256 @@ def _get_input_value(soup: BeautifulSoup, name: str) -> str | None:
     return val or None
 
 
-def parse_form(html_content: str) -> dict[str, Any]:
-    """Παίρνει HTML φόρμας και επιστρέφει dict με τα βασικά πεδία."""
-    soup = BeautifulSoup(html_content, _PARSER)
+def _collect_tree(soup: BeautifulSoup) -> dict[str, str | None]:
+    """name -> τιμή του ΠΡΩΤΟΥ στοιχείου με αυτό το name, σε ένα πέρασμα του tree."""
+    values: dict[str, str | None] = {}
+    for el in soup.find_all(True, attrs={"name": True}):
+        if isinstance(el, Tag):
+            name = _as_str(el.get("name"))
+            if name not in values:
+                values[name] = _element_value(el)
+    return values
 
-    full_name = _get_input_value(soup, "full_name") or _get_input_value(soup, "name")
-    email = _get_input_value(soup, "email")
-    phone = _normalize_phone(_get_input_value(soup, "phone"))
-    company = _get_input_value(soup, "company")
-    service = _get_input_value(soup, "service")  # Υπηρεσία Ενδιαφέροντος
 
-    # Προαιρετικά πεδία που μπορούμε να εμφανίσουμε στο UI
-    message = _get_input_value(soup, "message")
-    submission_date = _get_input_value(soup, "submission_date")
-    priority = _get_input_value(soup, "priority")
-
-    return {
-        "full_name": full_name,
-        "email": email,
-        "phone": phone,
-        "company": company,
-        "service": service,
-        "message": message,
-        "submission_date": submission_date,
-        "priority": priority,
+# ---------- event collector (χωρίς tree) ----------
+# void elements του bs4 (html.parser: κλείνουν αμέσως)
+_VOID = frozenset(
+    {
+        *("area", "base", "br", "col", "embed", "hr", "img", "input", "keygen", "link"),
+        *("menuitem", "meta", "param", "source", "track", "wbr", "basefont", "bgsound"),
+        *("command", "frame", "image", "isindex", "nextid", "spacer"),
     }
+)
 
 
-def parse_all_forms(forms_dir: str) -> list[dict[str, Any]]:
-    """Διαβάζει όλα τα HTML αρχεία φόρμας από τον φάκελο και τα επιστρέφει ως λίστα dicts."""
-    extracted: list[dict[str, Any]] = []
+class _Capture:
+    """textarea / select / option που είναι ακόμα ανοιχτό: μαζεύει το κείμενό του."""
+
+    __slots__ = ("depth", "name", "options", "parts", "tag", "value")
+
+    def __init__(self, tag: str, depth: int, name: str = "", value: str = "") -> None:
+        self.tag = tag
+        self.depth = depth
+        self.name = name
+        self.value = value  # option: value attribute
+        self.parts: list[str] = []
+        self.options: list[tuple[_Capture, bool]] = []  # select: (option, selected)
+
+
+class _FieldCollector:
+    """
+    Parser target (lxml SAX interface: start / end / data / close): name -> τιμή του πρώτου
+    στοιχείου με αυτό το name, με τους κανόνες της _element_value. Δεν χτίζει tree· κρατά
+    μόνο το κείμενο των ανοιχτών textarea/option, με τους κανόνες του bs4 για τα strings.
+    """
+
+    def __init__(self) -> None:
+        self.values: dict[str, str | None] = {}
+        self._depth = 0
+        self._containers = 0
+        self._preserve = 0
+        self._buf: list[str] = []
+        self._open: list[_Capture] = []
+        self._selects: list[_Capture] = []
+
+    def start(self, tag: str, attrib: Mapping[str, str]) -> None:
+        self._flush()
+        self._depth += 1
+        if tag in _STRING_CONTAINERS:
+            self._containers += 1
+        if tag in _PRESERVE_WS:
+            self._preserve += 1
+        if tag == "option" and self._selects:
+            opt = _Capture(tag, self._depth, value=attrib.get("value") or "")
+            for sel in self._selects:
+                sel.options.append((opt, "selected" in attrib))
+            self._open.append(opt)
+        name = attrib.get("name")
+        if name is None or name in self.values:
+            return
+        if tag == "textarea" or tag == "select":
+            self.values[name] = None  # η θέση κρατιέται με τη σειρά του εγγράφου
+            cap = _Capture(tag, self._depth, name)
+            self._open.append(cap)
+            if tag == "select":
+                self._selects.append(cap)
+        else:
+            self.values[name] = attrib.get("value", "").strip() or None
+
+    def data(self, text: str) -> None:
+        self._buf.append(text)
+
+    def end(self, tag: str) -> None:
+        self._flush()
+        if tag in _STRING_CONTAINERS:
+            self._containers -= 1
+        if tag in _PRESERVE_WS:
+            self._preserve -= 1
+        while self._open and self._open[-1].depth >= self._depth:
+            self._finish(self._open.pop())
+        self._depth -= 1
+
+    # όπως στο bs4: σχόλιο / PI / doctype χωρίζουν τα strings δεξιά κι αριστερά τους
+    def comment(self, text: str) -> None:
+        self._flush()
+
+    def pi(self, target: str, data: str | None = None) -> None:
+        self._flush()
+
+    def doctype(self, name: str | None, pubid: str | None, system: str | None) -> None:
+        self._flush()
+
+    def close(self) -> dict[str, str | None]:
+        self._flush()
+        while self._open:
+            self._finish(self._open.pop())
+        return self.values
+
+    def _flush(self) -> None:
+        # ένα string του bs4 = τα συνεχόμενα data events ως το επόμενο tag/σχόλιο
+        if not self._buf:
+            return
+        text = "".join(self._buf)
+        self._buf.clear()
+        if self._containers or not self._open:
+            return
+        if not self._preserve and all(c in _ASCII_SPACES for c in text):
+            text = "\n" if "\n" in text else " "
+        for cap in self._open:
+            if cap.tag != "select":
+                cap.parts.append(text)
+
+    def _finish(self, cap: _Capture) -> None:
+        if cap.tag == "textarea":
+            self.values[cap.name] = "".join(cap.parts).strip() or None
+        elif cap.tag == "select":
+            self._selects.remove(cap)
+            opts = cap.options
+            opt = next((o for o, selected in opts if selected), opts[0][0] if opts else None)
+            if opt is not None:
+                self.values[cap.name] = (opt.value or "".join(opt.parts)).strip() or None
+
+
+class _HTMLFieldParser(HTMLParser):
+    """html.parser (stdlib) -> events του _FieldCollector, για όταν δεν υπάρχει lxml."""
+
+    def __init__(self, target: _FieldCollector) -> None:
+        super().__init__(convert_charrefs=True)
+        self.target = target
+        self._stack: list[str] = []
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self.target.start(tag, {k: v or "" for k, v in attrs})
+        if tag in _VOID:
+            self.target.end(tag)
+        else:
+            self._stack.append(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in self._stack:
+            while self._stack:
+                top = self._stack.pop()
+                self.target.end(top)
+                if top == tag:
+                    break
+
+    def handle_data(self, data: str) -> None:
+        self.target.data(data)
+
+    def handle_comment(self, data: str) -> None:
+        self.target.comment(data)
+
+    def handle_decl(self, decl: str) -> None:
+        self.target.doctype(decl, None, None)
+
+    def handle_pi(self, data: str) -> None:
+        self.target.pi(data)
+
+    def close(self) -> None:
+        super().close()
+        while self._stack:
+            self.target.end(self._stack.pop())
+
+
+def _collect_events(html_content: str) -> dict[str, str | None]:
+    collector = _FieldCollector()
+    if HAS_LXML:
+        parser = etree.HTMLParser(target=collector)
+        parser.feed(html_content)
+        parser.close()
+    else:
+        fallback = _HTMLFieldParser(collector)
+        fallback.feed(html_content)
+        fallback.close()
+    return collector.close()
+
+
+def parse_form(
+    html_content: str,
+    engine: str = "auto",
+    restrict: bool = True,
+    aliases: Mapping[str, Sequence[str]] | None = None,
+) -> dict[str, Any]:
+    """
+    Παίρνει HTML φόρμας και επιστρέφει dict με τα βασικά πεδία (ένα ανά κλειδί των aliases,
+    default FIELD_ALIASES). engine="bs4", restrict=False: πλήρες tree (π.χ. για σύγκριση).
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown form engine: {engine!r} (expected one of {ENGINES})")
+    values: dict[str, str | None] | None = None
+    if engine == "auto":
+        with suppress(Exception):  # έγγραφο που δεν σηκώνει ο parser -> bs4
+            values = _collect_events(html_content)
+    if values is None:
+        strainer = _NAMED if restrict and _PARSER == "lxml" else None
+        values = _collect_tree(BeautifulSoup(html_content, _PARSER, parse_only=strainer))
+
+    rec = {
+        field: next((v for n in names if (v := values.get(n))), None)
+        for field, names in (FIELD_ALIASES if aliases is None else aliases).items()
+    }
+    if "phone" in rec:
+        rec["phone"] = _normalize_phone(rec["phone"])
+    return rec
+
+
+def iter_form_files(forms_dir: str) -> Iterator[str]:
+    """Τα .html αρχεία φόρμας του φακέλου (χωρίς υποφακέλους)."""
     for filename in os.listdir(forms_dir):
         if filename.lower().endswith(".html"):
-            full_path = os.path.join(forms_dir, filename)
-            with open(full_path, encoding="utf-8", errors="ignore") as f:
-                data = parse_form(f.read())
-            data["source_file"] = filename
-            extracted.append(data)
-    return extracted
+            yield os.path.join(forms_dir, filename)
+
+
+def parse_form_file(path: str, engine: str = "auto") -> dict[str, Any]:
+    """Parser για ΕΝΑ αρχείο φόρμας."""
+    with open(path, encoding="utf-8", errors="ignore") as f:
+        data = parse_form(f.read(), engine)
+    data["source_file"] = os.path.basename(path)
+    return data
+
+
+def iter_all_forms(
+    forms_dir: str,
+    workers: int | None = 1,
+    executor: str = "process",
+    manifest: ParseManifest | None = None,
+    engine: str = "auto",
+) -> Iterator[dict[str, Any]]:
+    """Όπως το parse_all_forms, σε ροή: ένα record τη φορά."""
+    fn = partial(parse_form_file, engine=engine)
+    cache = manifest.section("forms", PARSER_VERSION) if manifest else None
+    return iter_paths(fn, iter_form_files(forms_dir), workers, executor, cache=cache)
+
+
+def parse_all_forms(
+    forms_dir: str,
+    workers: int | None = 1,
+    executor: str = "process",
+    manifest: ParseManifest | None = None,
+    engine: str = "auto",
+) -> list[dict[str, Any]]:
+    """Διαβάζει όλα τα HTML αρχεία φόρμας από τον φάκελο και τα επιστρέφει ως λίστα dicts."""
+    return list(iter_all_forms(forms_dir, workers, executor, manifest, engine))
 
 
 if __name__ == "__main__":
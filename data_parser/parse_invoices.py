@@ -3,13 +3,21 @@ from __future__ import annotations
 
 import os
 import re
-from contextlib import suppress
+from collections.abc import Callable, Iterator
 from datetime import datetime
+from functools import partial
 from typing import Any
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from bs4.element import Tag
 
+try:
+    from .manifest import ParseManifest
+    from .parallel import iter_paths
+except ImportError:  # εκτέλεση ως script: python data_parser/parse_invoices.py
+    from manifest import ParseManifest  # type: ignore[no-redef]
+    from parallel import iter_paths  # type: ignore[no-redef]
+
 
 # ---------- choose best parser ----------
 def _pick_parser() -> str:
@@ -24,6 +32,15 @@ def _pick_parser() -> str:
 
 _PARSER = _pick_parser()
 
+PARSER_VERSION = "1"
+
+# "auto": lxml engine (data_parser.invoice_lxml) όταν υπάρχει lxml, με fallback στο bs4 ανά
+# έγγραφο· "bs4": πάντα BeautifulSoup. Και τα δύο δίνουν την ίδια εγγραφή.
+# "partial": bs4 μόνο πάνω στα blocks του τιμολογίου (_InvoiceBlocks), για μεγάλες σελίδες με
+# scripts/menus γύρω από το τιμολόγιο. Το full text (αριθμός τιμολογίου, fallback ημερομηνίας)
+# βγαίνει τότε μόνο από αυτά τα blocks, οπότε δεν είναι το default.
+ENGINES: tuple[str, ...] = ("auto", "bs4", "partial")
+
 # ---------- helpers ----------
 WS = re.compile(r"\s+")
 
@@ -32,10 +49,13 @@ def _nw(s: Any) -> str:
     return WS.sub(" ", (s or "")).strip()
 
 
+_AMOUNT_JUNK = re.compile(r"[^\d,.\-]")
+
+
 def _norm_amount(tok: str | None) -> str:
     if tok is None:
         return ""
-    t = re.sub(r"[^\d,.\-]", "", tok.strip())
+    t = _AMOUNT_JUNK.sub("", tok)
     t = (
         t.replace(".", "").replace(",", ".")
         if ("," in t and t.rfind(",") > t.rfind("."))
@@ -52,6 +72,48 @@ def _to_float(tok: str | None) -> float | None:
         return None
 
 
+# Από τόσες τιμές και πάνω η στήλη μετατρέπεται vectorized (pyarrow.compute)· κάτω από αυτό
+# το σταθερό κόστος των kernels ξεπερνά το loop του _to_float.
+BATCH_AMOUNTS = 1024
+_FLOAT_OK = r"-?(?:[0-9]+\.?[0-9]*|\.[0-9]+)"  # ό,τι δέχεται το float() μετά το _norm_amount
+_OTHER_DIGIT = re.compile(r"(?![0-9])\d")
+
+
+def _amounts_vectorized(tokens: list[str]) -> list[float | None] | None:
+    """
+    _to_float για όλη τη στήλη με Arrow compute (regex RE2, cast σε float64)· None όταν δεν
+    υπάρχει pyarrow. Ψηφία εκτός ASCII (τα δέχεται το float()) περνούν από το _to_float.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+    except ImportError:
+        return None
+    t = pc.replace_substring_regex(pa.array(tokens, pa.string()), r"[^0-9,.\-]", "")
+    eu = pc.match_substring_regex(t, r",[^.]*$")  # "," μετά το τελευταίο "."
+    t = pc.if_else(
+        eu,
+        pc.replace_substring(pc.replace_substring(t, ".", ""), ",", "."),
+        pc.replace_substring(t, ",", ""),
+    )
+    ok = pc.match_substring_regex(t, f"^{_FLOAT_OK}$")
+    out = pc.if_else(ok, t, None).cast(pa.float64()).to_pylist()
+    if _OTHER_DIGIT.search("".join(tokens)):
+        for i, tok in enumerate(tokens):
+            if _OTHER_DIGIT.search(tok):
+                out[i] = _to_float(tok)
+    return out
+
+
+def _amounts(tokens: list[str]) -> list[float | None]:
+    """_to_float για μια στήλη ποσών· οι μεγάλες στήλες μετατρέπονται μαζί (batch)."""
+    if len(tokens) >= BATCH_AMOUNTS:
+        out = _amounts_vectorized(tokens)
+        if out is not None:
+            return out
+    return [_to_float(t) for t in tokens]
+
+
 DATE_PAT = re.compile(
     r"\b((?:\d{1,2}[\/\-.]\d{1,2}[\/\-.]\d{2,4})|(?:\d{4}[\/\-]\d{1,2}[\/\-]\d{1,2}))\b"
 )
@@ -87,6 +149,21 @@ def _find_invoice_number_from_text(text: str) -> str:
     return ""
 
 
+def _currency_symbol(text: str) -> str | None:
+    if "€" in text:
+        return "EUR"
+    if "$" in text:
+        return "USD"
+    if "£" in text:
+        return "GBP"
+    return None
+
+
+SUMMARY_HINT = re.compile(r"καθαρή\s*αξία|subtotal|net\s*(amount|value)", re.I)
+
+Summary = tuple[float | None, float | None, float | None, float | None, str]
+
+
 def _find_summary_table(soup: BeautifulSoup) -> Tag | None:
     div_sum = soup.select_one("div.summary")
     if isinstance(div_sum, Tag):
@@ -94,43 +171,34 @@ def _find_summary_table(soup: BeautifulSoup) -> Tag | None:
         if isinstance(tbl, Tag):
             return tbl
     for tbl in soup.find_all("table"):
-        if isinstance(tbl, Tag) and tbl.find(
-            string=re.compile(r"καθαρή\s*αξία|subtotal|net\s*(amount|value)", re.I)
-        ):
+        if isinstance(tbl, Tag) and tbl.find(string=SUMMARY_HINT):
             return tbl
     return None
 
 
-def _extract_summary_amounts(
-    soup: BeautifulSoup,
-) -> tuple[float | None, float | None, float | None, float | None, str]:
-    subtotal: float | None = None
-    vat_amount: float | None = None
-    vat_rate: float | None = None
-    total: float | None = None
-    currency = "EUR"
-
+def _extract_summary_amounts(soup: BeautifulSoup) -> Summary:
     tbl = _find_summary_table(soup)
     if not isinstance(tbl, Tag):
-        return subtotal, vat_amount, vat_rate, total, currency
-
-    whole_text = _nw(tbl.get_text(" "))
-    if "€" in whole_text:
-        currency = "EUR"
-    elif "$" in whole_text:
-        currency = "USD"
-    elif "£" in whole_text:
-        currency = "GBP"
-
+        return None, None, None, None, "EUR"
+    rows: list[tuple[str, str]] = []
     for tr in tbl.find_all("tr"):
         if not isinstance(tr, Tag):
             continue
         tds = tr.find_all(["td", "th"])
-        if len(tds) < 2:
-            continue
-        label = _nw(tds[0].get_text(" "))
-        value = _nw(tds[-1].get_text(" "))
+        if len(tds) >= 2:
+            rows.append((_nw(tds[0].get_text(" ")), _nw(tds[-1].get_text(" "))))
+    return _summary_from_rows(_nw(tbl.get_text(" ")), rows)
+
 
+def _summary_from_rows(whole_text: str, rows: list[tuple[str, str]]) -> Summary:
+    """Ποσά σύνοψης από τις γραμμές (ετικέτα, τιμή) του πίνακα· κοινό για bs4 και lxml."""
+    subtotal: float | None = None
+    vat_amount: float | None = None
+    vat_rate: float | None = None
+    total: float | None = None
+    currency = _currency_symbol(whole_text) or "EUR"
+
+    for label, value in rows:
         if re.search(r"καθαρή\s*αξία|net\s*(amount|value)|subtotal|προ\s*φπα", label, re.I):
             subtotal = _to_float(value)
         elif re.search(r"φπα|vat", label, re.I):
@@ -176,10 +244,14 @@ def _extract_seller_block(soup: BeautifulSoup) -> dict[str, Any]:
     if not isinstance(header, Tag):
         return out
     company = header.select_one(".company")
-    if isinstance(company, Tag):
-        out["seller_name"] = _nw(company.get_text())
+    name = _nw(company.get_text()) if isinstance(company, Tag) else ""
     divs = header.find_all("div")
-    txts = [_nw(d.get_text(" ")) for d in divs if isinstance(d, Tag)]
+    return _seller_from_texts(name, [_nw(d.get_text(" ")) for d in divs if isinstance(d, Tag)])
+
+
+def _seller_from_texts(name: str, txts: list[str]) -> dict[str, Any]:
+    """Στοιχεία εκδότη από το όνομα (.company) και τα κείμενα των <div> του .header."""
+    out: dict[str, Any] = {"seller_name": name, "seller_address": ""}
     # address line: first non meta after name
     for t in txts:
         if t == out["seller_name"]:
@@ -205,20 +277,19 @@ def _get_details_wrapper(details: Tag | None) -> Tag | None:
     if not isinstance(details, Tag):
         return None
     for child in details.find_all("div", recursive=False):
-        if not isinstance(child, Tag):
-            continue
-        style = (_nw(child.get("style"))).lower()
-        if "display" in style and "flex" in style:
+        if isinstance(child, Tag) and _is_flex(child.get("style")):
             return child
     for child in details.find_all("div"):
-        if not isinstance(child, Tag):
-            continue
-        style = (_nw(child.get("style"))).lower()
-        if "display" in style and "flex" in style:
+        if isinstance(child, Tag) and _is_flex(child.get("style")):
             return child
     return None
 
 
+def _is_flex(style: Any) -> bool:
+    low = _nw(style).lower()
+    return "display" in low and "flex" in low
+
+
 def _extract_header_left_block(details: Tag | None) -> str:
     if not isinstance(details, Tag):
         return ""
@@ -242,7 +313,12 @@ def _extract_buyer_block(soup: BeautifulSoup) -> dict[str, Any]:
     right = cols[1] if len(cols) >= 2 else None
     if not isinstance(right, Tag):
         return out
-    raw = right.get_text("\n")
+    return _buyer_from_text(right.get_text("\n"))
+
+
+def _buyer_from_text(raw: str) -> dict[str, Any]:
+    """Στοιχεία πελάτη από το κείμενο της δεξιάς στήλης (μία γραμμή ανά <br>)."""
+    out: dict[str, Any] = {"buyer_name": "", "buyer_vat": "", "buyer_address": ""}
     lines = [line.strip() for line in raw.splitlines() if line.strip()]
     if lines and lines[0].lower().startswith("πελάτης"):
         lines = lines[1:]
@@ -274,12 +350,11 @@ def _extract_payment_and_date(details_text: str) -> tuple[str, str]:
 
 
 def _extract_items(soup: BeautifulSoup) -> tuple[list[dict[str, Any]], str]:
-    items: list[dict[str, Any]] = []
-    currency = "EUR"
+    rows: list[list[str]] = []
 
     tbl = soup.select_one("table.invoice-table")
     if not isinstance(tbl, Tag):
-        return items, currency
+        return _items_from_rows(rows)
 
     # Αποφεύγουμε το: tbody = tbl.find("tbody") or tbl  (προκαλεί union PageElement | Tag)
     tbody = tbl.find("tbody")
@@ -292,29 +367,31 @@ def _extract_items(soup: BeautifulSoup) -> tuple[list[dict[str, Any]], str]:
         if len(tds) < 4:
             continue
 
-        desc = _nw(tds[0].get_text(" "))
-        qty = _to_float(_nw(tds[1].get_text(" ")))
-        unit = _nw(tds[2].get_text(" "))
-        total = _nw(tds[3].get_text(" "))
+        rows.append([_nw(td.get_text(" ")) for td in tds[:4]])
+
+    return _items_from_rows(rows)
 
-        sym_text = f"{unit} {total}"
-        if "€" in sym_text:
-            currency = "EUR"
-        elif "$" in sym_text:
-            currency = "USD"
-        elif "£" in sym_text:
-            currency = "GBP"
 
+def _items_from_rows(
+    rows: list[list[str]], currency: str = "EUR"
+) -> tuple[list[dict[str, Any]], str]:
+    """
+    Γραμμές τιμολογίου από τα 4 πρώτα κελιά κάθε γραμμής· τα ποσά μετατρέπονται ανά στήλη
+    (_amounts) και το νόμισμα κρατιέται από την προηγούμενη γραμμή.
+    """
+    items: list[dict[str, Any]] = []
+    qty, unit_price, line_total = (_amounts([r[i] for r in rows]) for i in (1, 2, 3))
+    for (desc, _, unit, total), q, u, t in zip(rows, qty, unit_price, line_total, strict=True):
+        currency = _currency_symbol(f"{unit} {total}") or currency
         items.append(
             {
                 "description": desc,
-                "quantity": qty,
-                "unit_price": _to_float(unit),
-                "line_total": _to_float(total),
+                "quantity": q,
+                "unit_price": u,
+                "line_total": t,
                 "currency": currency,
             }
         )
-
     return items, currency
 
 
@@ -338,45 +415,91 @@ def _extract_footer_notes(soup: BeautifulSoup) -> list[dict[str, str]]:
         txt = _nw(p.get_text(" "))
         if not txt:
             continue
-        label = ""
         strong = p.find(["strong", "b"])
-        if isinstance(strong, Tag):
-            label = _nw(strong.get_text()).rstrip(":：").strip()
-            full = _nw(p.get_text(" "))
-            patt = re.compile(rf"^{re.escape(label)}\s*[:：]?\s*", re.I)
-            value = patt.sub("", full).strip()
-        else:
-            m = re.match(r"(.+?)\s*[:：]\s*(.+)$", txt)
-            if m:
-                label, value = _nw(m.group(1)), _nw(m.group(2))
-            else:
-                label, value = "Σημείωση", txt
-        notes.append({"label": label, "value": value})
+        notes.append(_note_from_text(txt, strong.get_text() if isinstance(strong, Tag) else None))
     return notes
 
 
-# ---------- core (refactor) ----------
-def _parse_invoice_soup(soup: BeautifulSoup) -> dict[str, Any]:
-    full_text = soup.get_text(" ")
+def _note_from_text(txt: str, strong: str | None) -> dict[str, str]:
+    """{"label","value"} από το κείμενο του <p> και (αν υπάρχει) του πρώτου <strong>/<b>."""
+    if strong is not None:
+        label = _nw(strong).rstrip(":：").strip()
+        patt = re.compile(rf"^{re.escape(label)}\s*[:：]?\s*", re.I)
+        return {"label": label, "value": patt.sub("", txt).strip()}
+    m = re.match(r"(.+?)\s*[:：]\s*(.+)$", txt)
+    if m:
+        return {"label": _nw(m.group(1)), "value": _nw(m.group(2))}
+    return {"label": "Σημείωση", "value": txt}
 
-    invoice_number = _find_invoice_number_from_text(full_text)
 
-    seller = _extract_seller_block(soup)
+# ---------- partial parse ----------
+class _InvoiceBlocks(SoupStrainer):
+    """
+    parse_only του engine "partial": tree μόνο για <title>, .header, .invoice-details,
+    table.invoice-table, div.summary και τον <div> αμέσως μετά τη σύνοψη (σημειώσεις).
+    Κρατά state (αν πέρασε η σύνοψη), οπότε ένα instance ανά έγγραφο.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._after_summary = False
+
+    def _keep(self, name: str, attrs: Any) -> bool:
+        if name == "title":
+            return True
+        if name == "div" and self._after_summary:
+            self._after_summary = False
+            return True
+        raw = (attrs or {}).get("class") or ""
+        classes = raw.split() if isinstance(raw, str) else raw
+        if "header" in classes or "invoice-details" in classes:
+            return True
+        if name == "table":
+            return "invoice-table" in classes
+        if name == "div" and "summary" in classes:
+            self._after_summary = True
+            return True
+        return False
+
+    def allow_tag_creation(self, nsprefix: str | None, name: str, attrs: Any) -> bool:
+        return self._keep(name, attrs)
+
+    def search_tag(self, markup_name: Any = None, markup_attrs: Any = None) -> bool:
+        # bs4 < 4.13 (πριν το allow_tag_creation)
+        return self._keep(markup_name, markup_attrs)
+
 
+# ---------- core (refactor) ----------
+def _parse_invoice_soup(soup: BeautifulSoup) -> dict[str, Any]:
     details = soup.select_one(".invoice-details")
-    left_text = _extract_header_left_block(details if isinstance(details, Tag) else None)
+    return _build_record(
+        soup.get_text(" "),
+        _extract_header_left_block(details if isinstance(details, Tag) else None),
+        _extract_seller_block(soup),
+        _extract_buyer_block(soup),
+        _extract_items(soup),
+        _extract_summary_amounts(soup),
+        _extract_footer_notes(soup),
+    )
+
+
+def _build_record(
+    full_text: str,
+    left_text: str,
+    seller: dict[str, Any],
+    buyer: dict[str, Any],
+    items_res: tuple[list[dict[str, Any]], str],
+    summary: Summary,
+    extra_notes: list[dict[str, str]],
+) -> dict[str, Any]:
+    """Τελική εγγραφή από τα κομμάτια που βγάζει κάθε engine (bs4 ή lxml)."""
+    invoice_number = _find_invoice_number_from_text(full_text)
     date_str, payment_method = _extract_payment_and_date(left_text)
     if not date_str:
         date_str = _parse_date_text(full_text)
-
-    buyer = _extract_buyer_block(soup)
-
-    items, items_currency = _extract_items(soup)
-    subtotal, vat_amount, vat_rate, total, sum_currency = _extract_summary_amounts(soup)
+    items, items_currency = items_res
+    subtotal, vat_amount, vat_rate, total, sum_currency = summary
     currency = sum_currency or items_currency or "EUR"
-
-    extra_notes = _extract_footer_notes(soup)
-
     record: dict[str, Any] = {
         "invoice_number": invoice_number,
         "date": date_str,
@@ -405,35 +528,75 @@ def _parse_invoice_soup(soup: BeautifulSoup) -> dict[str, Any]:
     return record
 
 
-def parse_invoice_html(html: str) -> dict[str, Any]:
+def _lxml_engine() -> Callable[[str], dict[str, Any]] | None:
+    # lazy: το invoice_lxml εισάγει helpers από αυτό το module
+    try:
+        from .invoice_lxml import HAS_LXML, parse_invoice_tree
+    except ImportError:  # εκτέλεση ως script
+        from invoice_lxml import HAS_LXML, parse_invoice_tree  # type: ignore[no-redef]
+    return parse_invoice_tree if HAS_LXML else None
+
+
+def parse_invoice_html(html: str, engine: str = "auto") -> dict[str, Any]:
     """Parser για ΕΝΑ τιμολόγιο από HTML string."""
-    soup = BeautifulSoup(html, _PARSER)
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown invoice engine: {engine!r} (expected one of {ENGINES})")
+    fast = _lxml_engine() if engine == "auto" else None
+    if fast is not None:
+        try:
+            return fast(html)
+        except Exception:
+            pass  # έγγραφο που δεν σηκώνει το lxml -> bs4
+    partial_only = engine == "partial" and _PARSER != "html5lib"  # html5lib: χωρίς parse_only
+    soup = BeautifulSoup(html, _PARSER, parse_only=_InvoiceBlocks() if partial_only else None)
     return _parse_invoice_soup(soup)
 
 
-def parse_invoice_file(path: str) -> dict[str, Any]:
+def parse_invoice_file(path: str, engine: str = "auto") -> dict[str, Any]:
     """Parser για ΕΝΑ τιμολόγιο από αρχείο .html."""
     with open(path, encoding="utf-8", errors="ignore") as f:
         html = f.read()
-    soup = BeautifulSoup(html, _PARSER)
-    rec = _parse_invoice_soup(soup)
+    rec = parse_invoice_html(html, engine)
     rec["source_file"] = os.path.basename(path)
     return rec
 
 
-def parse_all_invoices(invoices_dir: str) -> list[dict[str, Any]]:
-    out: list[dict[str, Any]] = []
+def iter_invoice_files(invoices_dir: str) -> Iterator[str]:
     for root, _, files in os.walk(invoices_dir):
         for n in files:
             if os.path.splitext(n)[1].lower() in {".html", ".htm"}:
-                path = os.path.join(root, n)
-                with suppress(Exception):
-                    with open(path, encoding="utf-8", errors="ignore") as f:
-                        html = f.read()
-                    rec = parse_invoice_html(html)
-                    rec["source_file"] = os.path.relpath(path, invoices_dir)
-                    out.append(rec)
-    return out
+                yield os.path.join(root, n)
+
+
+def _parse_invoice_path(path: str, invoices_dir: str, engine: str = "auto") -> dict[str, Any]:
+    with open(path, encoding="utf-8", errors="ignore") as f:
+        html = f.read()
+    rec = parse_invoice_html(html, engine)
+    rec["source_file"] = os.path.relpath(path, invoices_dir)
+    return rec
+
+
+def iter_all_invoices(
+    invoices_dir: str,
+    workers: int | None = 1,
+    executor: str = "process",
+    manifest: ParseManifest | None = None,
+    engine: str = "auto",
+) -> Iterator[dict[str, Any]]:
+    """Όπως το parse_all_invoices, σε ροή: ένα record τη φορά."""
+    fn = partial(_parse_invoice_path, invoices_dir=invoices_dir, engine=engine)
+    cache = manifest.section("invoices", PARSER_VERSION) if manifest else None
+    return iter_paths(fn, iter_invoice_files(invoices_dir), workers, executor, cache=cache)
+
+
+def parse_all_invoices(
+    invoices_dir: str,
+    workers: int | None = 1,
+    executor: str = "process",
+    manifest: ParseManifest | None = None,
+    engine: str = "auto",
+) -> list[dict[str, Any]]:
+    return list(iter_all_invoices(invoices_dir, workers, executor, manifest, engine))
 
 
 # ---------- CLI ----------
@@ -0,0 +1,370 @@
+# data_parser/pipeline.py
+from __future__ import annotations
+
+import os
+import re
+import time
+import uuid
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager, suppress
+from datetime import datetime
+from itertools import chain, islice
+from typing import Any
+
+from .blobs import BlobStore, externalize
+from .email_match import InvoiceMatcher, matched_via
+from .matching import InvoiceNgramIndex, fuzzy_find_many, normalize_inv
+from .merge import iter_identity
+from .record_store import RecordStore
+
+__all__ = [
+    "ALLOWED_STATUS",
+    "INV_RE",
+    "InvoiceIndex",
+    "StageHook",
+    "build_feed",
+    "enrich_emails",
+    "extract_inv_no",
+    "force_status",
+    "harden_record",
+    "infer_source",
+    "iter_enrich_emails",
+    "iter_feed",
+    "iter_offloaded",
+    "make_id",
+    "needs_action",
+    "normalize_common",
+    "now_iso",
+    "offload_payloads",
+    "relink_emails",
+]
+
+ALLOWED_STATUS: list[str] = ["pending", "approved", "rejected", "edited"]
+
+# Αριθμός τιμολογίου σε subject/body email (compiled μία φορά, κοινό για CLI και app)
+INV_RE: re.Pattern[str] = re.compile(
+    r"(?:invoice|τιμολ(?:όγιο|\.?)|αρ\.?\s*τιμολ(?:ογίου)?)\s*(?:no\.?|#|nr\.?|:)?\s*([A-Z]{0,4}[-/]?\d[\w\-\/]+)",
+    re.IGNORECASE,
+)
+
+# Timing hook: on_stage(όνομα σταδίου, δευτερόλεπτα)
+StageHook = Callable[[str, float], None]
+
+# Emails ανά κλήση του enrich_emails στη ροή (batch για fuzzy/signals, φράγμα μνήμης)
+ENRICH_BATCH = 1024
+
+
+def now_iso() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def make_id(prefix: str) -> str:
+    return f"{prefix}_{uuid.uuid4().hex[:12]}"
+
+
+def extract_inv_no(txt: str | None) -> str | None:
+    if not txt:
+        return None
+    m = INV_RE.search(txt)
+    return m.group(1).strip() if m else None
+
+
+def needs_action(rec: dict[str, Any]) -> bool:
+    """
+    Ο ένας κανόνας needs_action: invoice-like email χωρίς πραγματικό PDF ή χωρίς
+    αντίστοιχο invoice_html. Ό,τι άλλο (forms, invoices, client emails) -> False.
+    """
+    if rec.get("source", "email") != "email" or rec.get("email_type") != "invoice":
+        return False
+    return bool(
+        rec.get("missing_attachment")
+        or not rec.get("has_pdf_attachments")
+        or not rec.get("matched_invoice_html")
+    )
+
+
+def force_status(status: Any) -> str:
+    return status if isinstance(status, str) and status in ALLOWED_STATUS else "pending"
+
+
+def infer_source(rec: dict[str, Any]) -> str:
+    """Το source μιας εγγραφής· για παλιές εγγραφές χωρίς source, από τα πεδία της."""
+    src = rec.get("source")
+    if src:
+        return str(src)
+    if "email_type" in rec:
+        return "email"
+    return "invoice_html" if "invoice_number" in rec else "form"
+
+
+def harden_record(rec: dict[str, Any], source: str | None = None) -> None:
+    """
+    Ενοποιεί κοινά πεδία in-place (χωρίς `source`: infer_source) και ΕΓΓΥΑΤΑΙ ότι θα υπάρχει
+    έγκυρο:
+      - source
+      - status
+      - id (όχι κενό/None)
+      - created_at
+      - schema_version
+      - needs_action
+    """
+    rec["source"] = source or infer_source(rec)
+    rec["status"] = force_status(rec.get("status"))
+    if not rec.get("id"):
+        rec["id"] = make_id(rec["source"])
+    rec.setdefault("created_at", now_iso())
+    rec.setdefault("schema_version", "1.0")
+    rec["needs_action"] = needs_action(rec)
+
+
+def normalize_common(rec: dict[str, Any], source: str) -> dict[str, Any]:
+    """Οι κανόνες της harden_record σε αντίγραφο της εγγραφής, με δοσμένο source."""
+    r: dict[str, Any] = dict(rec)
+    harden_record(r, source)
+    return r
+
+
+@contextmanager
+def _stage(name: str, on_stage: StageHook | None) -> Iterator[None]:
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        if on_stage is not None:
+            on_stage(name, time.perf_counter() - t0)
+
+
+class InvoiceIndex:
+    """
+    Το ένα index τιμολογίων ανά αριθμό: raw (όπως γράφτηκε) και normalize_inv κλειδί.
+    Τα raw κλειδιά υπερισχύουν· ο matcher πολλαπλών σημάτων χτίζεται μόνο αν ζητηθεί.
+    `ngrams`: InvoiceNgramIndex από προηγούμενο run (InvoiceNgramIndex.load), που τα fuzzy
+    lookups ενημερώνουν με sync αντί να χτίζουν νέο.
+    """
+
+    def __init__(
+        self, invoices: list[dict[str, Any]], ngrams: InvoiceNgramIndex | None = None
+    ) -> None:
+        self.invoices = invoices
+        self.by_norm: dict[str, dict[str, Any]] = {
+            normalize_inv(r.get("invoice_number")): r for r in invoices if r.get("invoice_number")
+        }
+        by_raw = {
+            str(r.get("invoice_number")).strip(): r for r in invoices if r.get("invoice_number")
+        }
+        self.by_no: dict[str, dict[str, Any]] = {**self.by_norm, **by_raw}
+        self._matcher: InvoiceMatcher | None = None
+        self._ngrams = ngrams
+        self._ngrams_synced = False
+
+    def ngrams(self) -> InvoiceNgramIndex | None:
+        """Το δοσμένο n-gram index, συγχρονισμένο με το by_norm· None αν δεν δόθηκε."""
+        if self._ngrams is not None and not self._ngrams_synced:
+            self._ngrams.sync(self.by_norm)
+            self._ngrams_synced = True
+        return self._ngrams
+
+    def exact(self, inv_no: str | None) -> dict[str, Any] | None:
+        if not inv_no:
+            return None
+        return self.by_no.get(inv_no) or self.by_no.get(normalize_inv(inv_no))
+
+    def matcher(self, fuzzy: int | None = None) -> InvoiceMatcher:
+        if self._matcher is None or self._matcher.fuzzy_cutoff != fuzzy:
+            ngrams = self.ngrams() if fuzzy is not None else None
+            self._matcher = InvoiceMatcher(self.invoices, fuzzy_cutoff=fuzzy, ngrams=ngrams)
+        return self._matcher
+
+
+def enrich_emails(
+    emails: list[dict[str, Any]],
+    invoices: list[dict[str, Any]] | InvoiceIndex,
+    fuzzy: int | None = None,
+    signals: bool = False,
+    on_stage: StageHook | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Email -> invoice_html linking (αριθμός από subject ΚΑΙ body):
+    1) exact lookup στο InvoiceIndex
+    2) `fuzzy` (score cutoff): όσα δεν βρέθηκαν, σε ένα batch rapidfuzz (fuzzy_find_many)
+    3) `signals`: matcher πολλαπλών σημάτων (PDF, ποσό, domain, ημερομηνία) για όλα· ένας
+       exact αριθμός κρατά πάντα το τιμολόγιό του (τα άλλα σήματα μόνο βαθμολογούν)
+    Κάθε email παίρνει matched_* / matched_via / fuzzy_score / needs_action.
+    Για ροή emails: iter_enrich_emails.
+    """
+    with _stage("index", on_stage):
+        index = invoices if isinstance(invoices, InvoiceIndex) else InvoiceIndex(invoices)
+
+    with _stage("extract", on_stage):
+        inv_nos = [
+            extract_inv_no(e.get("subject", "")) or extract_inv_no(e.get("body", ""))
+            for e in emails
+        ]
+
+    with _stage("exact", on_stage):
+        links = [index.exact(n) for n in inv_nos]
+        scores: list[int | None] = [100 if linked else None for linked in links]
+        via = ["exact" if linked else "none" for linked in links]
+
+    if signals:
+        with _stage("signals", on_stage):
+            results = index.matcher(fuzzy).match_many(emails, inv_nos)
+            for i, (rec, total, points) in enumerate(results):
+                links[i], scores[i] = rec, (total if rec else None)
+                via[i] = matched_via(points) if rec else "none"
+    elif fuzzy is not None:
+        with _stage("fuzzy", on_stage):
+            misses = [i for i, (n, linked) in enumerate(zip(inv_nos, links)) if n and not linked]
+            found = fuzzy_find_many(
+                [inv_nos[i] for i in misses],
+                index.by_norm,
+                score_cutoff=fuzzy,
+                workers=-1,
+                index=index.ngrams(),
+            )
+            for i, (rec, fz_score) in zip(misses, found, strict=True):
+                links[i], scores[i] = rec, fz_score
+                if rec:
+                    via[i] = "fuzzy"  # ίσο κλειδί έχει ήδη βρεθεί στο exact στάδιο
+
+    with _stage("enrich", on_stage):
+        out: list[dict[str, Any]] = []
+        for e, inv_no, linked, score, how in zip(emails, inv_nos, links, scores, via, strict=True):
+            enriched: dict[str, Any] = {
+                **e,
+                "invoice_number_in_subject": inv_no,
+                "matched_invoice_html": bool(linked),
+                "matched_invoice_file": linked.get("source_file") if linked else None,
+                "matched_invoice_total": linked.get("total") if linked else None,
+                "matched_via": how,
+                "fuzzy_score": score,
+            }
+            enriched["needs_action"] = needs_action(enriched)
+            out.append(enriched)
+    return out
+
+
+def iter_enrich_emails(
+    emails: Iterable[dict[str, Any]],
+    invoices: list[dict[str, Any]] | InvoiceIndex,
+    fuzzy: int | None = None,
+    signals: bool = False,
+    on_stage: StageHook | None = None,
+    batch: int = ENRICH_BATCH,
+) -> Iterator[dict[str, Any]]:
+    """
+    Όπως το enrich_emails, σε ροή: ένα InvoiceIndex για όλα, τα emails ανά `batch` (το fuzzy
+    / signals βαθμολογεί κάθε batch μαζί), οπότε στη μνήμη μένει ένα batch τη φορά.
+    """
+    index = invoices if isinstance(invoices, InvoiceIndex) else InvoiceIndex(invoices)
+    it = iter(emails)
+    while chunk := list(islice(it, batch)):
+        yield from enrich_emails(chunk, index, fuzzy=fuzzy, signals=signals, on_stage=on_stage)
+
+
+def _number_based(via: Any) -> bool:
+    return bool({"exact", "fuzzy"} & set(str(via or "").split("+")))
+
+
+def relink_emails(
+    store: RecordStore, invoice: dict[str, Any], old_inv_no: str | None
+) -> list[dict[str, Any]]:
+    """
+    Incremental re-linking μετά από edit ενός τιμολογίου (invoice_number / total), χωρίς
+    πλήρες rebuild: ξαναβλέπει μόνο τα emails του reverse index (παλιός ή νέος αριθμός,
+    ή ήδη συνδεδεμένα με το ίδιο source_file).
+    - exact αριθμός στο store -> σύνδεση "exact"
+    - αλλιώς η υπάρχουσα σύνδεση με αυτό το τιμολόγιο μένει, εκτός αν στηριζόταν στον
+      αριθμό που μόλις άλλαξε (fuzzy / signals ξαναβαθμολογούνται στο επόμενο rebuild)
+    Γράφει τα αλλαγμένα emails στο store (store[i] = ...) και τα επιστρέφει για save.
+    """
+    src = invoice.get("source_file")
+    renumbered = normalize_inv(old_inv_no) != normalize_inv(invoice.get("invoice_number"))
+    changed: list[dict[str, Any]] = []
+    for i in sorted(
+        store.emails_referencing(old_inv_no, invoice.get("invoice_number"), source_file=src)
+    ):
+        e = store.full(i)
+        was_file, via, score = (
+            e.get("matched_invoice_file"),
+            e.get("matched_via"),
+            e.get("fuzzy_score"),
+        )
+        linked = store.find_invoice(e.get("invoice_number_in_subject"))
+        if linked is not None:
+            if linked.get("source_file") != was_file or not _number_based(via):
+                via, score = "exact", 100
+        elif src and was_file == src and not (renumbered and _number_based(via)):
+            linked = invoice
+        else:
+            via, score = "none", None
+        updated: dict[str, Any] = {
+            **e,
+            "matched_invoice_html": bool(linked),
+            "matched_invoice_file": linked.get("source_file") if linked else None,
+            "matched_invoice_total": linked.get("total") if linked else None,
+            "matched_via": via,
+            "fuzzy_score": score,
+        }
+        updated["needs_action"] = needs_action(updated)
+        if updated != e:
+            store[i] = updated
+            changed.append(updated)
+    return changed
+
+
+def iter_offloaded(
+    recs: Iterable[dict[str, Any]], blobs: BlobStore, invoices_dir: str | None = None
+) -> Iterator[dict[str, Any]]:
+    """
+    Ροή του offload_payloads για ένα είδος: με `invoices_dir` οι εγγραφές είναι τιμολόγια και
+    παίρνουν και source_html_ref.
+    """
+    for rec in recs:
+        r = externalize(rec, blobs)
+        src = r.get("source_file")
+        if invoices_dir and src and "source_html_ref" not in r:
+            with suppress(OSError):
+                r["source_html_ref"] = blobs.put_file(os.path.join(invoices_dir, src))
+        yield r
+
+
+def offload_payloads(
+    emails: list[dict[str, Any]],
+    invoices: list[dict[str, Any]],
+    blobs: BlobStore,
+    invoices_dir: str | None = None,
+    on_stage: StageHook | None = None,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """
+    Βαριά payloads στο blob store πριν γραφτούν parsed_* / feed: body_html των emails ->
+    body_html_ref, και το HTML της πηγής κάθε τιμολογίου (από `invoices_dir`) -> source_html_ref.
+    """
+    with _stage("blobs", on_stage):
+        out_emails = list(iter_offloaded(emails, blobs))
+        out_invoices = list(iter_offloaded(invoices, blobs, invoices_dir or None))
+    return out_emails, out_invoices
+
+
+def iter_feed(
+    forms: Iterable[dict[str, Any]],
+    enriched_emails: Iterable[dict[str, Any]],
+    invoices: Iterable[dict[str, Any]],
+) -> Iterator[dict[str, Any]]:
+    """Όπως το build_feed, σε ροή: forms, emails, invoices με τη σειρά, μία εγγραφή τη φορά."""
+    return chain(
+        (normalize_common(r, "form") for r in iter_identity(forms, "form")),
+        (normalize_common(r, "email") for r in iter_identity(enriched_emails, "email")),
+        (normalize_common(r, "invoice_html") for r in iter_identity(invoices, "invoice_html")),
+    )
+
+
+def build_feed(
+    forms: Iterable[dict[str, Any]],
+    enriched_emails: Iterable[dict[str, Any]],
+    invoices: Iterable[dict[str, Any]],
+    on_stage: StageHook | None = None,
+) -> list[dict[str, Any]]:
+    """Normalize & combine με σταθερά ids (source + source_file), έτοιμο για merge_feed."""
+    with _stage("combine", on_stage):
+        return list(iter_feed(forms, enriched_emails, invoices))
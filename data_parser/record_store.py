@@ -0,0 +1,316 @@
+# data_parser/record_store.py
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from typing import Any
+
+from .matching import normalize_inv
+from .records import record_from_dict
+from .search_index import SearchIndex
+
+__all__ = ["SUMMARY_FIELDS", "InvoiceLookup", "Loader", "RecordStore", "summarize"]
+
+# Summary projection: ό,τι χρειάζονται λίστα/labels, φίλτρα, ταξινόμηση, indexes και το
+# relinking. Items, bodies και τα υπόλοιπα πεδία φορτώνονται μόνο για την επιλεγμένη εγγραφή.
+SUMMARY_FIELDS: tuple[str, ...] = (
+    "id",
+    "source",
+    "status",
+    "needs_action",
+    "subject",
+    "invoice_number",
+    "full_name",
+    "company",
+    "service",
+    "email",
+    "source_file",
+    "date",
+    "created_at",
+    "updated_at",
+    "email_type",
+    "has_pdf_attachments",
+    "missing_attachment",
+    "invoice_number_in_subject",
+    "matched_invoice_html",
+    "matched_invoice_file",
+    "matched_invoice_total",
+    "matched_via",
+    "fuzzy_score",
+    "seller_name",
+    "buyer_name",
+    "subtotal",
+    "vat_amount",
+    "total",
+)
+
+# ids -> {id: πλήρης εγγραφή} (π.χ. FeedStorage.get_many)
+Loader = Callable[[list[str]], dict[str, dict[str, Any]]]
+
+
+def summarize(rec: dict[str, Any]) -> dict[str, Any]:
+    return {f: rec[f] for f in SUMMARY_FIELDS if f in rec}
+
+
+# ό,τι έχει μπει στα indexes για μια θέση: id, source, status, needs_action, inv raw, inv norm,
+# και για emails: normalized αριθμός που αναφέρουν, matched_invoice_file
+_Keys = tuple[str, Any, Any, bool, str, str, str, str]
+
+
+class RecordStore:
+    """
+    Το feed (list[dict]) + indexes που ενημερώνονται σε κάθε αλλαγή μέσω store[i] = rec / append:
+    - hash: id -> θέση, invoice_number (raw και normalized) -> θέσεις
+    - reverse: αριθμός τιμολογίου / αρχείο τιμολογίου -> emails που το αναφέρουν ή συνδέονται
+    - sets: source / status / needs_action -> θέσεις
+    - search: trigram SearchIndex, χτίζεται στο πρώτο query και μετά ενημερώνεται επιτόπου
+    Τα φίλτρα γίνονται τομές συνόλων και τα lookups O(1).
+    Τα indexes κρατούν τις τιμές τη στιγμή της εισαγωγής, οπότε in-place αλλαγή ενός dict
+    (rec["status"] = ...) ακολουθούμενη από store[i] = rec ενημερώνει σωστά.
+    Με from_summaries οι θέσεις κρατούν μόνο το summary(rec)· full(i) / resolve() φέρνουν
+    τις πλήρεις εγγραφές από τον `loader` του backend.
+    """
+
+    def __init__(
+        self,
+        records: list[dict[str, Any]] | None = None,
+        greeklish: bool = False,
+        loader: Loader | None = None,
+    ) -> None:
+        self.records: list[dict[str, Any]] = records if records is not None else []
+        self.greeklish = greeklish
+        self._loader = loader
+        self._partial: set[int] = set()
+        self._keys: list[_Keys] = []
+        self._by_id: dict[str, int] = {}
+        self._by_source: dict[Any, set[int]] = {}
+        self._by_status: dict[Any, set[int]] = {}
+        self._needs_action: set[int] = set()
+        self._by_inv: dict[str, set[int]] = {}
+        self._by_inv_norm: dict[str, set[int]] = {}
+        self._email_by_inv: dict[str, set[int]] = {}
+        self._email_by_file: dict[str, set[int]] = {}
+        self._search: SearchIndex | None = None
+        for i, rec in enumerate(self.records):
+            self._keys.append(self._index(i, rec))
+
+    @classmethod
+    def from_summaries(
+        cls,
+        records: Iterable[dict[str, Any]],
+        loader: Loader,
+        greeklish: bool = False,
+        search: bool = True,
+        typed: bool = False,
+    ) -> RecordStore:
+        """
+        Ένα streaming πέρασμα πάνω στις πλήρεις εγγραφές: κρατιέται μόνο το summary τους και
+        (με `search`) το κείμενο αναζήτησης, ώστε το search να βλέπει και τα bodies.
+        Με `typed` τα summaries είναι __slots__ εγγραφές (data_parser.records) αντί για dicts.
+        """
+        index = SearchIndex(greeklish=greeklish) if search else None
+        summaries: list[Any] = []
+        for rec in records:
+            if index is not None:
+                index.add(rec)
+            summary = summarize(rec)
+            summaries.append(record_from_dict(summary) if typed else summary)
+        store = cls(summaries, greeklish=greeklish, loader=loader)
+        store._partial = set(range(len(summaries)))
+        store._search = index
+        return store
+
+    # ---- index maintenance ----
+    def _index(self, i: int, rec: dict[str, Any]) -> _Keys:
+        rid = str(rec.get("id") or "")
+        source, status = rec.get("source"), rec.get("status")
+        needs = bool(rec.get("needs_action"))
+        inv_raw = inv_norm = ""
+        if source == "invoice_html" and rec.get("invoice_number"):
+            inv_raw = str(rec["invoice_number"])
+            inv_norm = normalize_inv(inv_raw)
+        ref = linked = ""
+        if source == "email":
+            ref = normalize_inv(rec.get("invoice_number_in_subject"))
+            linked = str(rec.get("matched_invoice_file") or "")
+        if rid:
+            self._by_id.setdefault(rid, i)
+        self._by_source.setdefault(source, set()).add(i)
+        self._by_status.setdefault(status, set()).add(i)
+        if needs:
+            self._needs_action.add(i)
+        if inv_raw:
+            self._by_inv.setdefault(inv_raw, set()).add(i)
+            self._by_inv_norm.setdefault(inv_norm, set()).add(i)
+        if ref:
+            self._email_by_inv.setdefault(ref, set()).add(i)
+        if linked:
+            self._email_by_file.setdefault(linked, set()).add(i)
+        return (rid, source, status, needs, inv_raw, inv_norm, ref, linked)
+
+    def _unindex(self, i: int) -> None:
+        rid, source, status, needs, inv_raw, inv_norm, ref, linked = self._keys[i]
+        if rid and self._by_id.get(rid) == i:
+            del self._by_id[rid]
+        self._by_source.get(source, set()).discard(i)
+        self._by_status.get(status, set()).discard(i)
+        self._needs_action.discard(i)
+        for index, key in (
+            (self._by_inv, inv_raw),
+            (self._by_inv_norm, inv_norm),
+            (self._email_by_inv, ref),
+            (self._email_by_file, linked),
+        ):
+            hits = index.get(key)
+            if hits is not None:
+                hits.discard(i)
+                if not hits:
+                    del index[key]
+
+    # ---- list-like ----
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        return iter(self.records)
+
+    def __getitem__(self, i: int) -> dict[str, Any]:
+        return self.records[i]
+
+    def __setitem__(self, i: int, rec: dict[str, Any]) -> None:
+        old_id = self._keys[i][0]
+        self._unindex(i)
+        self.records[i] = rec
+        self._partial.discard(i)
+        self._keys[i] = self._index(i, rec)
+        if self._search is not None:
+            self._search.update(i, rec)
+        if old_id and old_id not in self._by_id:
+            # άλλαξε το id: αν υπήρχε διπλότυπο, το index δείχνει πλέον σε εκείνο
+            for j, keys in enumerate(self._keys):
+                if keys[0] == old_id:
+                    self._by_id[old_id] = j
+                    break
+
+    def append(self, rec: dict[str, Any]) -> None:
+        self.records.append(rec)
+        self._keys.append(self._index(len(self.records) - 1, rec))
+        if self._search is not None:
+            self._search.add(rec)
+
+    def extend(self, recs: Iterable[dict[str, Any]]) -> None:
+        for rec in recs:
+            self.append(rec)
+
+    # ---- lazy detail ----
+    def is_partial(self, i: int) -> bool:
+        return i in self._partial
+
+    def full(self, i: int) -> dict[str, Any]:
+        """Η πλήρης εγγραφή της θέσης i· αν ήταν summary φορτώνεται και μένει στο store."""
+        if i in self._partial and self._loader is not None:
+            rid = self._keys[i][0]
+            rec = self._loader([rid]).get(rid) if rid else None
+            if rec is not None:
+                self[i] = rec
+        return self.records[i]
+
+    def resolve(self, recs: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+        """
+        Πλήρεις εγγραφές για export / merge / πλήρες save, με ένα batch στον loader.
+        Δεν μπαίνουν στο store: η μνήμη της session μένει στα summaries.
+        """
+        recs = list(recs)
+        if not self._partial or self._loader is None:
+            return recs
+        wanted: list[str] = []
+        for r in recs:
+            i = self.index_of(r.get("id", ""))
+            if i in self._partial and self.records[i] is r:
+                wanted.append(str(r["id"]))
+        loaded = self._loader(wanted) if wanted else {}
+        return [loaded.get(str(r.get("id")), r) for r in recs]
+
+    # ---- lookups ----
+    def index_of(self, rec_id: str) -> int:
+        """Θέση της εγγραφής με αυτό το id, ή -1."""
+        return self._by_id.get(str(rec_id), -1) if rec_id else -1
+
+    def get(self, rec_id: str) -> dict[str, Any] | None:
+        i = self.index_of(rec_id)
+        return self.records[i] if i >= 0 else None
+
+    def invoice_index_of(self, inv_no: str | None) -> int | None:
+        """Θέση του invoice_html record με αυτόν τον αριθμό (σύγκριση σε normalized μορφή)."""
+        hits = self._by_inv_norm.get(normalize_inv(inv_no)) if inv_no else None
+        return min(hits) if hits else None
+
+    def find_invoice(self, inv_no: str | None) -> dict[str, Any] | None:
+        """Ακριβής αριθμός πρώτα, μετά normalized (όπως το παλιό invoice_index_combined)."""
+        if not inv_no:
+            return None
+        hits = self._by_inv.get(str(inv_no)) or self._by_inv_norm.get(normalize_inv(inv_no))
+        return self.records[min(hits)] if hits else None
+
+    def emails_referencing(self, *inv_nos: str | None, source_file: str | None = None) -> set[int]:
+        """
+        Θέσεις των emails που αναφέρουν κάποιον από τους αριθμούς (normalized σύγκριση)
+        ή είναι ήδη συνδεδεμένα με το τιμολόγιο `source_file` (matched_invoice_file).
+        """
+        hits: set[int] = set()
+        for inv_no in inv_nos:
+            key = normalize_inv(inv_no) if inv_no else ""
+            hits |= self._email_by_inv.get(key, set()) if key else set()
+        if source_file:
+            hits |= self._email_by_file.get(str(source_file), set())
+        return hits
+
+    @property
+    def invoices(self) -> InvoiceLookup:
+        return InvoiceLookup(self)
+
+    def search(self, query: str | None, prefix: bool = False) -> set[int] | None:
+        """Θέσεις που ταιριάζουν στο query (βλ. SearchIndex.search)· None για κενό query."""
+        if self._search is None:
+            self._search = SearchIndex(self.records, greeklish=self.greeklish)
+        return self._search.search(query, prefix=prefix)
+
+    def select(
+        self,
+        sources: Iterable[Any] | None = None,
+        statuses: Iterable[Any] | None = None,
+        needs_action_only: bool = False,
+        within: set[int] | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Εγγραφές (με τη σειρά του feed) που περνούν τα φίλτρα, ως τομή των set indexes.
+        `within`: περιορισμός σε συγκεκριμένες θέσεις (π.χ. αποτέλεσμα του search).
+        """
+        sel: set[int] | None = None if within is None else set(within)
+        for index, wanted in ((self._by_source, sources), (self._by_status, statuses)):
+            if wanted is None:
+                continue
+            part: set[int] = set().union(*(index.get(k, ()) for k in wanted))
+            sel = part if sel is None else sel & part
+        if needs_action_only:
+            sel = set(self._needs_action) if sel is None else sel & self._needs_action
+        positions = range(len(self.records)) if sel is None else sorted(sel)
+        return [self.records[i] for i in positions]
+
+
+class InvoiceLookup(Mapping[str, dict[str, Any]]):
+    """Read-only view invoice_number -> record (raw ή normalized κλειδί) πάνω σε RecordStore."""
+
+    def __init__(self, store: RecordStore) -> None:
+        self._store = store
+
+    def __getitem__(self, key: str) -> dict[str, Any]:
+        rec = self._store.find_invoice(key)
+        if rec is None:
+            raise KeyError(key)
+        return rec
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._store._by_inv_norm)
+
+    def __len__(self) -> int:
+        return len(self._store._by_inv_norm)
@@ -0,0 +1,252 @@
+# data_parser/records.py
+from __future__ import annotations
+
+import sys
+from collections.abc import Iterable, Iterator, MutableMapping
+from typing import Any, ClassVar
+
+from . import codec
+
+__all__ = [
+    "EmailRecord",
+    "FormRecord",
+    "InvoiceItem",
+    "InvoiceRecord",
+    "Record",
+    "dumps_record",
+    "loads_record",
+    "record_from_dict",
+    "to_jsonable",
+]
+
+# Κατηγορικές τιμές: ένα κοινό string object ανά τιμή (sys.intern), όχι ένα ανά εγγραφή
+INTERNED_FIELDS = frozenset({"source", "status", "email_type", "currency", "matched_via", "ext"})
+
+_META = (
+    "id",
+    "source",
+    "status",
+    "created_at",
+    "updated_at",
+    "schema_version",
+    "content_hash",
+    "needs_action",
+    "notes",
+    "edited_fields",
+    "source_file",
+)
+
+
+def _slots(fields: tuple[str, ...]) -> tuple[str, ...]:
+    # slot ανά πεδίο με πρόθεμα, ώστε πεδία όπως "items" να μην κρύβουν τις μεθόδους του Mapping
+    return tuple(f"_f_{f}" for f in fields)
+
+
+class Record(MutableMapping[str, Any]):
+    """
+    Compact εγγραφή με __slots__ αντί για dict, με dict-compatible API (get / [] / update /
+    items / ** unpacking), οπότε ο κώδικας της app και των exports δεν αλλάζει.
+    Τα γνωστά πεδία (FIELDS) είναι slots (_f_<πεδίο>)· ό,τι άλλο πάει στο `_extra` (lazy dict).
+    Ένα slot χωρίς τιμή = «λείπει το κλειδί», όπως σε dict.
+    """
+
+    FIELDS: ClassVar[tuple[str, ...]] = ()
+    _ATTR: ClassVar[dict[str, str]] = {}
+    __slots__ = ("_extra",)
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._ATTR = dict(zip(cls.FIELDS, _slots(cls.FIELDS), strict=True))
+
+    def __init__(self, data: Iterable[tuple[str, Any]] | dict[str, Any] = ()) -> None:
+        self._extra: dict[str, Any] | None = None
+        for key, value in data.items() if isinstance(data, dict) else data:
+            self[key] = value
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> Record:
+        return cls(data)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {k: to_jsonable(v) for k, v in self.items()}
+
+    # ---- MutableMapping ----
+    def __getitem__(self, key: str) -> Any:
+        attr = self._ATTR.get(key)
+        if attr is not None:
+            try:
+                return getattr(self, attr)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in INTERNED_FIELDS and type(value) is str:
+            value = sys.intern(value)
+        attr = self._ATTR.get(key)
+        if attr is not None:
+            setattr(self, attr, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        attr = self._ATTR.get(key)
+        if attr is not None:
+            try:
+                delattr(self, attr)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is not None:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        for key, attr in self._ATTR.items():
+            if hasattr(self, attr):
+                yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __contains__(self, key: object) -> bool:
+        attr = self._ATTR.get(key) if isinstance(key, str) else None
+        if attr is not None:
+            return hasattr(self, attr)
+        return self._extra is not None and key in self._extra
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def copy(self) -> Record:
+        return type(self)(self.items())
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self.items())!r})"
+
+
+class InvoiceItem(Record):
+    FIELDS = ("description", "quantity", "unit_price", "line_total", "currency")
+    __slots__ = _slots(FIELDS)
+
+
+class FormRecord(Record):
+    FIELDS = (
+        *_META,
+        "full_name",
+        "email",
+        "phone",
+        "company",
+        "service",
+        "message",
+        "submission_date",
+        "priority",
+    )
+    __slots__ = _slots(FIELDS)
+
+
+class EmailRecord(Record):
+    FIELDS = (
+        *_META,
+        "full_name",
+        "email",
+        "phone",
+        "company",
+        "email_type",
+        "has_pdf_attachments",
+        "attachment_names",
+        "attachment_placeholder_only",
+        "missing_attachment",
+        "subject",
+        "date",
+        "body",
+        "body_html",
+        "body_html_ref",
+        "body_preview",
+        "invoice_number_in_subject",
+        "matched_invoice_html",
+        "matched_invoice_file",
+        "matched_invoice_total",
+        "matched_via",
+        "fuzzy_score",
+    )
+    __slots__ = _slots(FIELDS)
+
+
+class InvoiceRecord(Record):
+    FIELDS = (
+        *_META,
+        "invoice_number",
+        "date",
+        "payment_method",
+        "subtotal",
+        "vat_amount",
+        "vat_rate",
+        "total",
+        "currency",
+        "seller_name",
+        "seller_email",
+        "seller_phone",
+        "seller_vat",
+        "seller_tax_office",
+        "seller_address",
+        "buyer_name",
+        "buyer_vat",
+        "buyer_address",
+        "items",
+        "extra_notes",
+        "ext",
+        "source_html_ref",
+    )
+    __slots__ = _slots(FIELDS)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key == "items" and isinstance(value, list):
+            value = [InvoiceItem(v) if isinstance(v, dict) else v for v in value]
+        super().__setitem__(key, value)
+
+
+_BY_SOURCE: dict[str, type[Record]] = {
+    "form": FormRecord,
+    "email": EmailRecord,
+    "invoice_html": InvoiceRecord,
+}
+
+
+def record_from_dict(data: dict[str, Any]) -> dict[str, Any] | Record:
+    """dict -> typed εγγραφή ανά source· άγνωστο source μένει dict."""
+    cls = _BY_SOURCE.get(data.get("source"))
+    return cls(data) if cls is not None else data
+
+
+def to_jsonable(value: Any) -> Any:
+    """Record (και λίστες από Records) -> απλά dicts για το JSON."""
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, list):
+        return [to_jsonable(v) for v in value]
+    return value
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Record):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_record(rec: dict[str, Any] | Record) -> str:
+    """Μία γραμμή JSON (όπως στο .jsonl), ίδια για dict και typed εγγραφή."""
+    return codec.dumps_str(rec, default=_default)
+
+
+def loads_record(line: str | bytes) -> dict[str, Any] | Record:
+    return record_from_dict(codec.loads(line))
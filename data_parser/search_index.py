@@ -0,0 +1,142 @@
+# data_parser/search_index.py
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable
+from typing import Any
+
+from .textnorm import fold, greeklish
+
+__all__ = ["NGRAM", "SEARCH_FIELDS", "SearchIndex", "normalize_text", "search_text"]
+
+# Πεδία που ψάχνει το search box του sidebar
+SEARCH_FIELDS: tuple[str, ...] = (
+    "subject",
+    "full_name",
+    "email",
+    "company",
+    "invoice_number",
+    "service",
+    "body",
+    "seller_name",
+    "buyer_name",
+)
+
+NGRAM = 3
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def normalize_text(s: Any) -> str:
+    """
+    fold (πεζά, χωρίς τόνους, ς -> σ) + tokens με ένα κενό ανάμεσα
+    (σημεία στίξης/whitespace = διαχωριστικά). Ίδια συνάρτηση για εγγραφές και queries.
+    """
+    return " ".join(_TOKEN_RE.findall(fold(str(s))))
+
+
+def search_text(rec: dict[str, Any], with_greeklish: bool = False) -> str:
+    """
+    Κανονικοποιημένο κείμενο αναζήτησης μιας εγγραφής, με κενό στα άκρα (για prefix).
+    Με with_greeklish προστίθεται και η μεταγραφή του, ώστε το "timologio" να βρίσκει "Τιμολόγιο".
+    """
+    text = normalize_text(" ".join(str(rec[f]) for f in SEARCH_FIELDS if rec.get(f)))
+    if with_greeklish:
+        latin = greeklish(text)
+        if latin != text:
+            text = f"{text} {latin}"
+    return f" {text} "
+
+
+def _grams(token: str) -> set[str]:
+    return {token[i : i + NGRAM] for i in range(len(token) - NGRAM + 1)}
+
+
+class SearchIndex:
+    """
+    Inverted index δύο επιπέδων πάνω στο search_text κάθε εγγραφής (θέση στο feed):
+    - token -> θέσεις εγγραφών
+    - trigram -> tokens του λεξιλογίου (substring/prefix μέσα σε token)
+    Ένα query βρίσκει για κάθε token του τα tokens του λεξιλογίου που το περιέχουν, κάνει
+    τομή των θέσεων και επιβεβαιώνει με substring μόνο τους υποψήφιους.
+    Το χτίσιμο κοστίζει O(διακριτά tokens ανά εγγραφή), όχι O(χαρακτήρες)· το folding των
+    τόνων γίνεται εδώ μία φορά, στο query μένει μόνο το (μικρό) normalize του ίδιου του query.
+    """
+
+    def __init__(self, records: Iterable[dict[str, Any]] = (), greeklish: bool = False) -> None:
+        self.greeklish = greeklish
+        self._docs: list[str] = []
+        self._postings: dict[str, set[int]] = {}
+        self._vocab_grams: dict[str, set[str]] = {}
+        for rec in records:
+            self.add(rec)
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, rec: dict[str, Any]) -> int:
+        i = len(self._docs)
+        self._docs.append(" ")
+        self.update(i, rec)
+        return i
+
+    def update(self, i: int, rec: dict[str, Any]) -> None:
+        old, new = self._docs[i], search_text(rec, self.greeklish)
+        if old == new:
+            return
+        old_toks, new_toks = set(old.split()), set(new.split())
+        for tok in old_toks - new_toks:
+            hits = self._postings.get(tok)
+            if hits is None:
+                continue
+            hits.discard(i)
+            if not hits:
+                del self._postings[tok]
+                for g in _grams(tok):
+                    self._vocab_grams[g].discard(tok)
+        for tok in new_toks - old_toks:
+            hits = self._postings.get(tok)
+            if hits is None:
+                hits = self._postings[tok] = set()
+                for g in _grams(tok):
+                    self._vocab_grams.setdefault(g, set()).add(tok)
+            hits.add(i)
+        self._docs[i] = new
+
+    def _tokens_matching(self, part: str, prefix: bool) -> list[str]:
+        if len(part) < NGRAM:
+            pool: Iterable[str] = self._postings  # σύντομο κομμάτι: σάρωση λεξιλογίου
+        else:
+            sets = sorted((self._vocab_grams.get(g, set()) for g in _grams(part)), key=len)
+            pool = set(sets[0]).intersection(*sets[1:])
+        if prefix:
+            return [tok for tok in pool if tok.startswith(part)]
+        return [tok for tok in pool if part in tok]
+
+    def search(self, query: str | None, prefix: bool = False) -> set[int] | None:
+        """
+        Θέσεις εγγραφών που περιέχουν το query (substring) ή, με prefix=True,
+        έχουν token που ξεκινά με αυτό. None = κενό query (καμία διήθηση).
+        """
+        needle = normalize_text(query or "")
+        if not needle:
+            return None
+        parts: list[tuple[int, list[set[int]]]] = []
+        for n, part in enumerate(needle.split()):
+            lists = [self._postings[tok] for tok in self._tokens_matching(part, prefix and n == 0)]
+            if not lists:
+                return set()
+            parts.append((sum(map(len, lists)), lists))
+        parts.sort(key=lambda p: p[0])  # πρώτα το πιο επιλεκτικό κομμάτι
+        cands: set[int] = set().union(*parts[0][1])
+        for est, lists in parts[1:]:
+            if not cands:
+                break
+            if len(cands) * len(lists) < est:
+                cands = {i for i in cands if any(i in hits for hits in lists)}
+            else:
+                cands &= set().union(*lists)
+        if len(parts) == 1:
+            return cands  # ένα token: το containment/prefix στο token αρκεί
+        if prefix:
+            needle = f" {needle}"
+        return {i for i in cands if needle in self._docs[i]}
@@ -0,0 +1,451 @@
+# data_parser/storage.py
+from __future__ import annotations
+
+import abc
+import getpass
+import os
+import sqlite3
+import time
+from collections.abc import Iterable, Iterator, Mapping
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Any
+
+from . import codec
+from .jsonl import is_jsonl, write_records
+
+__all__ = [
+    "BACKENDS",
+    "FeedStorage",
+    "JsonFeedStorage",
+    "SqliteFeedStorage",
+    "open_storage",
+]
+
+BACKENDS: tuple[str, ...] = ("json", "sqlite")
+
+# Compaction του journal: όταν ξεπεράσει αυτό το μέγεθος ή την ηλικία (από το τελευταίο snapshot)
+JOURNAL_MAX_BYTES = 4 * 1024 * 1024
+JOURNAL_MAX_AGE_S = 60 * 60
+
+
+# Προηγούμενη μορφή ανά id, για journal μόνο των πεδίων που άλλαξαν (FeedStorage.upsert)
+Previous = Mapping[str, Mapping[str, Any]]
+
+# Πεδίο που αφαιρέθηκε ("unset" στο journal), μέσα στα συγχωνευμένα patches
+_UNSET: Any = object()
+
+
+def _default_actor() -> str:
+    try:
+        return os.getenv("ATHENAGEN_ACTOR") or getpass.getuser()
+    except Exception:
+        return "reviewer"
+
+
+def _diff(
+    old: Mapping[str, Any] | None, new: Mapping[str, Any]
+) -> tuple[dict[str, Any], list[str]]:
+    """(πεδία που άλλαξαν ή είναι νέα, πεδία που αφαιρέθηκαν)· χωρίς old όλη η εγγραφή."""
+    if old is None:
+        return dict(new), []
+    fields = {k: v for k, v in new.items() if k not in old or old[k] != v}
+    return fields, [k for k in old if k not in new]
+
+
+def _merge_entry(patch: dict[str, Any], entry: Mapping[str, Any]) -> None:
+    patch.update(entry.get("fields") or {})
+    for k in entry.get("unset") or ():
+        patch[k] = _UNSET
+
+
+def _apply(rec: dict[str, Any], patch: Mapping[str, Any]) -> dict[str, Any]:
+    for k, v in patch.items():
+        if v is _UNSET:
+            rec.pop(k, None)
+        else:
+            rec[k] = v
+    return rec
+
+
+class FeedStorage(abc.ABC):
+    """
+    Κοινό interface αποθήκευσης του combined feed (abstract: κάθε backend υλοποιεί τα
+    load_all / replace_all / upsert / exists / files).
+    - load_all: όλες οι εγγραφές με τη σειρά του feed
+    - replace_all: πλήρης αντικατάσταση (rebuild)
+    - upsert: γράφει μόνο τις εγγραφές που άλλαξαν (αν το υποστηρίζει το backend)· με
+      `previous` (id -> εγγραφή πριν το edit) ένα backend μπορεί να γράψει μόνο τη διαφορά
+    - export_json: combined_feed.json για tests / scripts/export_to_sheets.py
+    - version: ταυτότητα των αρχείων (για cache του φορτωμένου feed)
+    - iter_all / get_many: streaming ανάγνωση και φόρτωση ανά id (summary list στην app)·
+      με supports_lazy το get_many δεν διαβάζει όλο το feed
+    """
+
+    name = "base"
+    supports_upsert = False
+    supports_lazy = False
+
+    @abc.abstractmethod
+    def files(self) -> list[str]:
+        raise NotImplementedError
+
+    def version(self) -> tuple[Any, ...]:
+        """(inode, mtime_ns, size) ανά αρχείο του backend· αλλάζει σε κάθε εγγραφή."""
+        out: list[Any] = []
+        for p in self.files():
+            try:
+                st = os.stat(p)
+                out.append((st.st_ino, st.st_mtime_ns, st.st_size))
+            except OSError:
+                out.append(None)
+        return tuple(out)
+
+    @abc.abstractmethod
+    def load_all(self) -> list[dict[str, Any]]:
+        raise NotImplementedError
+
+    def iter_all(self) -> Iterator[dict[str, Any]]:
+        yield from self.load_all()
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        """Κάθε iteration ξαναδιαβάζει το feed σε ροή (iter_all)."""
+        return self.iter_all()
+
+    def get_many(self, ids: Iterable[str]) -> dict[str, dict[str, Any]]:
+        wanted = {str(i) for i in ids}
+        return {str(r["id"]): r for r in self.iter_all() if str(r.get("id")) in wanted}
+
+    @abc.abstractmethod
+    def replace_all(self, records: Iterable[dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def upsert(
+        self,
+        records: Iterable[dict[str, Any]],
+        actor: str | None = None,
+        previous: Previous | None = None,
+    ) -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def exists(self) -> bool:
+        raise NotImplementedError
+
+    def export_json(self, path: str) -> str:
+        write_records(self.iter_all(), path)
+        return path
+
+
+class JsonFeedStorage(FeedStorage):
+    """
+    combined_feed.json ως snapshot + append-only journal (combined_feed.journal.jsonl).
+    Με path .jsonl το snapshot διαβάζεται/γράφεται streaming, μία εγγραφή ανά γραμμή.
+    Κάθε edit = μία γραμμή {id, fields, unset?, ts, actor} με μόνο τα πεδία που άλλαξαν
+    (διαφορά από το `previous` του upsert, αλλιώς όλη η εγγραφή)· το load κάνει replay πάνω
+    στο snapshot και το compaction ξαναγράφει το snapshot όταν το journal μεγαλώσει/παλιώσει.
+    """
+
+    name = "json"
+    supports_upsert = True
+
+    def __init__(self, path: str) -> None:
+        self.path = str(path)
+        root, _ = os.path.splitext(self.path)
+        self.journal_path = f"{root}.journal.jsonl"
+        # .jsonl snapshot: id -> byte offset της γραμμής, για την έκδοση (stat) του αρχείου
+        self._offsets: dict[str, int] = {}
+        self._offsets_version: tuple[int, int, int] | None = None
+
+    @property
+    def supports_lazy(self) -> bool:  # type: ignore[override]
+        return is_jsonl(self.path)
+
+    def files(self) -> list[str]:
+        return [self.path, self.journal_path]
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path) or os.path.exists(self.journal_path)
+
+    def _load_snapshot(self) -> Iterator[dict[str, Any]]:
+        """Εγγραφές του snapshot: .jsonl σε ροή, .json array (από τη μορφή του) ολόκληρο."""
+        if not os.path.exists(self.path):
+            return iter(())
+        if is_jsonl(self.path):
+            return self._iter_snapshot_lines()
+        with open(self.path, "rb") as f:
+            data = codec.load(f)
+        return iter([r for r in data if isinstance(r, dict)] if isinstance(data, list) else [])
+
+    def iter_journal(self) -> Iterator[dict[str, Any]]:
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, "rb") as f:
+            for line in f:
+                try:
+                    entry = codec.loads(line)
+                except ValueError:
+                    continue  # μισογραμμένη γραμμή από crash: αγνοείται
+                if isinstance(entry, dict) and entry.get("id"):
+                    yield entry
+
+    def load_all(self) -> list[dict[str, Any]]:
+        return list(self.iter_all())
+
+    def _journal_patches(self) -> dict[str, dict[str, Any]]:
+        """id -> συγχωνευμένο patch (με τη σειρά πρώτης εμφάνισης στο journal)."""
+        patches: dict[str, dict[str, Any]] = {}
+        for entry in self.iter_journal():
+            _merge_entry(patches.setdefault(str(entry["id"]), {}), entry)
+        return patches
+
+    def _snapshot_version(self) -> tuple[int, int, int] | None:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _iter_snapshot_lines(self) -> Iterator[dict[str, Any]]:
+        """Γραμμές του .jsonl snapshot, καταγράφοντας το offset κάθε id."""
+        version = self._snapshot_version()
+        if version is None:
+            return
+        offsets: dict[str, int] = {}
+        pos = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                start, pos = pos, pos + len(line)
+                if not line.strip():
+                    continue
+                rec = codec.loads(line)
+                if not isinstance(rec, dict):
+                    continue
+                if rec.get("id"):
+                    offsets.setdefault(str(rec["id"]), start)
+                yield rec
+        self._offsets, self._offsets_version = offsets, version
+
+    def iter_all(self) -> Iterator[dict[str, Any]]:
+        """Snapshot + replay του journal, μία εγγραφή τη φορά για .jsonl snapshot."""
+        patches = self._journal_patches()
+        for rec in self._load_snapshot():
+            patch = patches.pop(str(rec.get("id")), None)
+            yield _apply(rec, patch) if patch else rec
+        for rec_id, patch in patches.items():  # νέες εγγραφές μόνο στο journal
+            yield _apply({"id": rec_id}, patch)
+
+    def get_many(self, ids: Iterable[str]) -> dict[str, dict[str, Any]]:
+        """.jsonl: seek στα offsets του snapshot + patches του journal, χωρίς πλήρες διάβασμα."""
+        if not is_jsonl(self.path):
+            return super().get_many(ids)
+        if self._offsets_version != self._snapshot_version():
+            for _ in self._iter_snapshot_lines():
+                pass
+        patches = self._journal_patches()
+        out: dict[str, dict[str, Any]] = {}
+        with open(self.path, "rb") if self._offsets_version else nullcontext() as f:
+            for rec_id in map(str, ids):
+                pos = self._offsets.get(rec_id)
+                rec: dict[str, Any] | None = None
+                if pos is not None and f is not None:
+                    f.seek(pos)
+                    line = codec.loads(f.readline())
+                    rec = line if isinstance(line, dict) and str(line.get("id")) == rec_id else None
+                if rec_id in patches:
+                    rec = _apply(dict(rec or {"id": rec_id}), patches[rec_id])
+                if rec is not None:
+                    out[rec_id] = rec
+        return out
+
+    def _write_snapshot(self, records: Iterable[dict[str, Any]]) -> None:
+        write_records(records, self.path)
+
+    def clear_journal(self) -> None:
+        """Μετά από πλήρες γράψιμο του snapshot τα patches έχουν ήδη ενσωματωθεί."""
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+    def replace_all(self, records: Iterable[dict[str, Any]]) -> None:
+        self._write_snapshot(records)
+        self.clear_journal()
+
+    def upsert(
+        self,
+        records: Iterable[dict[str, Any]],
+        actor: str | None = None,
+        previous: Previous | None = None,
+    ) -> None:
+        ts = datetime.now().isoformat(timespec="seconds")
+        who = actor or _default_actor()
+        lines: list[bytes] = []
+        for r in records:
+            if not r.get("id"):
+                continue
+            fields, unset = _diff((previous or {}).get(str(r["id"])), r)
+            if not fields and not unset:
+                continue  # τίποτα δεν άλλαξε
+            entry: dict[str, Any] = {"id": r["id"], "fields": fields, "ts": ts, "actor": who}
+            if unset:
+                entry["unset"] = unset
+            lines.append(codec.dumps(entry))
+        if not lines:
+            return
+        with open(self.journal_path, "a+b") as f:
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":  # κλείνουμε τυχόν μισογραμμένη γραμμή
+                    lines.insert(0, b"")
+            f.write(b"\n".join(lines) + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        if self.needs_compaction():
+            self.compact()
+
+    def needs_compaction(self) -> bool:
+        try:
+            size = os.path.getsize(self.journal_path)
+        except OSError:
+            return False
+        if size >= JOURNAL_MAX_BYTES:
+            return True
+        try:
+            age = time.time() - os.path.getmtime(self.path)
+        except OSError:
+            return True  # journal χωρίς snapshot
+        return age >= JOURNAL_MAX_AGE_S
+
+    def compact(self) -> None:
+        # σε ροή: το νέο snapshot γράφεται σε .tmp όσο διαβάζεται το παλιό
+        self.replace_all(self.iter_all())
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    id TEXT PRIMARY KEY,
+    pos INTEGER NOT NULL,
+    source TEXT,
+    status TEXT,
+    needs_action INTEGER NOT NULL DEFAULT 0,
+    invoice_number TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_records_pos ON records(pos);
+CREATE INDEX IF NOT EXISTS ix_records_source ON records(source);
+CREATE INDEX IF NOT EXISTS ix_records_status ON records(status);
+CREATE INDEX IF NOT EXISTS ix_records_needs_action ON records(needs_action);
+CREATE INDEX IF NOT EXISTS ix_records_invoice_number ON records(invoice_number);
+"""
+
+
+def _row(rec: dict[str, Any], pos: int) -> tuple[Any, ...]:
+    inv_no = rec.get("invoice_number")
+    return (
+        str(rec["id"]),
+        pos,
+        rec.get("source"),
+        rec.get("status"),
+        1 if rec.get("needs_action") else 0,
+        str(inv_no) if inv_no else None,
+        codec.dumps_str(rec),
+    )
+
+
+class SqliteFeedStorage(FeedStorage):
+    """
+    SQLite (WAL) backend: μία γραμμή ανά εγγραφή, JSON στο `data`, και indexed στήλες
+    id / source / status / needs_action / invoice_number. Ένα click = ένα UPSERT.
+    """
+
+    name = "sqlite"
+    supports_upsert = True
+    supports_lazy = True
+
+    def __init__(self, path: str) -> None:
+        self.path = str(path)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._connect() as con:
+            con.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # νέα σύνδεση ανά λειτουργία: ασφαλές με τα threads του Streamlit
+        con = sqlite3.connect(self.path, timeout=30)
+        try:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def files(self) -> list[str]:
+        return [self.path, f"{self.path}-wal"]
+
+    def exists(self) -> bool:
+        with self._connect() as con:
+            return con.execute("SELECT 1 FROM records LIMIT 1").fetchone() is not None
+
+    def load_all(self) -> list[dict[str, Any]]:
+        with self._connect() as con:
+            rows = con.execute("SELECT data FROM records ORDER BY pos").fetchall()
+        return [codec.loads(r[0]) for r in rows]
+
+    def iter_all(self) -> Iterator[dict[str, Any]]:
+        with self._connect() as con:
+            for (data,) in con.execute("SELECT data FROM records ORDER BY pos"):
+                yield codec.loads(data)
+
+    def get_many(self, ids: Iterable[str]) -> dict[str, dict[str, Any]]:
+        wanted = [str(i) for i in ids]
+        out: dict[str, dict[str, Any]] = {}
+        with self._connect() as con:
+            for n in range(0, len(wanted), 500):  # όριο παραμέτρων της SQLite
+                chunk = wanted[n : n + 500]
+                marks = ", ".join("?" * len(chunk))
+                sql = f"SELECT id, data FROM records WHERE id IN ({marks})"
+                out.update((rid, codec.loads(data)) for rid, data in con.execute(sql, chunk))
+        return out
+
+    def get(self, rec_id: str) -> dict[str, Any] | None:
+        with self._connect() as con:
+            row = con.execute("SELECT data FROM records WHERE id = ?", (rec_id,)).fetchone()
+        return codec.loads(row[0]) if row else None
+
+    def replace_all(self, records: Iterable[dict[str, Any]]) -> None:
+        with self._connect() as con:
+            con.execute("DELETE FROM records")
+            con.executemany(
+                "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (_row(r, i) for i, r in enumerate(records) if r.get("id")),
+            )
+
+    def upsert(
+        self,
+        records: Iterable[dict[str, Any]],
+        actor: str | None = None,
+        previous: Previous | None = None,
+    ) -> None:
+        """UPSERT ολόκληρης της γραμμής (το `previous` δεν χρειάζεται εδώ)."""
+        with self._connect() as con:
+            next_pos = con.execute("SELECT COALESCE(MAX(pos), -1) + 1 FROM records").fetchone()[0]
+            for rec in records:
+                if not rec.get("id"):
+                    continue
+                row = con.execute("SELECT pos FROM records WHERE id = ?", (rec["id"],)).fetchone()
+                if row is not None:
+                    pos = row[0]
+                else:
+                    pos, next_pos = next_pos, next_pos + 1
+                con.execute(
+                    "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?, ?, ?)", _row(rec, pos)
+                )
+
+
+def open_storage(backend: str, json_path: str, sqlite_path: str) -> FeedStorage:
+    if backend == "sqlite":
+        return SqliteFeedStorage(sqlite_path)
+    if backend == "json":
+        return JsonFeedStorage(json_path)
+    raise ValueError(f"Unknown storage backend: {backend!r} (expected one of {BACKENDS})")
@@ -0,0 +1,69 @@
+# data_parser/textnorm.py
+from __future__ import annotations
+
+import re
+import unicodedata
+
+__all__ = ["fold", "fold_key", "greeklish"]
+
+# συνδυαστικοί τόνοι μετά το NFD (τόνος U+0301, διαλυτικά U+0308, κ.λπ.)
+_MARKS_RE = re.compile(r"[\u0300-\u036f]")
+
+# ELOT 743 (απλοποιημένο) πάνω σε ήδη folded κείμενο: πεζά, χωρίς τόνους, σ αντί για ς
+_GREEKLISH = str.maketrans(
+    {
+        "α": "a",
+        "β": "v",
+        "γ": "g",
+        "δ": "d",
+        "ε": "e",
+        "ζ": "z",
+        "η": "i",
+        "θ": "th",
+        "ι": "i",
+        "κ": "k",
+        "λ": "l",
+        "μ": "m",
+        "ν": "n",
+        "ξ": "x",
+        "ο": "o",
+        "π": "p",
+        "ρ": "r",
+        "σ": "s",
+        "τ": "t",
+        "υ": "y",
+        "φ": "f",
+        "χ": "ch",
+        "ψ": "ps",
+        "ω": "o",
+    }
+)
+_DIGRAPHS = (("ου", "ou"), ("αυ", "av"), ("ευ", "ev"), ("μπ", "b"), ("ντ", "d"), ("γκ", "gk"))
+
+
+def fold(s: str | None) -> str:
+    """
+    Κλειδί σύγκρισης κειμένου: χωρίς τόνους/διαλυτικά, casefold (άρα και ς -> σ).
+    "Τιμολόγιο", "ΤΙΜΟΛΟΓΙΟ", "τιμολογιο" -> "τιμολογιο".
+    """
+    if not s:
+        return ""
+    s = str(s)
+    if s.isascii():
+        return s.lower()
+    return _MARKS_RE.sub("", unicodedata.normalize("NFD", s)).casefold()
+
+
+def fold_key(s: str | None) -> str:
+    """fold + μόνο αλφαριθμητικά + κεφαλαία (κλειδιά τύπου αριθμού τιμολογίου)."""
+    return "".join(ch for ch in fold(s) if ch.isalnum()).upper()
+
+
+def greeklish(s: str | None) -> str:
+    """Μεταγραφή (folded) ελληνικού κειμένου σε greeklish· το λατινικό μένει ως έχει."""
+    out = fold(s)
+    if out.isascii():
+        return out
+    for gr, lat in _DIGRAPHS:
+        out = out.replace(gr, lat)
+    return out.translate(_GREEKLISH)
@@ -2,12 +2,12 @@
 from __future__ import annotations
 
 import argparse
-import json
 import logging
 import os
-import re
+import shutil
 import sys
-import uuid
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import ExitStack, suppress
 from datetime import datetime
 from typing import Any
 
@@ -22,17 +22,42 @@ except Exception:
     pass
 
 # Local imports
-from data_parser.parse_emails import parse_all_emails
-from data_parser.parse_forms import parse_all_forms
-from data_parser.parse_invoices import parse_all_invoices
+from data_parser.blobs import BLOBS_DIR_NAME, BlobStore
+from data_parser.fts import FTS_NAME, HAS_FTS5, FtsIndex
+from data_parser.jsonl import FORMATS, RecordSpill, RecordWriter, output_path, write_records
+from data_parser.manifest import MANIFEST_NAME, ParseManifest
+from data_parser.matching import NGRAM_INDEX_NAME, InvoiceNgramIndex
+from data_parser.merge import iter_merge
+from data_parser.parallel import EXECUTORS
+from data_parser.parse_emails import iter_all_emails
+from data_parser.parse_forms import iter_all_forms
+from data_parser.parse_invoices import iter_all_invoices
+from data_parser.pipeline import (  # noqa: F401  (re-exports: BC για imports από main)
+    ALLOWED_STATUS,
+    INV_RE,
+    InvoiceIndex,
+    build_feed,
+    enrich_emails,
+    extract_inv_no,
+    force_status,
+    iter_enrich_emails,
+    iter_feed,
+    iter_offloaded,
+    make_id,
+    normalize_common,
+    now_iso,
+    offload_payloads,
+)
+from data_parser.storage import BACKENDS, JsonFeedStorage, SqliteFeedStorage
 
 # ----------------- Defaults (keep BC for tests/README) -----------------
 FORMS_FOLDER_DEF = "dummy_data/forms"
 EMAILS_FOLDER_DEF = "dummy_data/emails"
 INVOICES_FOLDER_DEF = "dummy_data/invoices"
 OUT_DIR_DEF = "outputs"
-
-ALLOWED_STATUS: list[str] = ["pending", "approved", "rejected", "edited"]
+STORAGE_DEF = os.getenv("ATHENAGEN_STORAGE", "json")
+FTS_DEF = os.getenv("ATHENAGEN_SEARCH", "index") == "fts"
+FORMAT_DEF = os.getenv("ATHENAGEN_FORMAT", "json")
 
 # ----------------- Logging -----------------
 LOGGER = logging.getLogger("athenagen")
@@ -66,14 +91,6 @@ def setup_logger(out_dir: str, verbose: bool = False) -> None:
 
 
 # ----------------- Helpers -----------------
-def now_iso() -> str:
-    return datetime.now().isoformat(timespec="seconds")
-
-
-def make_id(prefix: str) -> str:
-    return f"{prefix}_{uuid.uuid4().hex[:12]}"
-
-
 def ensure_dirs(out_dir: str) -> str:
     backup_dir = os.path.join(out_dir, "_backups")
     os.makedirs(out_dir, exist_ok=True)
@@ -87,65 +104,75 @@ def backup_existing(path: str, backup_dir: str, enable_backup: bool = True) -> N
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
     dst = os.path.join(backup_dir, f"{os.path.basename(path)}.{ts}.bak")
     try:
-        with open(path, encoding="utf-8") as fsrc, open(dst, "w", encoding="utf-8") as fdst:
-            fdst.write(fsrc.read())
+        with open(path, "rb") as fsrc, open(dst, "wb") as fdst:
+            shutil.copyfileobj(fsrc, fdst)  # σε κομμάτια: και τα μεγάλα .jsonl χωρίς RAM
         LOGGER.info(f"[Backup] {dst}")
     except Exception as exc:
         LOGGER.warning(f"Backup failed for {path}: {exc}")
 
 
-def safe_dump(obj: Any, path: str, backup_dir: str, enable_backup: bool = True) -> None:
-    backup_existing(path, backup_dir, enable_backup)
-    with open(path, "w", encoding="utf-8") as fh_out:
-        json.dump(obj, fh_out, indent=2, ensure_ascii=False)
-    LOGGER.info(f"[Wrote] {path}")
+def load_existing(path: str) -> list[dict[str, Any]]:
+    """Το υπάρχον feed + edit journal (για merge με τις αποφάσεις του reviewer) ή κενή λίστα."""
+    return list(iter_existing(path))
 
 
-INV_RE: re.Pattern[str] = re.compile(
-    r"(?:invoice|τιμολ(?:όγιο|\.?)|αρ\.?\s*τιμολ(?:ογίου)?)\s*(?:no\.?|#|nr\.?|:)?\s*([A-Z]{0,4}[-/]?\d[\w\-\/]+)",
-    re.IGNORECASE,
-)
+def iter_existing(path: str) -> Iterator[dict[str, Any]]:
+    """Όπως το load_existing, σε ροή· σε σφάλμα ανάγνωσης η ροή σταματά με warning."""
+    try:
+        yield from JsonFeedStorage(path).iter_all()
+    except Exception as exc:
+        LOGGER.warning(f"Could not read existing feed {path}: {exc}")
 
 
-def extract_inv_no(txt: str | None) -> str | None:
-    if not txt:
-        return None
-    m = INV_RE.search(txt)
-    return m.group(1).strip() if m else None
+def safe_dump(
+    obj: Iterable[dict[str, Any]], path: str, backup_dir: str, enable_backup: bool = True
+) -> None:
+    """.json -> pretty-printed array· .jsonl -> streaming, μία εγγραφή ανά γραμμή."""
+    backup_existing(path, backup_dir, enable_backup)
+    n = write_records(obj, path)
+    LOGGER.info(f"[Wrote] {path} ({n} records)")
 
 
-def _force_status(status: Any) -> str:
-    return status if isinstance(status, str) and status in ALLOWED_STATUS else "pending"
+# ----------------- Core -----------------
+def _log_stage(stage: str, seconds: float) -> None:
+    LOGGER.debug(f"[timing] {stage}: {seconds * 1000:.1f} ms")
+
+
+def _guarded(recs: Iterable[dict[str, Any]], stage: str) -> Iterator[dict[str, Any]]:
+    """Σφάλμα parser μέσα στη ροή: log και τέλος της ροής (ό,τι πέρασε ήδη μένει)."""
+    try:
+        yield from recs
+    except Exception as exc:
+        LOGGER.error(f"{stage}: {exc}")
 
 
-def normalize_common(rec: dict[str, Any], source: str) -> dict[str, Any]:
+def _tee(
+    recs: Iterable[dict[str, Any]],
+    counts: dict[str, int],
+    key: str,
+    writer: RecordWriter | None = None,
+    counted: Callable[[dict[str, Any]], bool] | None = None,
+) -> Iterator[dict[str, Any]]:
     """
-    Ενοποιεί κοινά πεδία και ΕΓΓΥΑΤΑΙ ότι θα υπάρχει έγκυρο:
-      - source
-      - status
-      - id (όχι κενό/None)
-      - created_at
-      - schema_version
-      - needs_action
+    Περνά τη ροή ως έχει: γράφει κάθε εγγραφή στο `writer` και μετρά στο counts[key] όσες
+    περνούν το `counted` (όλες αν λείπει).
     """
-    r: dict[str, Any] = dict(rec)
-    r["source"] = source
-    r["status"] = _force_status(r.get("status"))
-    if not r.get("id"):
-        r["id"] = make_id(source)
-    r.setdefault("created_at", now_iso())
-    r.setdefault("schema_version", "1.0")
-    r.setdefault("needs_action", False)
-    return r
+    for rec in recs:
+        counts[key] += counted is None or counted(rec)
+        if writer is not None:
+            writer.write(rec)
+        yield rec
 
 
-def _norm_inv_local(s: str | None) -> str:
-    if not s:
-        return ""
-    return "".join(ch for ch in str(s).upper() if ch.isalnum())
+def _hardened(recs: Iterable[dict[str, Any]]) -> Iterator[dict[str, Any]]:
+    """EXTRA SAFETY: id/status σε κάθε εγγραφή (αν ποτέ κάτι γλιστρήσει)."""
+    for r in recs:
+        if not r.get("id"):
+            r["id"] = make_id(r.get("source", "rec"))
+        r["status"] = force_status(r.get("status"))
+        yield r
 
 
-# ----------------- Core -----------------
 def run_pipeline(
     forms_dir: str,
     emails_dir: str,
@@ -153,129 +180,173 @@ def run_pipeline(
     out_dir: str,
     enable_backup: bool = True,
     dry_run: bool = False,
+    workers: int | None = 1,
+    executor: str = "process",
+    incremental: bool = True,
+    storage: str = "json",
+    fts: bool = False,
+    fuzzy: int | None = None,
+    signals: bool = False,
+    fmt: str = "json",
+    blobs: bool = True,
 ) -> dict[str, Any]:
     """
     Run parsers, enrich emails, normalize and write outputs.
+    `workers`/`executor` control per-file parsing fan-out (see data_parser.parallel).
+    With `incremental`, unchanged input files are served from the parse manifest
+    next to combined_feed.json instead of being re-parsed.
+    With storage="sqlite" the merged feed is also written to combined_feed.sqlite,
+    which then is the source of reviewer decisions for the merge.
+    With `fts`, the SQLite FTS5 search index next to the feed is synced incrementally.
+    Enrichment and normalization are shared with the app (data_parser.pipeline).
+    With `fuzzy` (a score cutoff), invoice numbers without an exact match are matched
+    in one batched rapidfuzz pass. With `signals`, emails are matched by invoice number,
+    PDF filename, amount, sender domain and date (data_parser.email_match); matched_via
+    holds the signal breakdown and fuzzy_score the combined score.
+    With fmt="jsonl", parsed_* and combined_feed are written as .jsonl (one record per line,
+    streamed to disk) and the existing feed is read back from combined_feed.jsonl.
+    With `blobs`, email body_html and invoice source HTML go to the content-addressed
+    store in <out_dir>/blobs and records keep only body_html_ref / source_html_ref.
+    Forms and emails stream through parse -> enrich -> combine -> merge one record at a time;
+    only the invoices (the enrichment join side) and the existing feed's merge map are held
+    in memory, and the created_at sort runs on a temp-file spill (data_parser.jsonl).
     Returns a summary dict with counts and totals.
     """
     backup_dir = ensure_dirs(out_dir)
 
-    parsed_forms_path = os.path.join(out_dir, "parsed_forms.json")
-    parsed_emails_path = os.path.join(out_dir, "parsed_emails.json")
-    parsed_emails_enr = os.path.join(out_dir, "parsed_emails_enriched.json")
-    parsed_invoices_path = os.path.join(out_dir, "parsed_invoices.json")
-    combined_path = os.path.join(out_dir, "combined_feed.json")
-
-    # 1) Parse safely
-    try:
-        forms = parse_all_forms(forms_dir)
-    except Exception as exc:
-        LOGGER.error(f"parse_all_forms: {exc}")
-        forms = []
-
-    try:
-        emails = parse_all_emails(emails_dir)
-    except Exception as exc:
-        LOGGER.error(f"parse_all_emails: {exc}")
-        emails = []
-
-    try:
-        invoices = parse_all_invoices(invoices_dir)
-    except Exception as exc:
-        LOGGER.error(f"parse_all_invoices: {exc}")
-        invoices = []
-
-    if not dry_run:
-        safe_dump(forms, parsed_forms_path, backup_dir, enable_backup)
-        safe_dump(emails, parsed_emails_path, backup_dir, enable_backup)
-        safe_dump(invoices, parsed_invoices_path, backup_dir, enable_backup)
-    else:
-        LOGGER.info("[Dry-run] Skipped writing parsed_* files")
-
-    # 2) Index invoices by number (raw + normalized)
-    inv_by_no_raw: dict[str, dict[str, Any]] = {
-        (str(r.get("invoice_number")).strip()): r for r in invoices if r.get("invoice_number")
-    }
-    inv_by_no_norm: dict[str, dict[str, Any]] = {
-        _norm_inv_local(r.get("invoice_number")): r for r in invoices if r.get("invoice_number")
-    }
-    # raw keys override normalized keys for readability (same όπως στο app.py)
-    inv_by_no: dict[str, dict[str, Any]] = {**inv_by_no_norm, **inv_by_no_raw}
-
-    # 3) Enrich emails (match από subject ΚΑΙ body)
-    enriched_emails: list[dict[str, Any]] = []
-    for e in emails:
-        inv_no = extract_inv_no(e.get("subject", "")) or extract_inv_no(e.get("body", ""))
-        linked = None
-        if inv_no:
-            linked = inv_by_no.get(inv_no) or inv_by_no.get(_norm_inv_local(inv_no))
-
-        enriched: dict[str, Any] = {
-            **e,
-            "invoice_number_in_subject": inv_no,
-            "matched_invoice_html": bool(linked),
-            "matched_invoice_file": linked.get("source_file") if linked else None,
-            "matched_invoice_total": linked.get("total") if linked else None,
-        }
-
-        # needs_action λογική για invoice-like emails
-        needs = enriched.get("email_type") == "invoice" and (
-            enriched.get("missing_attachment")
-            or not enriched.get("has_pdf_attachments")
-            or not enriched.get("matched_invoice_html")
-        )
-        enriched["needs_action"] = bool(needs)
-
-        enriched_emails.append(enriched)
-
-    if not dry_run:
-        safe_dump(enriched_emails, parsed_emails_enr, backup_dir, enable_backup)
-    else:
-        LOGGER.info("[Dry-run] Skipped writing parsed_emails_enriched.json")
-
-    # 4) Normalize & combine
-    out: list[dict[str, Any]] = (
-        [normalize_common(r, "form") for r in forms]
-        + [normalize_common(r, "email") for r in enriched_emails]
-        + [normalize_common(r, "invoice_html") for r in invoices]
-    )
-
-    # EXTRA SAFETY: δεύτερο πέρασμα για id/status (αν ποτέ κάτι γλιστρήσει)
-    for r in out:
-        if not r.get("id"):
-            r["id"] = make_id(r.get("source", "rec"))
-        r["status"] = _force_status(r.get("status"))
-
-    # σταθερή ταξινόμηση
-    from contextlib import suppress
-
-    with suppress(Exception):
-        out.sort(key=lambda x: x.get("created_at", ""), reverse=True)
-
-    if not dry_run:
-        safe_dump(out, combined_path, backup_dir, enable_backup)
-    else:
-        LOGGER.info("[Dry-run] Skipped writing combined_feed.json")
+    parsed_forms_path = output_path(out_dir, "parsed_forms", fmt)
+    parsed_emails_path = output_path(out_dir, "parsed_emails", fmt)
+    parsed_emails_enr = output_path(out_dir, "parsed_emails_enriched", fmt)
+    parsed_invoices_path = output_path(out_dir, "parsed_invoices", fmt)
+    combined_path = output_path(out_dir, "combined_feed", fmt)
+    sqlite_path = os.path.join(out_dir, "combined_feed.sqlite")
+    store: SqliteFeedStorage | None = None
+    if storage == "sqlite" and (not dry_run or os.path.exists(sqlite_path)):
+        store = SqliteFeedStorage(sqlite_path)
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    manifest = ParseManifest.load(manifest_path) if incremental else ParseManifest(manifest_path)
+    blob_store = BlobStore(os.path.join(out_dir, BLOBS_DIR_NAME)) if blobs and not dry_run else None
+    counts = dict.fromkeys(("forms", "emails", "invoices", "matched", "combined"), 0)
+    writers: list[RecordWriter] = []
+
+    with RecordSpill(key=lambda r: r.get("created_at", "")) as spill:
+        with ExitStack() as stack:
+
+            def sink(path: str) -> RecordWriter | None:
+                """Writer του parsed_* αρχείου (backup πρώτα)· None σε dry-run."""
+                if dry_run:
+                    return None
+                backup_existing(path, backup_dir, enable_backup)
+                writers.append(stack.enter_context(RecordWriter(path)))
+                return writers[-1]
+
+            # 1) Parse σε ροή. Μόνο τα τιμολόγια μένουν στη μνήμη: είναι η πλευρά του join
+            # (InvoiceIndex) για το enrichment των emails.
+            invoices_it: Iterable[dict[str, Any]] = _guarded(
+                iter_all_invoices(invoices_dir, workers, executor, manifest), "parse_all_invoices"
+            )
+            if blob_store is not None:
+                invoices_it = iter_offloaded(invoices_it, blob_store, invoices_dir)
+            invoices = list(_tee(invoices_it, counts, "invoices", sink(parsed_invoices_path)))
+
+            forms = _tee(
+                _guarded(iter_all_forms(forms_dir, workers, executor, manifest), "parse_all_forms"),
+                counts,
+                "forms",
+                sink(parsed_forms_path),
+            )
+            emails: Iterable[dict[str, Any]] = _guarded(
+                iter_all_emails(emails_dir, workers, executor, manifest), "parse_all_emails"
+            )
+            if blob_store is not None:
+                emails = iter_offloaded(emails, blob_store)
+            emails = _tee(emails, counts, "emails", sink(parsed_emails_path))
+            if dry_run:
+                LOGGER.info("[Dry-run] Skipped writing parsed_* files")
+
+            # 2) Enrich emails: ένα invoice index, exact -> fuzzy/signals (data_parser.pipeline)
+            # Το n-gram index του fuzzy μένει δίπλα στο manifest: μόνο τα νέα τιμολόγια περνούν από add
+            ngrams_path = os.path.join(out_dir, NGRAM_INDEX_NAME)
+            ngrams = None
+            if fuzzy is not None:
+                ngrams = InvoiceNgramIndex.load(ngrams_path) if incremental else InvoiceNgramIndex()
+            enriched = _tee(
+                iter_enrich_emails(
+                    emails,
+                    InvoiceIndex(invoices, ngrams),
+                    fuzzy=fuzzy,
+                    signals=signals,
+                    on_stage=_log_stage,
+                ),
+                counts,
+                "matched",
+                sink(parsed_emails_enr),
+                counted=lambda e: bool(e.get("matched_invoice_html")),
+            )
+            if dry_run:
+                LOGGER.info("[Dry-run] Skipped writing parsed_emails_enriched.json")
+
+            # 3) Normalize & combine (σταθερά ids από source + source_file) και keyed merge:
+            # κρατάμε status/notes/edits του reviewer αντί για overwrite. Στη μνήμη μένει μόνο
+            # το join map του υπάρχοντος feed· η ταξινόμηση γίνεται στο spill (offsets +
+            # created_at), όχι σε λίστα εγγραφών.
+            has_db = store is not None and store.exists()
+            existing = store.iter_all() if has_db and store else iter_existing(combined_path)
+            spill.extend(_hardened(iter_merge(existing, iter_feed(forms, enriched, invoices))))
+
+        for w in writers:
+            LOGGER.info(f"[Wrote] {w.path} ({w.count} records)")
+
+        # σταθερή ταξινόμηση
+        with suppress(Exception):
+            spill.sort(reverse=True)
+
+        if not dry_run:
+            try:
+                manifest.save()
+            except Exception as exc:
+                LOGGER.warning(f"Manifest save failed for {manifest_path}: {exc}")
+            if ngrams is not None:
+                try:
+                    ngrams.save(ngrams_path)
+                except Exception as exc:
+                    LOGGER.warning(f"N-gram index save failed for {ngrams_path}: {exc}")
+
+            safe_dump(spill, combined_path, backup_dir, enable_backup)
+            # το journal έχει ήδη ενσωματωθεί μέσω iter_merge στο νέο snapshot
+            JsonFeedStorage(combined_path).clear_journal()
+            if store is not None:
+                store.replace_all(spill)
+                LOGGER.info(f"[Wrote] {sqlite_path}")
+            if fts and HAS_FTS5:
+                written, removed = FtsIndex(os.path.join(out_dir, FTS_NAME)).sync(spill)
+                LOGGER.info(f"[FTS] {written} indexed, {removed} removed")
+            elif fts:
+                LOGGER.warning("SQLite build without FTS5: skipped the full-text index")
+        else:
+            LOGGER.info(f"[Dry-run] Skipped writing {os.path.basename(combined_path)}")
+        counts["combined"] = len(spill)
 
     # Summary
     try:
         inv_total = round(sum(float(r.get("total") or 0) for r in invoices), 2)
     except Exception:
         inv_total = 0.0
-    matched_cnt = sum(1 for e in enriched_emails if e.get("matched_invoice_html"))
+    matched_cnt = counts["matched"]
 
     LOGGER.info(f"Outputs in '{out_dir}'")
     LOGGER.info(
-        f"Forms: {len(forms)} | Emails: {len(emails)} | Invoices: {len(invoices)} | Combined: {len(out)}"
+        f"Forms: {counts['forms']} | Emails: {counts['emails']} | Invoices: {counts['invoices']}"
+        f" | Combined: {counts['combined']}"
     )
     LOGGER.info(f"Invoice TOTAL: €{inv_total} | Matched email↔invoice: {matched_cnt}")
     LOGGER.info("Tip: streamlit run app.py")
 
     return {
-        "forms": len(forms),
-        "emails": len(emails),
-        "invoices": len(invoices),
-        "combined": len(out),
+        "forms": counts["forms"],
+        "emails": counts["emails"],
+        "invoices": counts["invoices"],
+        "combined": counts["combined"],
         "invoice_total": inv_total,
         "matched_email_invoice": matched_cnt,
         "out_dir": out_dir,
@@ -295,6 +366,60 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
         "--no-backup", action="store_true", help="Disable backups before writing JSON files"
     )
     p.add_argument("--dry-run", action="store_true", help="Run without writing any files")
+    p.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Parallel workers for per-file parsing (0 = all CPU cores, default: 1)",
+    )
+    p.add_argument(
+        "--executor",
+        choices=EXECUTORS,
+        default="process",
+        help="Fan-out mode when --workers > 1 (default: process)",
+    )
+    p.add_argument(
+        "--storage",
+        choices=BACKENDS,
+        default=STORAGE_DEF,
+        help="Also write the feed to combined_feed.sqlite when sqlite (default: json)",
+    )
+    p.add_argument(
+        "--full-rebuild",
+        action="store_true",
+        help="Ignore the parse manifest and re-parse every input file",
+    )
+    p.add_argument(
+        "--fts",
+        action="store_true",
+        default=FTS_DEF,
+        help=f"Also sync the SQLite FTS5 search index ({FTS_NAME})",
+    )
+    p.add_argument(
+        "--fuzzy",
+        nargs="?",
+        type=int,
+        const=88,
+        default=None,
+        metavar="CUTOFF",
+        help="Fuzzy-match invoice numbers without an exact match (score cutoff, default: 88)",
+    )
+    p.add_argument(
+        "--signals",
+        action="store_true",
+        help="Match emails to invoices also by PDF filename, amount, sender domain and date",
+    )
+    p.add_argument(
+        "--format",
+        choices=FORMATS,
+        default=FORMAT_DEF,
+        help="Output format: pretty JSON arrays or streamed JSON Lines (default: json)",
+    )
+    p.add_argument(
+        "--inline-bodies",
+        action="store_true",
+        help=f"Keep body_html inline instead of the compressed blob store ({BLOBS_DIR_NAME}/)",
+    )
     p.add_argument("-v", "--verbose", action="store_true", help="Verbose console logging")
     return p.parse_args(argv)
 
@@ -311,6 +436,15 @@ def main(argv: list[str] | None = None) -> int:
             out_dir=args.out,
             enable_backup=not args.no_backup,
             dry_run=args.dry_run,
+            workers=args.workers,
+            executor=args.executor,
+            incremental=not args.full_rebuild,
+            storage=args.storage,
+            fts=args.fts,
+            fuzzy=args.fuzzy,
+            signals=args.signals,
+            fmt=args.format,
+            blobs=not args.inline_bodies,
         )
         return 0
     except Exception:
@@ -0,0 +1,66 @@
+# scripts/bench_codec.py
+"""
+Benchmark throughput του data_parser.codec (orjson/msgspec αν υπάρχουν) απέναντι στο stdlib
+json, σε μεγάλο συνθετικό feed: dumps/loads σε pretty (.json) και compact (.jsonl) μορφή.
+
+    python scripts/bench_codec.py --records 100000
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_records import make_lines  # noqa: E402
+
+from data_parser import codec  # noqa: E402
+
+
+def _best(fn: Callable[[], Any], repeat: int) -> tuple[Any, float]:
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return out, best
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Benchmark JSON codec throughput")
+    ap.add_argument("--records", type=int, default=100_000, help="Συνθετικές εγγραφές")
+    ap.add_argument("--repeat", type=int, default=3, help="Επαναλήψεις (κρατάμε την καλύτερη)")
+    args = ap.parse_args()
+
+    feed = [json.loads(s) for s in make_lines(args.records)]
+    print(f"records: {len(feed)}   backend: {codec.BACKEND}\n")
+    print(f"{'mode':<10}{'op':<8}{'MB':>9}{'stdlib MB/s':>14}{'codec MB/s':>13}{'x':>7}")
+
+    for mode, pretty, kw in (
+        ("pretty", True, {"indent": 2}),
+        ("compact", False, {"separators": (",", ":")}),
+    ):
+        raw, t_std = _best(lambda: json.dumps(feed, ensure_ascii=False, **kw).encode(), args.repeat)
+        out, t_fast = _best(lambda: codec.dumps(feed, pretty=pretty), args.repeat)
+        assert out == raw, "codec output differs from stdlib"
+        mb = len(raw) / 1024 / 1024
+        print(
+            f"{mode:<10}{'dumps':<8}{mb:>9.1f}{mb / t_std:>14.0f}{mb / t_fast:>13.0f}"
+            f"{t_std / t_fast:>7.1f}"
+        )
+
+        _, t_std = _best(lambda: json.loads(raw), args.repeat)
+        _, t_fast = _best(lambda: codec.loads(raw), args.repeat)
+        print(
+            f"{mode:<10}{'loads':<8}{mb:>9.1f}{mb / t_std:>14.0f}{mb / t_fast:>13.0f}"
+            f"{t_std / t_fast:>7.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
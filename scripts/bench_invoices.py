@@ -0,0 +1,80 @@
+# scripts/bench_invoices.py
+"""
+Benchmark parsing τιμολογίων: bs4 path (_parse_invoice_soup) vs lxml engine
+(data_parser.invoice_lxml) χωρίς και με layout plans, στα dummy τιμολόγια, σε μεγαλύτερα
+συνθετικά (περισσότερες γραμμές) και σε layout χωρίς div.summary (σύνοψη από το κείμενο).
+Ελέγχει και ότι όλοι οι δρόμοι δίνουν την ίδια εγγραφή.
+
+    python scripts/bench_invoices.py --repeat 50 --rows 200
+"""
+
+import argparse
+import re
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from data_parser.invoice_lxml import HAS_LXML, PLANS, parse_invoice_tree  # noqa: E402
+from data_parser.parse_invoices import parse_invoice_html  # noqa: E402
+
+ROW = re.compile(r"<tr>\s*<td>.*?</tr>", re.S)
+
+
+def load_docs() -> list[str]:
+    return [
+        p.read_text(encoding="utf-8") for p in sorted((ROOT / "dummy_data/invoices").glob("*.html"))
+    ]
+
+
+def widen(html: str, rows: int) -> str:
+    """Ίδιο τιμολόγιο με `rows` γραμμές ειδών (επανάληψη των υπαρχουσών)."""
+    found = ROW.findall(html.split("invoice-table", 1)[-1].split("</table>", 1)[0])
+    if not found:
+        return html
+    body = "\n".join(found[i % len(found)] for i in range(rows))
+    return html.replace("".join(found[-1:]), body, 1)
+
+
+def _time(fn: Callable[[str], Any], docs: list[str], repeat: int) -> tuple[float, list[Any]]:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        out = [fn(d) for d in docs]
+    return (time.perf_counter() - t0) / (repeat * len(docs)) * 1000, out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Benchmark invoice parsing engines")
+    ap.add_argument("--repeat", type=int, default=50, help="Επαναλήψεις ανά σετ")
+    ap.add_argument("--rows", type=int, default=200, help="Γραμμές ειδών στο συνθετικό σετ")
+    args = ap.parse_args()
+    if not HAS_LXML:
+        sys.exit("lxml is not installed")
+
+    docs = load_docs()
+    wide = [widen(d, args.rows) for d in docs]
+    sets = [
+        ("dummy", docs),
+        (f"{args.rows} rows", wide),
+        ("by text", [d.replace('class="summary"', 'class="totals"') for d in docs]),
+        (f"by text {args.rows}", [d.replace('class="summary"', 'class="totals"') for d in wide]),
+    ]
+    print(f"{'set':<16}{'docs':>6}{'bs4 ms':>10}{'lxml ms':>10}{'+plans ms':>11}{'x':>7}")
+    for name, batch in sets:
+        t_bs4, ref = _time(lambda h: parse_invoice_html(h, "bs4"), batch, args.repeat)
+        t_lxml, got = _time(lambda h: parse_invoice_tree(h, None), batch, args.repeat)
+        t_plan, planned = _time(lambda h: parse_invoice_tree(h, PLANS), batch, args.repeat)
+        assert got == ref and planned == ref, f"engines disagree on {name}"
+        print(
+            f"{name:<16}{len(batch):>6}{t_bs4:>10.2f}{t_lxml:>10.2f}{t_plan:>11.2f}"
+            f"{t_bs4 / t_plan:>7.1f}"
+        )
+    print(f"\nlayout plans: {PLANS.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# scripts/bench_partial.py
+"""
+Benchmark partial parsing σε μεγάλες «πραγματικές» σελίδες: τα dummy τιμολόγια και οι φόρμες
+μέσα σε site chrome (πολλά <script>/<style>, JSON-LD, menu με εκατοντάδες links/icons, footer).
+Τιμολόγια: bs4 πλήρες vs engine "partial" (SoupStrainer) vs "auto" (lxml).
+Φόρμες: bs4 πλήρες vs restrict (μόνο στοιχεία με name) vs "auto" (events, χωρίς tree).
+
+    python scripts/bench_partial.py --repeat 20 --scripts 40 --links 400
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from bench_invoices import load_docs  # noqa: E402
+
+from data_parser.parse_forms import parse_form  # noqa: E402
+from data_parser.parse_invoices import parse_invoice_html  # noqa: E402
+
+HEAD = re.compile(r"<head>(.*?)</head>", re.S)
+BODY = re.compile(r"<body>(.*?)</body>", re.S)
+ICON = '<svg viewBox="0 0 24 24" class="icon"><path d="M3 12h18M12 3v18"/></svg>'
+
+
+def _script(i: int) -> str:
+    fns = "\n".join(
+        f"  function f{i}_{k}(a, b) {{ return a < b ? '<div>' + a + '</div>' : b; }}"
+        for k in range(40)
+    )
+    return f"<script>\n(function () {{\n{fns}\n}})();\n</script>"
+
+
+def page(html: str, scripts: int, links: int) -> str:
+    """Το έγγραφο μέσα σε σελίδα site: ίδιο περιεχόμενο, πολλαπλάσιο markup γύρω του."""
+    head = HEAD.search(html)
+    body = BODY.search(html)
+    ld = json.dumps({"@type": "WebPage", "items": [{"id": i, "n": f"p{i}"} for i in range(300)]})
+    css = "\n".join(f".c{i} {{ margin: {i % 9}px; color: #{i % 4096:03x}; }}" for i in range(300))
+    menu = "".join(
+        f'<li class="menu-item"><a class="menu-link" href="/c/{i}">{ICON}'
+        f"<span>Κατηγορία {i}</span></a></li>"
+        for i in range(links)
+    )
+    foot = "".join(f'<a class="foot-link" href="/p/{i}">Σελίδα {i}</a>' for i in range(links // 2))
+    return (
+        "<!DOCTYPE html>\n<html>\n<head>"
+        + (head.group(1) if head else "")
+        + "".join(f'<link rel="stylesheet" href="/s{i}.css">' for i in range(20))
+        + f"<style>{css}</style>"
+        + "".join(_script(i) for i in range(scripts // 2))
+        + f'<script type="application/ld+json">{ld}</script>'
+        + f'</head>\n<body>\n<nav class="site-nav"><ul>{menu}</ul></nav>\n'
+        + f'<main class="page"><div class="content">{body.group(1) if body else html}</div></main>\n'
+        + f'<footer class="site-footer">{foot}</footer>'
+        + "".join(_script(i) for i in range(scripts // 2, scripts))
+        + "\n</body>\n</html>"
+    )
+
+
+def _time(fn: Callable[[str], Any], docs: list[str], repeat: int) -> tuple[float, list[Any]]:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        out = [fn(d) for d in docs]
+    return (time.perf_counter() - t0) / (repeat * len(docs)) * 1000, out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Benchmark partial HTML parsing")
+    ap.add_argument("--repeat", type=int, default=20, help="Επαναλήψεις ανά σετ")
+    ap.add_argument("--scripts", type=int, default=40, help="<script> blocks ανά σελίδα")
+    ap.add_argument("--links", type=int, default=400, help="Links στο menu της σελίδας")
+    args = ap.parse_args()
+
+    invoices = [page(d, args.scripts, args.links) for d in load_docs()]
+    forms = [
+        page(p.read_text(encoding="utf-8"), args.scripts, args.links)
+        for p in sorted((ROOT / "dummy_data/forms").glob("*.html"))
+    ]
+    kb = sum(len(d) for d in invoices) / len(invoices) / 1024
+    print(f"σελίδες: {len(invoices)} τιμολόγια, {len(forms)} φόρμες, ~{kb:.0f} KB η καθεμία\n")
+    print(f"{'path':<24}{'ms/doc':>10}{'x':>7}")
+
+    t_full, ref = _time(lambda h: parse_invoice_html(h, "bs4"), invoices, args.repeat)
+    print(f"{'invoices bs4 (full)':<24}{t_full:>10.2f}{1:>7.1f}")
+    for engine in ("partial", "auto"):
+        t, got = _time(lambda h: parse_invoice_html(h, engine), invoices, args.repeat)
+        assert got == ref, f"{engine} disagrees with the full parse"
+        print(f"{'invoices ' + engine:<24}{t:>10.2f}{t_full / t:>7.1f}")
+
+    t_full, ref = _time(lambda h: parse_form(h, "bs4", restrict=False), forms, args.repeat)
+    print(f"{'forms bs4 (full)':<24}{t_full:>10.2f}{1:>7.1f}")
+    for label, fn in [
+        ("forms bs4 restrict", lambda h: parse_form(h, "bs4")),
+        ("forms auto (events)", parse_form),
+    ]:
+        t, got = _time(fn, forms, args.repeat)
+        assert got == ref, f"{label} disagrees with the full parse"
+        print(f"{label:<24}{t:>10.2f}{t_full / t:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# scripts/bench_records.py
+"""
+Benchmark μνήμης: εγγραφές ως dicts vs typed __slots__ εγγραφές (data_parser.records),
+για πλήρεις εγγραφές και για τα summaries της λίστας της app, + JSON round-trip.
+
+    python scripts/bench_records.py --records 100000
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from data_parser.record_store import summarize  # noqa: E402
+from data_parser.records import dumps_record, loads_record, record_from_dict  # noqa: E402
+
+STATUSES = ["pending", "approved", "rejected", "edited"]
+NAMES = ["Γιώργος Παπαδόπουλος", "Μαρία Κωνσταντίνου", "Νίκος Οικονόμου", "Eleni Markou"]
+COMPANIES = ["TechCorp AE", "Acme Ltd", "Ορίζων ΟΕ", "DataSoft IKE"]
+
+
+def make_lines(n: int, seed: int = 7) -> list[str]:
+    """JSONL γραμμές (όπως στο δίσκο), ώστε κάθε εγγραφή να έχει δικά της strings."""
+    rnd = random.Random(seed)
+    lines: list[str] = []
+    for i in range(n):
+        src = ("form", "email", "invoice_html")[i % 3]
+        rec: dict[str, Any] = {
+            "id": f"{src}_{i:012x}",
+            "source": src,
+            "status": rnd.choice(STATUSES),
+            "created_at": "2025-01-15T10:00:00",
+            "schema_version": "1.0",
+            "content_hash": f"{rnd.getrandbits(256):064x}",
+            "needs_action": bool(i % 5 == 0),
+            "source_file": f"{src}_{i}.html",
+        }
+        if src == "form":
+            rec.update(
+                full_name=rnd.choice(NAMES),
+                email=f"user{i}@example.gr",
+                phone="210 1234567",
+                company=rnd.choice(COMPANIES),
+                service="CRM",
+                message="Θα ήθελα προσφορά για CRM σύστημα.",
+                submission_date="2025-01-15",
+                priority="high",
+            )
+        elif src == "email":
+            rec.update(
+                full_name=rnd.choice(NAMES),
+                email=f"user{i}@example.gr",
+                company=rnd.choice(COMPANIES),
+                email_type="invoice",
+                has_pdf_attachments=True,
+                attachment_names=[f"INV-{i:05d}.pdf"],
+                missing_attachment=False,
+                subject=f"Τιμολόγιο INV-{i:05d}",
+                date="Mon, 20 Jan 2025 10:00:00 +0200",
+                body="Σας αποστέλλουμε το τιμολόγιο. Σύνολο: 1.240,00 €",
+                body_preview="Σας αποστέλλουμε το τιμολόγιο.",
+                invoice_number_in_subject=f"INV-{i:05d}",
+                matched_invoice_html=True,
+                matched_invoice_file=f"invoice_{i}.html",
+                matched_invoice_total=1240.0,
+                matched_via="exact",
+                fuzzy_score=100,
+            )
+        else:
+            rec.update(
+                invoice_number=f"INV-{i:05d}",
+                date="2025-01-20",
+                payment_method="Τραπεζική μεταφορά",
+                subtotal=1000.0,
+                vat_amount=240.0,
+                vat_rate=24.0,
+                total=1240.0,
+                currency="EUR",
+                seller_name=rnd.choice(COMPANIES),
+                buyer_name=rnd.choice(COMPANIES),
+                items=[
+                    {
+                        "description": f"Υπηρεσία {k}",
+                        "quantity": 1.0,
+                        "unit_price": 250.0,
+                        "line_total": 250.0,
+                        "currency": "EUR",
+                    }
+                    for k in range(4)
+                ],
+            )
+        lines.append(json.dumps(rec, ensure_ascii=False))
+    return lines
+
+
+def _measure(build) -> tuple[Any, float, float]:
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    out = build()
+    ms = (time.perf_counter() - t0) * 1000
+    mb = tracemalloc.get_traced_memory()[0] / 1024 / 1024
+    tracemalloc.stop()
+    return out, mb, ms
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Benchmark dict vs typed record memory")
+    ap.add_argument("--records", type=int, default=100_000, help="Συνθετικές εγγραφές")
+    args = ap.parse_args()
+
+    lines = make_lines(args.records)
+    print(f"records: {len(lines)}\n")
+    print(f"{'representation':<22}{'MB':>10}{'build ms':>12}")
+    results: dict[str, Any] = {}
+    for name, build in [
+        ("dict (full)", lambda: [json.loads(s) for s in lines]),
+        ("typed (full)", lambda: [loads_record(s) for s in lines]),
+        ("dict (summary)", lambda: [summarize(json.loads(s)) for s in lines]),
+        ("typed (summary)", lambda: [record_from_dict(summarize(json.loads(s))) for s in lines]),
+    ]:
+        out, mb, ms = _measure(build)
+        results[name] = out
+        print(f"{name:<22}{mb:>10.1f}{ms:>12.0f}")
+        del out
+
+    typed = results["typed (full)"]
+    t0 = time.perf_counter()
+    dumped = [dumps_record(r) for r in typed]
+    ms = (time.perf_counter() - t0) * 1000
+    assert [json.loads(s) for s in dumped[:100]] == [json.loads(s) for s in lines[:100]]
+    print(f"\ntyped -> JSON lines: {ms:,.0f} ms (round-trip ίδιο με το dict)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# scripts/bench_search.py
+"""
+Benchmark αναζήτησης σε συνθετικό feed:
+- legacy: το παλιό match_query του app.py (lowercase haystack + substring ανά εγγραφή)
+- index: data_parser.search_index.SearchIndex (in-memory token/trigram index)
+- fts: data_parser.fts.FtsIndex (SQLite FTS5, BM25)
+
+    python scripts/bench_search.py --records 100000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from data_parser.fts import HAS_FTS5, FtsIndex  # noqa: E402
+from data_parser.search_index import SearchIndex  # noqa: E402
+
+WORDS = [
+    "τιμολόγιο",
+    "προσφορά",
+    "πληρωμή",
+    "σύστημα",
+    "Αθήνα",
+    "Θεσσαλονίκη",
+    "παράδοση",
+    "συνάντηση",
+    "invoice",
+    "order",
+    "crm",
+    "erp",
+    "support",
+    "license",
+    "consulting",
+    "website",
+]
+NAMES = ["Γιώργος Παπαδόπουλος", "Μαρία Κωνσταντίνου", "Νίκος Οικονόμου", "Eleni Markou"]
+COMPANIES = ["TechCorp AE", "Acme Ltd", "Ορίζων ΟΕ", "DataSoft IKE"]
+QUERIES = ["inv-04217", "acme", "τιμολογιο", "Θεσσαλονίκη", "crm συστημα", "παπαδ"]
+
+
+def make_feed(n: int, seed: int = 7) -> list[dict[str, Any]]:
+    rnd = random.Random(seed)
+    recs: list[dict[str, Any]] = []
+    for i in range(n):
+        src = ("form", "email", "invoice_html")[i % 3]
+        rec: dict[str, Any] = {
+            "id": f"{src}_{i:06d}",
+            "source": src,
+            "status": "pending",
+            "full_name": rnd.choice(NAMES),
+            "company": rnd.choice(COMPANIES),
+            "email": f"user{i}@example{i % 50}.gr",
+        }
+        if src == "email":
+            rec["subject"] = f"{rnd.choice(WORDS)} INV-{i:05d}"
+            rec["body"] = " ".join(rnd.choices(WORDS, k=60))
+        elif src == "invoice_html":
+            rec["invoice_number"] = f"INV-{i:05d}"
+            rec["seller_name"] = rnd.choice(COMPANIES)
+            rec["buyer_name"] = rnd.choice(COMPANIES)
+            rec["extra_notes"] = " ".join(rnd.choices(WORDS, k=12))
+        else:
+            rec["service"] = rnd.choice(WORDS)
+        recs.append(rec)
+    return recs
+
+
+def legacy_match_query(rec: dict[str, Any], q: str) -> bool:
+    """Αντίγραφο του match_query πριν το SearchIndex (baseline)."""
+    if not q:
+        return True
+    hay = " ".join(
+        [
+            str(rec.get("subject", "")),
+            str(rec.get("full_name", "")),
+            str(rec.get("email", "")),
+            str(rec.get("company", "")),
+            str(rec.get("invoice_number", "")),
+            str(rec.get("service", "")),
+        ]
+    ).lower()
+    return q.lower() in hay
+
+
+def _timed(fn, repeat: int = 1) -> tuple[Any, float]:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        out = fn()
+    return out, (time.perf_counter() - t0) / repeat * 1000
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Benchmark sidebar search backends")
+    ap.add_argument("--records", type=int, default=100_000, help="Συνθετικές εγγραφές")
+    ap.add_argument("--repeat", type=int, default=5, help="Επαναλήψεις ανά query")
+    args = ap.parse_args()
+
+    recs = make_feed(args.records)
+    print(f"records: {len(recs)}")
+
+    index, ms = _timed(lambda: SearchIndex(recs))
+    print(f"index build: {ms:,.0f} ms")
+    fts = None
+    tmp = tempfile.mkdtemp()
+    if HAS_FTS5:
+        fts = FtsIndex(os.path.join(tmp, "bench.fts.sqlite"))
+        _, ms = _timed(lambda: fts.sync(recs))
+        print(f"fts build:   {ms:,.0f} ms")
+    else:
+        print("fts: SQLite χωρίς FTS5, παραλείπεται")
+
+    print(
+        f"\n{'query':<16}{'legacy ms':>12}{'index ms':>12}{'fts ms':>12}  hits (legacy/index/fts)"
+    )
+    for q in QUERIES:
+        legacy, ms_legacy = _timed(
+            lambda q=q: [r for r in recs if legacy_match_query(r, q)], args.repeat
+        )
+        hits, ms_index = _timed(lambda q=q: index.search(q), args.repeat)
+        fts_hits: list[str] = []
+        ms_fts = float("nan")
+        if fts is not None:
+            fts_hits, ms_fts = _timed(lambda q=q: fts.search(q), args.repeat)
+        print(
+            f"{q:<16}{ms_legacy:>12.2f}{ms_index:>12.2f}{ms_fts:>12.2f}"
+            f"  {len(legacy)}/{len(hits or ())}/{len(fts_hits)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# scripts/bench_stream.py
+"""
+Benchmark γραμμών ειδών σε πολύ μεγάλα τιμολόγια: parse_invoice_html (ολόκληρο το tree) vs
+iter_invoice_items (lxml iterparse, κάθε <tr> αδειάζει μόλις διαβαστεί). Κάθε μέτρηση τρέχει σε
+νέο process ώστε η αιχμή RSS (μαζί με τη μνήμη της libxml2, που δεν τη βλέπει το tracemalloc)
+να αφορά μόνο αυτήν. Δείχνει και τη μετατροπή ποσών ανά στήλη (_amounts) vs _to_float ανά τιμή.
+
+    python scripts/bench_stream.py --rows 1000 10000 50000
+"""
+
+import argparse
+import hashlib
+import multiprocessing as mp
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from bench_invoices import load_docs, widen  # noqa: E402
+
+from data_parser.invoice_stream import HAS_LXML, iter_invoice_items  # noqa: E402
+from data_parser.parse_invoices import _amounts, _to_float, parse_invoice_html  # noqa: E402
+
+
+def _full(path: str) -> list[dict[str, Any]]:
+    items: list[dict[str, Any]] = parse_invoice_html(Path(path).read_text(encoding="utf-8"))[
+        "items"
+    ]
+    return items
+
+
+def _stream(path: str) -> list[dict[str, Any]]:
+    return list(iter_invoice_items(path))
+
+
+def _measure(name: str, path: str, out: Any) -> None:
+    fn = _full if name == "full" else _stream
+    _amounts(["0"] * 2048)  # import του pyarrow εκτός μέτρησης
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    items = fn(path)
+    ms = (time.perf_counter() - t0) * 1000
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - base  # KB (Linux)
+    digest = hashlib.sha1(repr(items).encode()).hexdigest()
+    out.put((ms, peak / 1024, len(items), digest))
+
+
+def _run(ctx: Any, name: str, path: str) -> tuple[float, float, int, str]:
+    q = ctx.Queue()
+    p = ctx.Process(target=_measure, args=(name, path, q))
+    p.start()
+    res: tuple[float, float, int, str] = q.get()
+    p.join()
+    return res
+
+
+def _amount_columns(rows: int) -> None:
+    tokens = [f"{i % 97},{i % 100:02d} €" if i % 3 else f"{i:,}.50 $" for i in range(rows)]
+    t0 = time.perf_counter()
+    scalar = [_to_float(t) for t in tokens]
+    t1 = time.perf_counter()
+    batch = _amounts(tokens)
+    t2 = time.perf_counter()
+    assert batch == scalar, "batch amounts disagree with _to_float"
+    print(f"{'amounts ' + str(rows):<22}{(t1 - t0) * 1000:>12.2f}{(t2 - t1) * 1000:>12.2f}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Benchmark streaming invoice rows")
+    ap.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 50000])
+    args = ap.parse_args()
+    if not HAS_LXML:
+        sys.exit("lxml is not installed")
+
+    ctx = mp.get_context("spawn")
+    doc = load_docs()[0]
+    print(f"{'rows':<10}{'full ms':>10}{'full MB':>10}{'stream ms':>11}{'stream MB':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = Path(tmp) / f"invoice_{rows}.html"
+            path.write_text(widen(doc, rows), encoding="utf-8")
+            ms_f, mb_f, n_f, h_f = _run(ctx, "full", str(path))
+            ms_s, mb_s, n_s, h_s = _run(ctx, "stream", str(path))
+            assert (n_f, h_f) == (n_s, h_s), f"stream disagrees with the full parse ({rows})"
+            print(f"{rows:<10}{ms_f:>10.1f}{mb_f:>10.1f}{ms_s:>11.1f}{mb_s:>11.1f}")
+
+    print(f"\n{'column':<22}{'scalar ms':>12}{'batch ms':>12}")
+    _amounts(["0"] * 2048)
+    for rows in args.rows:
+        _amount_columns(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@
 import argparse
 import json
 import os
+from collections.abc import Iterable
 from typing import Any
 
 import gspread
@@ -135,7 +136,7 @@ def _as_float(v):
         return ""
 
 
-def index_invoices(records: list[dict[str, Any]]):
+def index_invoices(records: Iterable[dict[str, Any]]):
     return {
         r.get("invoice_number"): r
         for r in records
@@ -143,7 +144,7 @@ def index_invoices(records: list[dict[str, Any]]):
     }
 
 
-def build_template_df(records: list[dict[str, Any]], template_cols: list[str]) -> pd.DataFrame:
+def build_template_df(records: Iterable[dict[str, Any]], template_cols: list[str]) -> pd.DataFrame:
     header_map = build_template_mapping(template_cols)
     inv_idx = index_invoices(records)
 
@@ -269,11 +270,19 @@ def build_template_df(records: list[dict[str, Any]], template_cols: list[str]) -
 
 
 # ---------- Core ----------
-def load_records(path: str) -> list[dict[str, Any]]:
+def load_records(path: str) -> Iterable[dict[str, Any]]:
+    """Επιστρέφει το storage (re-iterable): κάθε πέρασμα διαβάζει τις εγγραφές σε ροή."""
     if not os.path.exists(path):
         raise SystemExit(f"❌ Δεν βρέθηκε input: {path}")
-    with open(path, encoding="utf-8") as f:
-        return json.load(f)
+    if path.endswith((".sqlite", ".db")):
+        # απευθείας από το SQLite backend (χωρίς ενδιάμεσο combined_feed.json)
+        from data_parser.storage import SqliteFeedStorage
+
+        return SqliteFeedStorage(path)
+    # combined_feed.json / .jsonl (streaming) + τυχόν edits του app που δεν έχουν γίνει ακόμη compaction
+    from data_parser.storage import JsonFeedStorage
+
+    return JsonFeedStorage(path)
 
 
 def ensure_worksheet(client: gspread.Client, sheet_id: str, worksheet: str):
@@ -297,7 +306,11 @@ def main():
     ap = argparse.ArgumentParser(description="Upload export to Google Sheets via Service Account")
     ap.add_argument("--sheet-id", required=True, help="Google Spreadsheet ID (από το URL)")
     ap.add_argument("--worksheet", default="Export", help="Worksheet/tab name (default: Export)")
-    ap.add_argument("--input", default=DEFAULT_INPUT, help=f"Input JSON (default: {DEFAULT_INPUT})")
+    ap.add_argument(
+        "--input",
+        default=DEFAULT_INPUT,
+        help=f"Input .json / .jsonl ή .sqlite (default: {DEFAULT_INPUT})",
+    )
     ap.add_argument(
         "--template",
         default=DEFAULT_TEMPLATE,
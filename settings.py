@@ -12,8 +12,29 @@ EMAILS_DIR = DUMMY_DIR / "emails"
 INVOICES_DIR = DUMMY_DIR / "invoices"
 TEMPLATE_PATH = DUMMY_DIR / "templates" / "data_extraction_template.csv"
 
-COMBINED_PATH = OUTPUTS_DIR / "combined_feed.json"
+# "json" (pretty array) ή "jsonl" (μία εγγραφή ανά γραμμή): ίδιο με το main.py --format
+FEED_FORMAT = os.getenv("ATHENAGEN_FORMAT", "json")
+COMBINED_PATH = OUTPUTS_DIR / f"combined_feed.{FEED_FORMAT}"
+SQLITE_PATH = OUTPUTS_DIR / "combined_feed.sqlite"
 LOG_PATH = OUTPUTS_DIR / "log.txt"
+# content-addressed, συμπιεσμένα body_html / HTML τιμολογίων (main.py χωρίς --inline-bodies)
+BLOBS_DIR = OUTPUTS_DIR / "blobs"
+
+# "json" (combined_feed.json) ή "sqlite" (combined_feed.sqlite, per-record writes)
+STORAGE_BACKEND = os.getenv("ATHENAGEN_STORAGE", "json")
+
+# Αναζήτηση: "1" -> τα ελληνικά πεδία ψάχνονται και σε greeklish (π.χ. "timologio")
+SEARCH_GREEKLISH = os.getenv("ATHENAGEN_SEARCH_GREEKLISH", "0") == "1"
+
+# "1": με backend που φορτώνει ανά id (sqlite, .jsonl) η app κρατά μόνο summaries των εγγραφών
+# και φέρνει την πλήρη εγγραφή όταν επιλεγεί
+SUMMARY_LIST = os.getenv("ATHENAGEN_SUMMARY_LIST", "1") == "1"
+# "1": τα summaries κρατιούνται ως __slots__ εγγραφές (data_parser.records) αντί για dicts
+TYPED_RECORDS = os.getenv("ATHENAGEN_TYPED_RECORDS", "1") == "1"
+
+# "index" (in-memory SearchIndex) ή "fts" (SQLite FTS5 με BM25, combined_feed.fts.sqlite)
+SEARCH_BACKEND = os.getenv("ATHENAGEN_SEARCH", "index")
+FTS_PATH = OUTPUTS_DIR / "combined_feed.fts.sqlite"
 
 GSHEET_ID_DEFAULT = os.getenv(
     "GSHEETS_SPREADSHEET_ID", "1B649fKVMBW_LP6C9Up46JFBnGH8Sex8NhXJ6rsMQMLI"
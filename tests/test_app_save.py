@@ -0,0 +1,97 @@
+import threading
+
+import app
+from data_parser.pipeline import build_feed, enrich_emails
+from data_parser.record_store import RecordStore
+
+INVOICES = [{"invoice_number": "TF-2024-001", "total": 1054.0, "source_file": "inv1.html"}]
+
+
+def test_save_invoice_relinks_emails(monkeypatch):
+    emails = [
+        {
+            "email_type": "invoice",
+            "has_pdf_attachments": True,
+            "subject": "Τιμολόγιο #TF-2024-001",
+            "source_file": "e.eml",
+        }
+    ]
+    store = RecordStore(build_feed([], enrich_emails(emails, INVOICES), INVOICES))
+    saved: list[dict] = []
+    before: dict = {}
+
+    def save_record(_data, *recs, previous=None):
+        saved.extend(recs)
+        before.update(previous)
+
+    monkeypatch.setattr(app, "save_record", save_record)
+
+    # items editor: αλλάζει μόνο το total (ίδιος αριθμός)
+    inv = dict(store.full(1), total=1200.0, status="edited")
+    app.save_invoice(store, 1, inv, inv["invoice_number"])
+
+    assert store[1] is inv and store[0]["matched_invoice_total"] == 1200.0
+    assert [r["source_file"] for r in saved] == ["inv1.html", "e.eml"]
+    # οι εγγραφές πριν το edit, για journal μόνο των πεδίων που άλλαξαν
+    assert [
+        r["matched_invoice_total" if r["source"] == "email" else "total"] for r in before.values()
+    ] == [1054.0, 1054.0]
+
+
+class _Storage:
+    name, supports_upsert = "stub", True
+
+    def __init__(self):
+        self.rows: list[dict] = []
+        self.previous: dict = {}
+
+    def files(self):
+        return []
+
+    def version(self):
+        return len(self.rows)
+
+    def upsert(self, recs, previous=None):
+        self.rows.extend(recs)
+        self.previous.update(previous or {})
+
+
+def test_save_record_applies_session_copy_under_lock(monkeypatch):
+    store = RecordStore(build_feed([], [], INVOICES))
+    storage = _Storage()
+    monkeypatch.setattr(app, "get_storage", lambda: storage)
+    monkeypatch.setattr(app, "get_fts", lambda: None)
+    monkeypatch.setattr(app, "log_action", lambda *a, **k: None)
+
+    rec = dict(store.full(0))
+    rec["status"] = "approved"
+    assert store[0]["status"] != "approved"  # το αντίγραφο της session δεν φαίνεται αλλού
+
+    lock = app._feed_cache().lock
+    seen: list[bool] = []
+    orig = RecordStore.__setitem__
+
+    def setitem(self, i, value):
+        # το RLock δεν δίνεται σε άλλο thread όσο το κρατά ο writer
+        t = threading.Thread(target=lambda: seen.append(lock.acquire(blocking=False)))
+        t.start()
+        t.join()
+        orig(self, i, value)
+
+    monkeypatch.setattr(RecordStore, "__setitem__", setitem)
+    app.save_record(store, rec)
+
+    assert seen == [False]
+    assert store[0]["status"] == "approved" and [
+        r["id"] for r in store.select(statuses=["approved"])
+    ] == [rec["id"]]
+    assert [r["id"] for r in storage.rows] == [rec["id"]]
+    assert storage.previous[rec["id"]]["status"] == "pending"  # για journal μόνο της διαφοράς
+
+
+def test_storage_backend_is_cached_per_settings(tmp_path):
+    a = app._open_storage("sqlite", str(tmp_path / "feed.json"), str(tmp_path / "feed.sqlite"))
+    b = app._open_storage("sqlite", str(tmp_path / "feed.json"), str(tmp_path / "feed.sqlite"))
+    assert a is b and a.name == "sqlite"
+    assert app._open_storage("json", str(tmp_path / "feed.json"), "") is not a
+    assert app.get_storage() is app.get_storage()
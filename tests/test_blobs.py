@@ -0,0 +1,38 @@
+from data_parser.blobs import BlobStore, externalize, load_field
+from data_parser.pipeline import offload_payloads
+
+
+def test_put_is_content_addressed_and_deduplicated(tmp_path):
+    store = BlobStore(tmp_path / "blobs")
+    html = "<p>Τιμολόγιο TF-2024-001</p>" * 200
+    ref = store.put(html)
+    assert store.put(html) == ref and ref["size"] == len(html.encode("utf-8"))
+    assert len(list((tmp_path / "blobs").iterdir())) == 1
+    assert store.get(ref) == html and store.get(ref["sha256"]) == html
+    assert store.get({"sha256": "0" * 64}) is None and store.get(None) is None
+
+    src = tmp_path / "inv.html"
+    src.write_text(html, encoding="utf-8")
+    assert store.put_file(src) == ref
+
+
+def test_externalize_and_offload(tmp_path):
+    store = BlobStore(tmp_path / "blobs")
+    email = {"id": "e1", "body": "γεια", "body_html": "<b>γεια</b>"}
+    out = externalize(email, store)
+    assert "body_html" not in out and out["body"] == "γεια"
+    assert load_field(out, "body_html", store) == "<b>γεια</b>"
+    assert load_field(email, "body_html", None) == "<b>γεια</b>"  # παλιά inline feeds
+
+    (tmp_path / "inv").mkdir()
+    (tmp_path / "inv" / "a.html").write_text("<html>A</html>", encoding="utf-8")
+    emails, invoices = offload_payloads(
+        [email, dict(email, id="e2")],
+        [{"source_file": "a.html"}, {"source_file": "missing.html"}],
+        store,
+        str(tmp_path / "inv"),
+    )
+    assert emails[0]["body_html_ref"] == emails[1]["body_html_ref"]
+    assert load_field(invoices[0], "source_html", store) == "<html>A</html>"
+    assert "source_html_ref" not in invoices[1]
+    assert not list((tmp_path / "blobs").glob("*.tmp"))
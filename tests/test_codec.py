@@ -0,0 +1,47 @@
+import io
+import json
+
+import pytest
+
+from data_parser import codec
+
+FEED = [
+    {
+        "id": "invoice_html_1",
+        "source": "invoice_html",
+        "seller_name": 'Ορίζων ΟΕ   <b>&</b> "quoted" \\ \x00',
+        "total": 1240.0,
+        "vat_rate": 0.24,
+        "needs_action": False,
+        "notes": None,
+        "items": [{"description": "Υπηρεσία", "quantity": 1, "line_total": 250.5}],
+        "edited_fields": [],
+        "ext": {},
+    }
+]
+
+
+@pytest.mark.parametrize("backend", sorted({codec.BACKEND, "json"}))
+def test_pretty_and_compact_match_stdlib_bytes(monkeypatch, backend):
+    monkeypatch.setattr(codec, "BACKEND", backend)
+    pretty = json.dumps(FEED, indent=2, ensure_ascii=False).encode("utf-8")
+    compact = json.dumps(FEED, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    assert codec.dumps(FEED, pretty=True) == pretty
+    assert codec.dumps(FEED) == compact
+    assert codec.loads(compact) == codec.loads(compact.decode("utf-8")) == FEED
+
+
+def test_fallbacks_for_what_the_fast_backend_refuses():
+    # μη-string κλειδιά και ακέραιοι > 64 bit -> stdlib, ίδια μορφή
+    odd = {1: 2**70}
+    assert codec.dumps(odd) == json.dumps(odd, separators=(",", ":")).encode()
+    assert codec.loads("[NaN]")[0] != codec.loads("[NaN]")[0]  # NaN από παλιό stdlib dump
+    with pytest.raises(json.JSONDecodeError):
+        codec.loads(b'{"id": ')
+
+
+def test_dump_load_and_default():
+    buf = io.BytesIO()
+    codec.dump({"s": {3, 1, 2}}, buf, default=sorted)
+    assert codec.load(io.BytesIO(buf.getvalue())) == {"s": [1, 2, 3]}
+    assert codec.dumps_str({"a": "ά"}) == '{"a":"ά"}'
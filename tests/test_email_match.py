@@ -0,0 +1,106 @@
+from data_parser.email_match import InvoiceMatcher, email_amounts, matched_via
+
+INVOICES = [
+    {
+        "source": "invoice_html",
+        "invoice_number": "TF-2024-001",
+        "total": 1054.0,
+        "date": "2024-01-21",
+        "seller_email": "info@techflow-solutions.gr",
+    },
+    {
+        "source": "invoice_html",
+        "invoice_number": "TF-2024-002",
+        "total": 2976.0,
+        "date": "2024-01-22",
+        "seller_email": "info@techflow-solutions.gr",
+    },
+]
+
+
+def test_email_amounts_prefers_totals():
+    body = "Καθαρή Αξία: €850.00 - Συνολικό Ποσό: €1,054.00"
+    assert email_amounts(body) == {105400}
+    assert email_amounts("Κόστος 1.984,00 € και €20") == {198400, 2000}
+    assert email_amounts(None) == set()
+    assert email_amounts("Subtotal: 100,00 € - Total: 124,00 €") == {12400}
+    assert email_amounts("Υποσύνολο 1.984 €") == {198400}
+    assert email_amounts("Πληρωτέο: 1.984") == email_amounts("Total 1,984") == {198400}
+
+
+def test_matches_without_invoice_number():
+    email = {
+        "email": "accounting@techflow-solutions.gr",
+        "date": "Mon, 22 Jan 2024 11:20:00 +0200",
+        "body": "Συνολικό Ποσό: €2,976.00",
+        "attachment_names": [],
+    }
+    rec, score, points = InvoiceMatcher(INVOICES).match(email, None)
+    assert rec is INVOICES[1]
+    assert points == {"amount": 30, "domain": 15, "date": 15}
+    assert score == 60
+    assert matched_via(points) == "amount+domain+date"
+
+
+def test_filename_and_number_signals():
+    matcher = InvoiceMatcher(INVOICES)
+    email = {"attachment_names": ["invoice_TF-2024-001.pdf"], "date": "", "body": ""}
+    rec, score, points = matcher.match(email, None)
+    assert rec is INVOICES[0] and points == {"filename": 50} and score == 50
+    rec, _, points = matcher.match({"email": "x@other.gr"}, "TF-2024-001")
+    assert rec is INVOICES[0] and matched_via(points) == "exact"
+
+
+def test_weak_signals_do_not_match():
+    email = {"email": "info@techflow-solutions.gr", "date": "Sun, 21 Jan 2024 09:00:00 +0200"}
+    assert InvoiceMatcher(INVOICES).match(email, None)[0] is None
+
+
+def test_exact_number_wins_over_other_signals():
+    invoices = [
+        {"invoice_number": "INV-1001", "total": 500.0},
+        {
+            "invoice_number": "INV-1002",
+            "total": 124.0,
+            "date": "2024-03-01",
+            "seller_email": "billing@acme.gr",
+        },
+    ]
+    email = {
+        "email": "x@acme.gr",
+        "date": "2024-03-01",
+        "subject": "INV-1001",
+        "body": "Total: 124,00 €",
+        "attachment_names": [],
+    }
+    matcher = InvoiceMatcher(invoices)
+    rec, score, points = matcher.match(email, "INV-1001")
+    assert rec is invoices[0] and points == {"number": 50} and score == 50
+    # χωρίς αριθμό στο θέμα, το όνομα του PDF κερδίζει το ποσό
+    email = {**email, "attachment_names": ["INV-1001.pdf"]}
+    assert matcher.match(email, None)[0] is invoices[0]
+
+
+def test_substring_number_is_fuzzy_not_exact():
+    invoices = [
+        {"invoice_number": "TF-2024-0011", "total": 500.0},
+        {
+            "invoice_number": "TF-2024-0012",
+            "total": 1054.0,
+            "date": "2024-01-21",
+            "seller_email": "info@techflow-solutions.gr",
+        },
+    ]
+    email = {
+        "email": "info@techflow-solutions.gr",
+        "date": "2024-01-21",
+        "body": "Συνολικό Ποσό: €1,054.00",
+        "attachment_names": [],
+    }
+    matcher = InvoiceMatcher(invoices, fuzzy_cutoff=80)
+    # partial_ratio = 100 (substring), αλλά όχι ίδιο κλειδί: δεν κλειδώνει το τιμολόγιο
+    assert matcher._number_hit("TF-2024-001") == (0, 100, False)
+    rec, score, points = matcher.match(email, "TF-2024-001")
+    assert rec is invoices[1] and matched_via(points) == "amount+domain+date"
+    rec, _, points = matcher.match({"email": "x@other.gr"}, "TF-2024-001")
+    assert rec is invoices[0] and matched_via(points) == "fuzzy"
@@ -0,0 +1,48 @@
+import pytest
+
+from data_parser import parse_forms
+from data_parser.parse_forms import parse_form
+
+from .utils import ROOT
+
+FORMS = sorted((ROOT / "dummy_data" / "forms").glob("*.html"))
+
+TRICKY = (
+    "<!DOCTYPE html><p>Intro</p>"
+    '<input name="email" value="">'  # το πρώτο στοιχείο κερδίζει, ακόμα κι άδειο
+    '<input name="email" value="second@example.gr">'
+    '<input name="name" value="  Μαρία  ">'
+    '<pre><select name="service"><option>\n \n<!--c-->Web<b>\n</b> <i> </i>Site</option></select></pre>'
+    '<select name="priority"><option value="low">Χαμηλή<option selected>  Υψηλή  </select>'
+    '<ruby>R<rt><textarea name="message">ruby text</textarea></rt></ruby>'
+    '<textarea name="company">Acme &amp; Co<script>x()</script></textarea>'
+)
+
+
+@pytest.mark.parametrize("path", FORMS, ids=lambda p: p.name)
+def test_event_collector_matches_bs4(path):
+    html = path.read_text(encoding="utf-8")
+    assert parse_form(html) == parse_form(html, "bs4", restrict=False)
+
+
+def test_event_collector_follows_bs4_string_rules():
+    expected = parse_form(TRICKY, "bs4", restrict=False)
+    assert parse_form(TRICKY) == expected == parse_form(TRICKY, "bs4")
+    assert expected["email"] is None and expected["full_name"] == "Μαρία"
+    assert expected["priority"] == "Υψηλή"
+
+
+def test_html_parser_fallback(monkeypatch):
+    monkeypatch.setattr(parse_forms, "HAS_LXML", False)
+    for path in FORMS:
+        html = path.read_text(encoding="utf-8")
+        assert parse_form(html) == parse_form(html, "bs4")
+
+
+def test_field_aliases_and_engine_check():
+    html = '<input name="fullname" value="Νίκος"><input name="tel" value="+30 210-123">'
+    aliases = {"full_name": ("full_name", "fullname"), "phone": ("phone", "tel")}
+    assert parse_form(html, aliases=aliases) == {"full_name": "Νίκος", "phone": "+30210123"}
+    assert parse_form(html)["full_name"] is None
+    with pytest.raises(ValueError):
+        parse_form(html, engine="sax")
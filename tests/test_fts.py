@@ -0,0 +1,41 @@
+import pytest
+
+from data_parser.fts import HAS_FTS5, FtsIndex, fts_query
+
+pytestmark = pytest.mark.skipif(not HAS_FTS5, reason="SQLite χωρίς FTS5")
+
+
+def _recs() -> list[dict]:
+    return [
+        {"id": "a", "subject": "Τιμολόγιο INV-1001", "body": "Καλησπέρα σας"},
+        {"id": "b", "subject": "Προσφορά", "body_html": "<p>τιμολόγιο &amp; CRM σύστημα</p>"},
+        {"id": "c", "extra_notes": "Πληρωμή εντός 30 ημερών", "seller_name": "Acme"},
+    ]
+
+
+def test_query_syntax():
+    assert fts_query('Τιμολ "CRM σύστημα"') == '"crm συστημα" "τιμολ"*'
+    assert fts_query('x"') == '"x"*'
+    assert fts_query("") == ""
+
+
+def test_ranked_phrase_and_prefix_search(tmp_path):
+    idx = FtsIndex(str(tmp_path / "fts.sqlite"))
+    assert idx.sync(_recs()) == (3, 0)
+    assert idx.sync(_recs()) == (0, 0)  # incremental: τίποτα δεν άλλαξε
+
+    assert idx.search("ΤΙΜΟΛΟΓΙΟ") == ["a", "b"]  # subject βαραίνει περισσότερο από body
+    assert idx.search("τιμολ") == ["a", "b"]
+    assert idx.search('"crm συστημα"') == ["b"]
+    assert idx.search('"συστημα crm"') == []
+    assert idx.search("πληρωμη acme") == ["c"]
+
+
+def test_upsert_and_sync_remove(tmp_path):
+    idx = FtsIndex(str(tmp_path / "fts.sqlite"))
+    recs = _recs()
+    idx.sync(recs)
+    assert idx.upsert([dict(recs[2], extra_notes="άλλο")]) == 1
+    assert idx.search("πληρωμη") == []
+    assert idx.sync(recs[:2]) == (0, 1)
+    assert idx.search("acme") == []
@@ -0,0 +1,70 @@
+import pytest
+from bs4 import BeautifulSoup
+
+from data_parser.invoice_lxml import (
+    HAS_LXML,
+    LayoutPlans,
+    layout_fingerprint,
+    parse_invoice_tree,
+)
+from data_parser.parse_invoices import _parse_invoice_soup, parse_invoice_html
+
+from .utils import ROOT
+
+pytestmark = pytest.mark.skipif(not HAS_LXML, reason="lxml not installed")
+
+INVOICES = sorted((ROOT / "dummy_data" / "invoices").glob("*.html"))
+
+
+def _bs4(html: str) -> dict:
+    return _parse_invoice_soup(BeautifulSoup(html, "lxml"))
+
+
+@pytest.mark.parametrize("path", INVOICES, ids=lambda p: p.name)
+def test_lxml_engine_matches_bs4(path):
+    html = path.read_text(encoding="utf-8")
+    assert parse_invoice_tree(html) == _bs4(html)
+
+
+def test_edge_markup_matches_bs4():
+    html = INVOICES[0].read_text(encoding="utf-8")
+    variants = [
+        html.replace('class="summary"', 'class="summary wide"'),
+        html.replace('<div class="summary">', "<div>"),  # πίνακας σύνοψης από το κείμενο
+        html.replace("<tbody>", "<tbody><!-- Subtotal --><script>var x = 'Invoice 1-1';</script>"),
+        html.replace("<strong>Σημειώσεις:</strong>", "Σημειώσεις:"),
+        "<p>Invoice No. AB-123 12/03/2024</p><table><tr><td>Net amount</td><td>5,00 $</td></tr>",
+    ]
+    for v in variants:
+        assert parse_invoice_tree(v) == _bs4(v)
+
+
+def test_unsupported_documents_fall_back_to_bs4():
+    html = INVOICES[0].read_text(encoding="utf-8")
+    truncated = html.replace('<div class="summary">', '</body></html><div class="summary">')
+    ruby = html.replace("Στυλό", "<ruby>Στυλό<rt>x</rt></ruby>")
+    for doc in (truncated, ruby, ""):
+        with pytest.raises(ValueError):
+            parse_invoice_tree(doc)
+    assert parse_invoice_html(truncated) == _bs4(truncated)
+    assert parse_invoice_html(ruby) == parse_invoice_html(ruby, engine="bs4")
+    with pytest.raises(ValueError):
+        parse_invoice_html(html, engine="regex")
+
+
+def test_layout_plans_reuse_and_content_checks():
+    html = INVOICES[0].read_text(encoding="utf-8")
+    longer = html.replace("<tbody>", "<tbody><tr><td>Extra</td><td>1</td><td>2,00 €</td></tr>", 1)
+    assert layout_fingerprint(html) == layout_fingerprint(longer)
+    assert layout_fingerprint(html) != layout_fingerprint(html.replace('"summary"', '"totals"'))
+
+    plans = LayoutPlans()
+    for doc in (html, longer, html):
+        assert parse_invoice_tree(doc, plans) == parse_invoice_tree(doc, None)
+    assert plans.stats() == {"layouts": 1, "hits": 2, "misses": 1}
+
+    # σύνοψη από το κείμενο: ξαναψάχνεται σε κάθε έγγραφο, όχι από το plan
+    by_text = html.replace('<div class="summary">', "<div>")
+    shadowed = by_text.replace("<tbody>", "<tbody><tr><td>Σύνολο</td><td>x</td></tr>", 1)
+    for doc in (by_text, shadowed):
+        assert parse_invoice_tree(doc, plans) == _bs4(doc)
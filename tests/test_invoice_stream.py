@@ -0,0 +1,55 @@
+import io
+import re
+
+import pytest
+
+from data_parser import parse_invoices
+from data_parser.invoice_stream import HAS_LXML, iter_invoice_items, iter_item_rows
+from data_parser.parse_invoices import _amounts, _to_float, parse_invoice_html
+
+from .utils import ROOT
+
+pytestmark = pytest.mark.skipif(not HAS_LXML, reason="lxml not installed")
+
+INVOICES = sorted((ROOT / "dummy_data" / "invoices").glob("*.html"))
+
+AMOUNTS = ["1.234,56 €", "€ 12,50", "$1,234.56", "12", "", "-", ".", "1.2.3", "1,2,3", "-.5"]
+AMOUNTS += ["٣,٥ €", "１２", "abc", "--1", "1-2", "0,"]
+
+
+def _wide(html: str, rows: int, tbody: bool = True) -> str:
+    """Το τιμολόγιο με `rows` γραμμές ειδών (επανάληψη των υπαρχουσών)."""
+    table = html.split("invoice-table", 1)[1].split("</table>", 1)[0]
+    found = re.findall(r"<tr>\s*<td>.*?</tr>", table, re.S)
+    out = html.replace(found[-1], "\n".join(found[i % len(found)] for i in range(rows)), 1)
+    return out if tbody else out.replace("<tbody>", "").replace("</tbody>", "")
+
+
+@pytest.mark.parametrize("path", INVOICES, ids=lambda p: p.name)
+def test_stream_matches_record_items(path):
+    html = path.read_text(encoding="utf-8")
+    assert list(iter_invoice_items(path)) == parse_invoice_html(html)["items"]
+
+
+@pytest.mark.parametrize("tbody", [True, False])
+def test_stream_large_table_in_batches(tbody):
+    html = _wide(INVOICES[0].read_text(encoding="utf-8"), 300, tbody)
+    expected = parse_invoice_html(html, "bs4")["items"]
+    assert len(expected) >= 300
+    assert list(iter_invoice_items(io.BytesIO(html.encode()), batch=7)) == expected
+    assert [r[0] for r in iter_item_rows(html.encode())] == [i["description"] for i in expected]
+
+
+def test_stream_skips_hidden_strings():
+    html = (
+        '<table class="invoice-table"><thead><tr><td>h</td><td>1</td><td>2</td><td>3</td></tr>'
+        "</thead><tbody><tr><td>A<rt>x</rt></td><td>2<template><b>9</b></template></td>"
+        "<td>1,50 £</td><td>3,00<script>7</script></td></tr></tbody></table>"
+    )
+    assert list(iter_invoice_items(html.encode())) == parse_invoice_html(html, "bs4")["items"]
+
+
+def test_batch_amounts_match_scalar(monkeypatch):
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr(parse_invoices, "BATCH_AMOUNTS", 1)
+    assert _amounts(AMOUNTS) == [_to_float(t) for t in AMOUNTS]
@@ -0,0 +1,41 @@
+import os
+import shutil
+
+from data_parser import parse_forms
+from data_parser.manifest import ParseManifest
+from data_parser.parse_forms import parse_all_forms
+
+from .utils import ROOT
+
+FORMS = ROOT / "dummy_data" / "forms"
+
+
+def test_manifest_reparses_only_changed_files(tmp_path, monkeypatch):
+    src = tmp_path / "forms"
+    shutil.copytree(FORMS, src)
+    mpath = str(tmp_path / "parse_manifest.json")
+
+    manifest = ParseManifest.load(mpath)
+    first = parse_all_forms(str(src), manifest=manifest)
+    manifest.save()
+
+    calls: list[str] = []
+    real_parse = parse_forms.parse_form
+    monkeypatch.setattr(
+        parse_forms,
+        "parse_form",
+        lambda html, *args: calls.append(html) or real_parse(html, *args),
+    )
+
+    # ένα αλλαγμένο αρχείο + ένα διαγραμμένο
+    names = sorted(os.listdir(src))
+    (src / names[0]).write_text('<input name="full_name" value="Changed">', encoding="utf-8")
+    os.remove(src / names[1])
+
+    manifest = ParseManifest.load(mpath)
+    again = parse_all_forms(str(src), manifest=manifest)
+
+    assert len(calls) == 1
+    assert again[0]["full_name"] == "Changed"
+    assert again[1:] == first[2:]
+    assert len(manifest.section("forms", parse_forms.PARSER_VERSION)._entries) == len(again)
@@ -1,4 +1,12 @@
-from data_parser.matching import build_invoice_lookup, fuzzy_find, normalize_inv
+from data_parser import codec
+from data_parser.matching import (
+    NGRAM_INDEX_VERSION,
+    InvoiceNgramIndex,
+    build_invoice_lookup,
+    fuzzy_find,
+    fuzzy_find_many,
+    normalize_inv,
+)
 
 
 def test_normalize_inv_basic():
@@ -18,3 +26,70 @@ def test_fuzzy_find_threshold():
     lookup = build_invoice_lookup(invoices)
     rec, score = fuzzy_find("INV123", lookup, score_cutoff=80)
     assert rec and score >= 80
+
+
+def test_fuzzy_find_many_matches_single_lookups():
+    invoices = [
+        {"source": "invoice_html", "invoice_number": n}
+        for n in ("INV-123", "INV-456", "TF-2024-001", "TF-2024-011")
+    ]
+    lookup = build_invoice_lookup(invoices)
+    cands = ["INV123", "inv 456", "TF2024001X", "TF-2024-01", "ZZZ", None, ""]
+    batch = fuzzy_find_many(cands, lookup, score_cutoff=80)
+    for cand, (rec, score) in zip(cands, batch, strict=True):
+        single, single_score = fuzzy_find(cand or "", lookup, score_cutoff=80)
+        assert rec is single
+        if rec is not None:
+            assert score == single_score
+
+
+def test_ngram_index_matches_brute_force_and_grows():
+    numbers = ["INV-123", "INV-456", "TF-2024-001", "TF-2024-011", "ΤΔΑ-77", "A1"]
+    lookup = build_invoice_lookup(
+        [{"source": "invoice_html", "invoice_number": n} for n in numbers]
+    )
+    index = InvoiceNgramIndex()
+    for key, rec in lookup.items():  # incremental, όπως έρχονται τα τιμολόγια
+        index.add(key, rec)
+    assert len(index) == len(lookup)
+    cands = ["INV123", "INV 45", "TF2024001X", "TF-2024-01", "τδα77", "A", "ZZZ", ""]
+    for cutoff in (60, 80, 88):
+        for cand in cands:
+            rec, score = index.find(cand, score_cutoff=cutoff)
+            single, single_score = fuzzy_find(cand, lookup, score_cutoff=cutoff)
+            assert rec is single
+            if rec is not None:
+                assert score == single_score
+    batch = fuzzy_find_many(cands, lookup, score_cutoff=80, index=index)
+    assert batch == fuzzy_find_many(cands, lookup, score_cutoff=80)
+
+
+def test_ngram_index_persists_and_syncs(tmp_path):
+    def lookup_of(numbers):
+        return build_invoice_lookup(
+            [{"source": "invoice_html", "invoice_number": n} for n in numbers]
+        )
+
+    numbers = ["INV-123", "INV-456", "TF-2024-001", "TF-2024-011"]
+    path = str(tmp_path / "ngrams.json")
+    InvoiceNgramIndex(lookup_of(numbers)).save(path)
+
+    loaded = InvoiceNgramIndex.load(path)
+    assert len(loaded) == 0 and loaded.find("INV-123") == (None, 0)  # πριν από το sync
+
+    # επόμενο run: ένα τιμολόγιο έφυγε, ένα νέο ήρθε πρώτο στη σειρά του lookup
+    lookup = lookup_of(["TF-2024-010", *numbers[1:]])
+    loaded.sync(lookup)
+    assert len(loaded) == len(lookup) and "INV123" not in loaded and "TF2024010" in loaded
+    assert len(loaded._keys) == len(numbers) + 1  # μόνο το νέο κλειδί μπήκε με add
+    cands = ["INV123", "TF2024-01", "TF-2024-0", "INV 45", "ZZZ"]
+    assert [loaded.find(c, score_cutoff=80) for c in cands] == fuzzy_find_many(
+        cands, lookup, score_cutoff=80
+    )
+    assert loaded.find_key("TF-2024-0", score_cutoff=80) == ("TF2024010", 100)
+
+    bad = tmp_path / "bad.json"
+    tampered = {"version": NGRAM_INDEX_VERSION, "q": 2, "keys": ["A1"], "postings": {"A1": [5]}}
+    for content in (b"not json", codec.dumps(tampered)):
+        bad.write_bytes(content)
+        assert len(InvoiceNgramIndex.load(str(bad))._keys) == 0
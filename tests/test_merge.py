@@ -0,0 +1,79 @@
+from data_parser.merge import iter_identity, iter_merge, mark_edited, merge_feed, stamp_identity
+
+
+def _parsed(total: float) -> list[dict]:
+    return [
+        {"invoice_number": "INV-1", "total": total, "source_file": "a.html"},
+        {"invoice_number": "INV-2", "total": 5.0, "source_file": "b.html"},
+    ]
+
+
+def test_ids_are_stable_across_rebuilds():
+    first = stamp_identity(_parsed(10.0), "invoice_html")
+    second = stamp_identity(_parsed(99.0), "invoice_html")
+    assert [r["id"] for r in first] == [r["id"] for r in second]
+    assert first[0]["content_hash"] != second[0]["content_hash"]
+    assert first[1]["content_hash"] == second[1]["content_hash"]
+
+
+def test_merge_keeps_reviewer_fields():
+    feed = stamp_identity(_parsed(10.0), "invoice_html")
+    feed[0].update({"status": "approved", "notes": "ok", "invoice_number": "INV-001"})
+    mark_edited(feed[0], ["invoice_number"])
+    feed[1].update({"status": "rejected"})
+
+    fresh_parsed = _parsed(99.0)[:1] + [{"invoice_number": "INV-3", "source_file": "c.html"}]
+    fresh = stamp_identity(fresh_parsed, "invoice_html")
+    merged = merge_feed(feed, fresh)
+
+    assert len(merged) == 2  # b.html αφαιρέθηκε, c.html νέο
+    changed = merged[0]
+    assert changed["total"] == 99.0  # νέα έξοδος parser
+    assert changed["status"] == "approved" and changed["notes"] == "ok"
+    assert changed["invoice_number"] == "INV-001"  # πεδίο που επεξεργάστηκε ο reviewer
+    assert merged[1]["source_file"] == "c.html"
+
+
+def test_merge_unchanged_source_keeps_record_as_is():
+    feed = stamp_identity(_parsed(10.0), "invoice_html")
+    feed[1]["status"] = "edited"
+    feed[1]["items"] = [{"description": "manual"}]
+    merged = merge_feed(feed, stamp_identity(_parsed(10.0), "invoice_html"))
+    assert merged[1] is feed[1]
+
+
+def test_merge_legacy_feed_with_random_ids():
+    # feed πριν τα content ids: τυχαίο id (uuid), χωρίς content_hash
+    parsed = _parsed(10.0) + [{"invoice_number": "INV-3", "source_file": "c.html"}]
+    legacy = [
+        {**rec, "id": f"invoice_html_{i:012x}", "source": "invoice_html"}
+        for i, rec in enumerate(parsed + parsed[2:])
+    ]
+    legacy[0].update({"status": "approved", "notes": "ok"})
+    legacy[1].update({"status": "edited", "items": [{"description": "manual"}], "total": 7.0})
+    legacy[2]["status"] = legacy[3]["status"] = "rejected"
+
+    fresh = [{**r, "source": "invoice_html"} for r in stamp_identity(parsed, "invoice_html")]
+    merged = merge_feed(legacy, fresh)
+
+    assert [r["id"] for r in merged] == [r["id"] for r in fresh]
+    assert merged[0]["status"] == "approved" and merged[0]["notes"] == "ok"
+    assert merged[1]["status"] == "edited" and merged[1]["total"] == 7.0
+    assert merged[1]["items"] == [{"description": "manual"}]
+    assert merged[2] is fresh[2]  # δύο legacy εγγραφές για το c.html: χωρίς join
+
+
+def test_iter_merge_streams_fresh_output():
+    feed = stamp_identity(_parsed(10.0), "invoice_html")
+    feed[0]["status"] = "approved"
+    pulled: list[str] = []
+
+    def fresh():
+        for rec in iter_identity(_parsed(10.0), "invoice_html"):
+            pulled.append(rec["source_file"])
+            yield rec
+
+    merged = iter_merge(iter(feed), fresh())
+    assert next(merged) is feed[0] and pulled == ["a.html"]  # μία εγγραφή τη φορά
+    assert list(merged) == [feed[1]]
+    assert merge_feed(feed, stamp_identity(_parsed(10.0), "invoice_html")) == feed
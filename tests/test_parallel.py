@@ -0,0 +1,26 @@
+from data_parser.parallel import parse_paths
+from data_parser.parse_emails import parse_all_emails
+from data_parser.parse_invoices import parse_all_invoices
+
+from .utils import ROOT
+
+EMAILS = str(ROOT / "dummy_data" / "emails")
+INVOICES = str(ROOT / "dummy_data" / "invoices")
+
+
+def _boom(path: str) -> dict:
+    if path.endswith("b"):
+        raise ValueError("bad file")
+    return {"path": path}
+
+
+def test_parse_paths_sorted_and_isolates_failures():
+    out = parse_paths(_boom, ["c", "b", "a"], workers=1, executor="inline")
+    assert [r["path"] for r in out] == ["a", "c"]
+
+
+def test_parallel_modes_match_inline():
+    inline = parse_all_emails(EMAILS, workers=1, executor="inline")
+    assert inline == parse_all_emails(EMAILS, workers=4, executor="thread")
+    assert inline == parse_all_emails(EMAILS, workers=2, executor="process")
+    assert parse_all_invoices(INVOICES) == parse_all_invoices(INVOICES, workers=2)
@@ -0,0 +1,61 @@
+import pytest
+
+from data_parser.parse_forms import parse_form
+from data_parser.parse_invoices import parse_invoice_html
+
+from .utils import ROOT
+
+INVOICES = sorted((ROOT / "dummy_data" / "invoices").glob("*.html"))
+FORMS = sorted((ROOT / "dummy_data" / "forms").glob("*.html"))
+
+CHROME = (
+    '<nav class="site-nav"><a class="menu-link" href="/">Αρχική</a></nav>'
+    '<script>var name = \'<input name="email" value="x">\';</script>'
+    "<style>.header { color: red; }</style>"
+)
+
+
+def _in_page(html: str) -> str:
+    return html.replace("<body>", "<body>" + CHROME, 1).replace("</body>", CHROME + "</body>", 1)
+
+
+@pytest.mark.parametrize("path", FORMS, ids=lambda p: p.name)
+def test_restricted_form_parse_matches_full(path):
+    html = _in_page(path.read_text(encoding="utf-8"))
+    assert parse_form(html, "bs4") == parse_form(html, "bs4", restrict=False)
+
+
+def test_restricted_form_parse_keeps_nested_fields():
+    html = (
+        '<form name="contact"><div><input name="email" value="a@b.gr"></div>'
+        '<select name="service"><option value="crm" selected>CRM</option></select>'
+        '<textarea name="message">Γεια</textarea></form>'
+    )
+    rec = parse_form(html, "bs4")
+    assert rec == parse_form(html, "bs4", restrict=False)
+    assert (rec["email"], rec["service"], rec["message"]) == ("a@b.gr", "crm", "Γεια")
+
+
+def test_restricted_form_parse_keeps_string_context():
+    # το κείμενο ενός πεδίου εξαρτάται από tags πάνω του (rt/template: εκτός get_text, pre: κενά)
+    html = (
+        '<pre><select name="service"><option>\n \n<!--c-->Web<b>\n</b> <i> </i>Site</option>'
+        '</select></pre><ruby>R<rt><textarea name="message">ruby text</textarea></rt></ruby>'
+        '<template><input name="company" value="Acme"></template>'
+    )
+    rec = parse_form(html, "bs4")
+    assert rec == parse_form(html, "bs4", restrict=False)
+    assert rec["message"] is None and rec["company"] == "Acme"
+
+
+@pytest.mark.parametrize("path", INVOICES, ids=lambda p: p.name)
+def test_partial_invoice_engine_matches_bs4(path):
+    html = _in_page(path.read_text(encoding="utf-8"))
+    assert parse_invoice_html(html, "partial") == parse_invoice_html(html, "bs4")
+
+
+def test_partial_invoice_engine_keeps_notes_after_summary():
+    html = INVOICES[0].read_text(encoding="utf-8")
+    moved = html.replace('<div style="margin-top: 40px', '<section><div style="margin-top: 40px')
+    rec = parse_invoice_html(moved, "partial")
+    assert rec["extra_notes"] and rec == parse_invoice_html(moved, "bs4")
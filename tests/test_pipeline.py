@@ -0,0 +1,137 @@
+from data_parser.matching import InvoiceNgramIndex
+from data_parser.pipeline import (
+    InvoiceIndex,
+    build_feed,
+    enrich_emails,
+    extract_inv_no,
+    harden_record,
+    needs_action,
+    normalize_common,
+    relink_emails,
+)
+from data_parser.record_store import RecordStore
+
+INVOICES = [{"invoice_number": "TF-2024-001", "total": 1054.0, "source_file": "inv1.html"}]
+
+
+def _email(**kw):
+    rec = {
+        "email_type": "invoice",
+        "has_pdf_attachments": True,
+        "missing_attachment": False,
+        "source_file": "e.eml",
+    }
+    rec.update(kw)
+    return rec
+
+
+def test_extract_inv_no():
+    assert extract_inv_no("Τιμολόγιο #TF-2024-001 - Office") == "TF-2024-001"
+    assert extract_inv_no("Invoice no. INV-77") == "INV-77"
+    assert extract_inv_no("Γεια σας") is None
+
+
+def test_needs_action_single_rule():
+    assert needs_action({"source": "form", "email_type": "invoice"}) is False
+    assert needs_action(_email(matched_invoice_html=True)) is False
+    assert needs_action(_email(matched_invoice_html=True, has_pdf_attachments=False)) is True
+    assert needs_action(_email(matched_invoice_html=False)) is True
+    assert needs_action(_email(email_type="client")) is False
+
+
+def test_harden_record_and_normalize_common_share_rules():
+    legacy = {"invoice_number": "INV-1", "status": "weird", "id": ""}
+    copy = normalize_common(legacy, "invoice_html")
+    assert legacy["status"] == "weird"  # αντίγραφο, όχι in-place
+    harden_record(legacy)
+    assert legacy["source"] == copy["source"] == "invoice_html"
+    assert legacy["status"] == copy["status"] == "pending"
+    assert legacy["id"].startswith("invoice_html_") and legacy["needs_action"] is False
+
+
+def test_enrich_exact_fuzzy_and_feed():
+    emails = [
+        _email(subject="Τιμολόγιο #TF-2024-001"),
+        _email(subject="Τιμολόγιο #TF2024-01", source_file="f.eml"),
+    ]
+    exact = enrich_emails(emails, INVOICES)
+    assert [e["matched_via"] for e in exact] == ["exact", "none"]
+    assert exact[0]["matched_invoice_total"] == 1054.0 and not exact[0]["needs_action"]
+    assert exact[1]["needs_action"]
+
+    stages: list[str] = []
+    fuzzy = enrich_emails(emails, INVOICES, fuzzy=80, on_stage=lambda s, _t: stages.append(s))
+    assert fuzzy[1]["matched_via"] == "fuzzy" and 80 <= fuzzy[1]["fuzzy_score"] < 100
+    assert stages == ["index", "extract", "exact", "fuzzy", "enrich"]
+
+    feed = build_feed([], fuzzy, INVOICES)
+    assert [r["source"] for r in feed] == ["email", "email", "invoice_html"]
+    assert all(r["id"] and r["status"] == "pending" for r in feed)
+
+
+def test_signals_keep_exact_number_link():
+    invoices = [
+        {"invoice_number": "INV-1001", "total": 500.0, "source_file": "a"},
+        {
+            "invoice_number": "INV-1002",
+            "total": 124.0,
+            "date": "2024-03-01",
+            "seller_email": "billing@acme.gr",
+            "source_file": "b",
+        },
+    ]
+    email = _email(
+        subject="Invoice INV-1001", body="Total: 124,00 €", email="x@acme.gr", date="2024-03-01"
+    )
+    [out] = enrich_emails([email], invoices, signals=True)
+    assert out["matched_invoice_file"] == "a" and out["matched_invoice_total"] == 500.0
+    assert out["matched_via"] == "exact"
+
+
+def test_relink_after_invoice_edit_touches_only_referencing_emails():
+    emails = [
+        _email(subject="Τιμολόγιο #TF-2024-001"),
+        _email(subject="Τιμολόγιο #TF2024-01", source_file="f.eml"),
+        _email(subject="Τιμολόγιο #ZZ-555", source_file="n.eml"),
+        _email(subject="Τιμολόγιο #XX-1", source_file="x.eml"),
+    ]
+    store = RecordStore(build_feed([], enrich_emails(emails, INVOICES, fuzzy=80), INVOICES))
+    inv_pos = 4
+    untouched = store[3]
+
+    inv = dict(store[inv_pos], total=999.0)
+    store[inv_pos] = inv
+    changed = relink_emails(store, inv, "TF-2024-001")
+    assert [e["source_file"] for e in changed] == ["e.eml", "f.eml"]
+    assert store[0]["matched_invoice_total"] == 999.0 and store[0]["matched_via"] == "exact"
+    assert store[1]["matched_via"] == "fuzzy"  # ίδιος αριθμός: η fuzzy σύνδεση μένει
+
+    inv = dict(inv, invoice_number="ZZ-555")
+    store[inv_pos] = inv
+    changed = relink_emails(store, inv, "TF-2024-001")
+    assert sorted(e["source_file"] for e in changed) == ["e.eml", "f.eml", "n.eml"]
+    assert not store[0]["matched_invoice_html"] and store[0]["needs_action"]
+    assert store[1]["matched_via"] == "none"
+    assert store[2]["matched_invoice_file"] == "inv1.html" and not store[2]["needs_action"]
+    assert store[3] is untouched
+    assert store.select(["email"], needs_action_only=True) == [store[0], store[1], store[3]]
+
+
+def test_enrich_with_persisted_ngram_index(tmp_path):
+    path = str(tmp_path / "ngrams.json")
+    InvoiceNgramIndex({"TF2024999": 0}).save(path)  # από προηγούμενο run
+    emails = [_email(subject="Τιμολόγιο #TF2024-01")]
+    expected = enrich_emails(emails, INVOICES, fuzzy=80)
+    for signals in (False, True):
+        ngrams = InvoiceNgramIndex.load(path)
+        got = enrich_emails(emails, InvoiceIndex(INVOICES, ngrams), fuzzy=80, signals=signals)
+        assert got[0]["matched_invoice_file"] == expected[0]["matched_invoice_file"] == "inv1.html"
+        assert "TF2024001" in ngrams and "TF2024999" not in ngrams
+
+
+def test_fuzzy_stage_never_labels_exact():
+    invoices = [{"invoice_number": "TF-2024-0011", "total": 9.0, "source_file": "inv2.html"}]
+    emails = [_email(subject="Τιμολόγιο #TF-2024-001")]
+    out = enrich_emails(emails, invoices, fuzzy=80)
+    assert out[0]["matched_invoice_file"] == "inv2.html"
+    assert out[0]["matched_via"] == "fuzzy" and out[0]["fuzzy_score"] == 100
@@ -0,0 +1,88 @@
+from data_parser.record_store import RecordStore
+
+
+def _recs() -> list[dict]:
+    return [
+        {"id": "f1", "source": "form", "status": "pending"},
+        {"id": "e1", "source": "email", "status": "pending", "needs_action": True},
+        {"id": "i1", "source": "invoice_html", "status": "approved", "invoice_number": "INV-1001"},
+        {"id": "e2", "source": "email", "status": "rejected", "invoice_number": "INV-1001"},
+    ]
+
+
+def test_lookups_and_select_match_linear_scans():
+    recs = _recs()
+    store = RecordStore(recs)
+    assert store.index_of("i1") == 2 and store.index_of("nope") == -1
+    assert store.invoice_index_of("inv 1001") == 2  # μόνο invoice_html, normalized
+    assert store.find_invoice("INV-1001") is recs[2]
+    assert store.invoices.get("INV1001") is recs[2] and "X" not in store.invoices
+
+    for sources, statuses, needs in [
+        (["form", "email"], ["pending"], False),
+        (["email", "invoice_html"], ["pending", "approved", "rejected"], True),
+        ([], ["pending"], False),
+    ]:
+        expected = [
+            r
+            for r in recs
+            if r.get("source") in sources
+            and r.get("status") in statuses
+            and (not needs or r.get("needs_action"))
+        ]
+        assert store.select(sources, statuses, needs) == expected
+
+
+def test_indexes_follow_in_place_mutation():
+    store = RecordStore(_recs())
+    rec = store[1]
+    rec["status"] = "approved"
+    rec["needs_action"] = False
+    store[1] = rec
+    assert store.select(["email"], ["pending"]) == []
+    assert store.select(None, ["approved"]) == [store[1], store[2]]
+    assert store.select(needs_action_only=True) == []
+
+    inv = dict(store[2], invoice_number="INV-2000")
+    store[2] = inv
+    assert store.invoice_index_of("INV-1001") is None
+    assert store.find_invoice("inv2000") is inv
+
+    store.append({"id": "f2", "source": "form", "status": "pending"})
+    assert store.index_of("f2") == 4 and len(store) == 5
+
+
+def test_reverse_index_invoice_to_emails():
+    store = RecordStore(
+        [
+            {"id": "e1", "source": "email", "invoice_number_in_subject": "INV-1001"},
+            {"id": "e2", "source": "email", "matched_invoice_file": "a.html"},
+            {"id": "i1", "source": "invoice_html", "invoice_number": "INV-1001"},
+        ]
+    )
+    assert store.emails_referencing("inv 1001") == {0}
+    assert store.emails_referencing("INV-1001", None, source_file="a.html") == {0, 1}
+    store[0] = dict(store[0], invoice_number_in_subject="INV-2")
+    assert store.emails_referencing("INV-1001") == set()
+    assert store.emails_referencing("INV2") == {0}
+
+
+def test_summary_store_loads_full_record_on_demand():
+    full = {r["id"]: dict(r, body="μεγάλο κείμενο", items=[1, 2]) for r in _recs()}
+    calls: list[list[str]] = []
+
+    def loader(ids):
+        calls.append(ids)
+        return {i: dict(full[i]) for i in ids if i in full}
+
+    store = RecordStore.from_summaries((dict(r) for r in full.values()), loader)
+    assert "body" not in store[1] and store.is_partial(1)
+    assert store.search("κειμενο") == {0, 1, 2, 3}  # το search βλέπει και τα bodies
+    assert store.select(["email"], needs_action_only=True) == [store[1]]
+
+    assert store.full(1)["items"] == [1, 2] and not store.is_partial(1)
+    assert store.full(1) is store[1] and calls == [["e1"]]
+
+    resolved = store.resolve(store.records)
+    assert all("body" in r for r in resolved) and calls[-1] == ["f1", "i1", "e2"]
+    assert store.is_partial(0)  # το resolve δεν γεμίζει το store
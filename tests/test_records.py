@@ -0,0 +1,49 @@
+import json
+
+from data_parser.record_store import RecordStore
+from data_parser.records import (
+    EmailRecord,
+    InvoiceItem,
+    InvoiceRecord,
+    dumps_record,
+    loads_record,
+    record_from_dict,
+)
+
+INVOICE = {
+    "id": "i1",
+    "source": "invoice_html",
+    "status": "pending",
+    "invoice_number": "INV-1",
+    "total": 12.4,
+    "items": [{"description": "A", "quantity": 1.0, "unit_price": 10.0, "line_total": 10.0}],
+    "custom": "x",
+}
+
+
+def test_typed_record_behaves_like_dict():
+    rec = record_from_dict(dict(INVOICE))
+    assert isinstance(rec, InvoiceRecord) and isinstance(rec["items"][0], InvoiceItem)
+    assert not hasattr(rec, "__dict__")
+    assert rec == INVOICE and dict(rec) == INVOICE and list(rec) == list(INVOICE)
+    assert rec.get("vat_amount") is None and "vat_amount" not in rec and "custom" in rec
+
+    rec.update(status="approved", notes="ok")
+    del rec["custom"]
+    assert {**rec}["notes"] == "ok" and "custom" not in rec and len(rec) == len(INVOICE)
+    assert record_from_dict({"source": "other"}) == {"source": "other"}
+
+
+def test_categorical_values_are_interned_and_json_roundtrips():
+    a = EmailRecord(json.loads('{"source": "email", "status": "pending"}'))
+    b = EmailRecord(json.loads('{"source": "email", "status": "pending"}'))
+    assert a["status"] is b["status"] and a["source"] is b["source"]
+
+    line = dumps_record(record_from_dict(dict(INVOICE)))
+    assert json.loads(line) == INVOICE and loads_record(line) == INVOICE
+
+
+def test_store_keeps_typed_summaries():
+    store = RecordStore.from_summaries([dict(INVOICE)], lambda ids: {}, typed=True)
+    assert isinstance(store[0], InvoiceRecord) and "items" not in store[0]
+    assert store.find_invoice("inv1") is store[0] and store.select(["invoice_html"])
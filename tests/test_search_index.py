@@ -0,0 +1,31 @@
+from data_parser.record_store import RecordStore
+from data_parser.search_index import SearchIndex
+
+
+def _recs() -> list[dict]:
+    return [
+        {"source": "form", "full_name": "Σπύρος Μιχαήλ", "email": "spyros@techcorp.gr"},
+        {"source": "email", "subject": "Invoice INV-1001", "body": "Please find attached"},
+        {"source": "invoice_html", "invoice_number": "INV-1002", "seller_name": "Acme Ltd"},
+    ]
+
+
+def test_substring_and_prefix_queries():
+    idx = SearchIndex(_recs())
+    assert idx.search("") is None
+    assert idx.search("TECHCORP.GR") == {0}
+    assert idx.search("inv-100") == {1, 2}
+    assert idx.search("attach") == {1}  # email body
+    assert idx.search("acme") == {2}  # seller_name
+    assert idx.search("me", prefix=False) == {2}
+    assert idx.search("cme", prefix=True) == set()
+    assert idx.search("a") == {1, 2}  # < 3 χαρακτήρες: σάρωση
+
+
+def test_record_store_keeps_search_in_sync():
+    store = RecordStore(_recs())
+    assert store.search("acme") == {2}
+    store[2] = dict(store[2], seller_name="Globex")
+    store.append({"source": "form", "company": "Acme Holdings"})
+    assert store.search("acme") == {3}
+    assert store.select(["form"], within=store.search("acme")) == [store[3]]
@@ -0,0 +1,162 @@
+import pytest
+
+from data_parser import codec
+from data_parser.jsonl import RecordSpill, iter_records, write_records
+from data_parser.storage import FeedStorage, JsonFeedStorage, SqliteFeedStorage
+
+
+def _recs() -> list[dict]:
+    return [
+        {"id": "a", "source": "form", "status": "pending"},
+        {"id": "b", "source": "invoice_html", "status": "pending", "invoice_number": "INV-1"},
+    ]
+
+
+def test_sqlite_upsert_touches_only_given_records(tmp_path):
+    store = SqliteFeedStorage(str(tmp_path / "feed.sqlite"))
+    assert not store.exists()
+    store.replace_all(_recs())
+
+    store.upsert([{"id": "b", "source": "invoice_html", "status": "approved"}])
+    store.upsert([{"id": "c", "source": "email", "status": "pending", "needs_action": True}])
+
+    data = store.load_all()
+    assert [r["id"] for r in data] == ["a", "b", "c"]  # η σειρά διατηρείται
+    assert data[1]["status"] == "approved"
+    assert store.get("c")["needs_action"] is True
+
+
+def test_sqlite_export_json_roundtrip(tmp_path):
+    store = SqliteFeedStorage(str(tmp_path / "feed.sqlite"))
+    store.replace_all(_recs())
+    out = store.export_json(str(tmp_path / "combined_feed.json"))
+    assert JsonFeedStorage(out).load_all() == _recs()
+
+
+def test_json_journal_replay_and_compaction(tmp_path, monkeypatch):
+    path = tmp_path / "combined_feed.json"
+    store = JsonFeedStorage(str(path))
+    store.replace_all(_recs())
+    snapshot = path.read_bytes()
+
+    store.upsert([{"id": "b", "status": "approved"}], actor="tester")
+    store.upsert([{"id": "c", "source": "email", "status": "pending"}], actor="tester")
+
+    assert path.read_bytes() == snapshot  # τα edits πάνε μόνο στο journal
+    entries = list(store.iter_journal())
+    assert [(e["id"], e["actor"]) for e in entries] == [("b", "tester"), ("c", "tester")]
+    data = store.load_all()
+    assert [r["id"] for r in data] == ["a", "b", "c"]
+    assert data[1]["status"] == "approved" and data[1]["invoice_number"] == "INV-1"
+
+    # μισογραμμένη γραμμή (crash) αγνοείται
+    with open(store.journal_path, "a", encoding="utf-8") as f:
+        f.write('{"id": "a", "fields": {"sta')
+    assert store.load_all() == data
+
+    monkeypatch.setattr("data_parser.storage.JOURNAL_MAX_BYTES", 1)
+    store.upsert([{"id": "a", "notes": "ok"}])
+    assert not (tmp_path / "combined_feed.journal.jsonl").exists()
+    assert JsonFeedStorage(str(path)).load_all()[0]["notes"] == "ok"
+
+
+def test_version_changes_only_on_write(tmp_path):
+    for store in (
+        JsonFeedStorage(str(tmp_path / "combined_feed.json")),
+        SqliteFeedStorage(str(tmp_path / "feed.sqlite")),
+    ):
+        store.replace_all(_recs())
+        v1 = store.version()
+        store.load_all()
+        assert store.version() == v1
+        store.upsert([{"id": "a", "source": "form", "status": "approved"}])
+        assert store.version() != v1
+
+
+def test_jsonl_snapshot_streams_and_replays_journal(tmp_path):
+    path = tmp_path / "combined_feed.jsonl"
+    assert write_records((r for r in _recs()), path) == 2  # δέχεται generator
+    assert path.read_text(encoding="utf-8").count("\n") == 2
+    assert list(iter_records(path)) == _recs()
+
+    store = JsonFeedStorage(str(path))
+    store.upsert([{"id": "b", "status": "approved"}], actor="tester")
+    assert store.journal_path.endswith("combined_feed.journal.jsonl")
+    assert store.load_all()[1]["status"] == "approved"
+    store.compact()
+    assert [r["status"] for r in iter_records(path)] == ["pending", "approved"]
+
+    as_json = tmp_path / "feed.json"
+    write_records(iter_records(path), as_json)
+    assert JsonFeedStorage(str(as_json)).load_all() == store.load_all()
+
+
+def test_lazy_backends_stream_and_load_by_id(tmp_path):
+    jsonl = JsonFeedStorage(str(tmp_path / "combined_feed.jsonl"))
+    assert not JsonFeedStorage(str(tmp_path / "combined_feed.json")).supports_lazy
+    for store in (jsonl, SqliteFeedStorage(str(tmp_path / "feed.sqlite"))):
+        assert store.supports_lazy
+        store.replace_all(_recs())
+        store.upsert([{"id": "b", "source": "invoice_html", "status": "approved"}])
+        store.upsert([{"id": "c", "source": "email", "status": "pending"}])
+        assert list(store.iter_all()) == store.load_all()
+        got = store.get_many(["c", "b", "zz"])
+        assert sorted(got) == ["b", "c"] and got["b"]["status"] == "approved"
+    assert jsonl.get_many(["b"])["b"]["invoice_number"] == "INV-1"  # snapshot + journal
+
+
+def test_json_journal_keeps_only_changed_fields(tmp_path):
+    path = tmp_path / "combined_feed.jsonl"
+    old = {"id": "b", "source": "invoice_html", "status": "pending", "items": [1] * 50, "x": 1}
+    store = JsonFeedStorage(str(path))
+    store.replace_all([_recs()[0], old])
+
+    new = {k: v for k, v in old.items() if k != "x"}
+    new["status"] = "approved"
+    store.upsert([new], actor="tester", previous={"b": old})
+    store.upsert([new], actor="tester", previous={"b": new})  # καμία αλλαγή: καμία γραμμή
+
+    entries = list(store.iter_journal())
+    assert [(e["fields"], e.get("unset")) for e in entries] == [({"status": "approved"}, ["x"])]
+    assert store.load_all()[1] == new
+    assert list(store.iter_all())[1] == new and store.get_many(["b"]) == {"b": new}
+
+
+def test_streamed_json_array_matches_pretty_dump(tmp_path):
+    recs = _recs() + [{"id": "c", "message": "γραμμή 1\nγραμμή 2", "items": [{"n": 1}], "x": {}}]
+    for data in (recs, []):
+        path = tmp_path / "feed.json"
+        assert write_records(iter(data), path) == len(data)
+        assert path.read_bytes() == codec.dumps(data, pretty=True)
+        assert not (tmp_path / "feed.json.tmp").exists()
+
+
+def test_record_spill_sorts_stably_by_key(tmp_path):
+    recs = [{"id": str(i), "created_at": ts} for i, ts in enumerate(["b", "a", "c", "a", "b"])]
+    with RecordSpill(key=lambda r: r["created_at"], dir=str(tmp_path)) as spill:
+        spill.extend(iter(recs))
+        assert len(spill) == 5 and list(spill) == recs
+        spill.sort(reverse=True)
+        # όπως list.sort(reverse=True): ίσα κλειδιά κρατούν τη σειρά εισαγωγής
+        assert [r["id"] for r in spill] == ["2", "0", "4", "1", "3"]
+
+
+def test_feed_storage_iterates_snapshot_and_journal(tmp_path):
+    for name in ("combined_feed.json", "combined_feed.jsonl"):
+        store = JsonFeedStorage(str(tmp_path / name))
+        store.replace_all(r for r in _recs())
+        store.upsert([{"id": "a", "status": "approved"}])
+        assert list(store) == list(store) == store.load_all()
+        assert [r["status"] for r in store] == ["approved", "pending"]
+        store.compact()
+        assert list(iter_records(store.path)) == store.load_all()
+
+
+def test_feed_storage_backends_must_implement_interface():
+    class Partial(FeedStorage):
+        def load_all(self) -> list[dict]:
+            return []
+
+    for cls in (FeedStorage, Partial):
+        with pytest.raises(TypeError):
+            cls()
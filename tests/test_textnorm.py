@@ -0,0 +1,24 @@
+from data_parser.matching import normalize_inv
+from data_parser.search_index import SearchIndex
+from data_parser.textnorm import fold, greeklish
+
+
+def test_fold_greek_accents_case_and_final_sigma():
+    assert fold("Τιμολόγιο") == fold("ΤΙΜΟΛΟΓΙΟ") == "τιμολογιο"
+    assert fold("Προϊόντα ΐ") == "προιοντα ι"
+    assert fold("ΟΔΟΣ") == fold("οδός") == "οδοσ"
+    assert fold("Café") == "cafe" and fold(None) == ""
+
+
+def test_greeklish_and_invoice_keys():
+    assert greeklish("Τιμολόγιο Αθήνα") == "timologio athina"
+    assert greeklish("TechCorp") == "techcorp"
+    assert normalize_inv("Τιμ-001/ς") == normalize_inv("ΤΙΜ 001 Σ") == "ΤΙΜ001Σ"
+
+
+def test_search_is_accent_insensitive():
+    recs = [{"subject": "Τιμολόγιο Νο. 7"}, {"subject": "Προσφορά"}]
+    assert SearchIndex(recs).search("τιμολογιο") == {0}
+    assert SearchIndex(recs).search("ΠΡΟΣΦΟΡΑ") == {1}
+    assert SearchIndex(recs).search("timologio") == set()
+    assert SearchIndex(recs, greeklish=True).search("timologio") == {0}